@@ -0,0 +1,308 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional, Tuple
+
+from .config import get_settings
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Interactive work (chat, single synthesis and voice turns) is always
+# dispatched before batch work such as batch synthesis.
+PRIORITIES = ("interactive", "batch")
+
+ADMISSION_QUEUE_DEPTH = metrics.gauge(
+    "admission_queue_depth", "Calls waiting for an upstream slot.", ["upstream", "priority"]
+)
+ADMISSION_WAIT_SECONDS = metrics.histogram(
+    "admission_wait_seconds", "Time calls waited for an upstream slot.", ["upstream", "priority"]
+)
+ADMISSION_REJECTED = metrics.counter(
+    "admission_rejected_total",
+    "Calls rejected by admission control: queue_full, user_queue_full, timeout.",
+    ["upstream", "reason"]
+)
+
+
+class AdmissionRejectedError(ValueError):
+    """The upstream's queue is full; the caller may retry after ``retry_after`` seconds."""
+
+    def __init__(self, name: str, reason: str, retry_after: float):
+        super().__init__(f"{name} is over capacity ({reason}), retry in {retry_after:.0f}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class RequestContext(NamedTuple):
+    user_id: str = "anonymous"
+    priority: str = "interactive"
+
+
+_request_context: ContextVar[RequestContext] = ContextVar(
+    "admission_context", default=RequestContext()
+)
+
+
+def set_request_context(user_id: Optional[str], priority: str = "interactive") -> None:
+    """Tag upstream calls made from the current request with its user and priority.
+
+    Set once at the start of a route handler; tasks the handler starts, and
+    a streaming response's body, inherit it.
+    """
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown priority: {priority}")
+    _request_context.set(RequestContext(user_id or "anonymous", priority))
+
+
+class TokenBucket:
+    """``rate`` calls per second on average, in bursts of up to ``burst``."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_take(self) -> bool:
+        if self.rate <= 0:
+            return True
+        self._refill()
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def wait_time(self) -> float:
+        """Seconds until the next token."""
+        self._refill()
+        return max(0.0, (1 - self._tokens) / self.rate)
+
+
+class _Waiter:
+    __slots__ = ("user_id", "priority", "future", "queued_at")
+
+    def __init__(self, user_id: str, priority: str, future: "asyncio.Future[None]"):
+        self.user_id = user_id
+        self.priority = priority
+        self.future = future
+        self.queued_at = time.perf_counter()
+
+
+class AdmissionScheduler:
+    """Concurrency, rate and fair-queueing gate in front of one upstream.
+
+    A call is admitted at once while fewer than ``max_concurrency`` calls
+    hold a slot and the token bucket allows it. Otherwise it waits, and
+    waiting calls are dispatched interactive before batch and, within a
+    priority, by start-time fair queueing: each user's calls are spaced
+    ``1 / weight`` apart in virtual time, so a user with many queued calls
+    cannot starve one with a single call.
+
+    Calls fail fast with ``AdmissionRejectedError`` when ``max_queue`` calls,
+    or ``max_queue_per_user`` from the same user, are already waiting, and
+    when a call has waited ``max_wait`` seconds.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        rate: float,
+        burst: int,
+        max_queue: int,
+        max_queue_per_user: int,
+        max_wait: float,
+        weights: Optional[Dict[str, float]] = None
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.bucket = TokenBucket(rate, burst)
+        self.max_queue = max_queue
+        self.max_queue_per_user = max_queue_per_user
+        self.max_wait = max_wait
+        self.weights = dict(weights or {})
+        self.in_flight = 0
+        self._queues: Dict[str, List[Tuple[float, int, _Waiter]]] = {p: [] for p in PRIORITIES}
+        self._queued_by_user: Dict[str, int] = {}
+        self._last_finish: Dict[str, float] = {}
+        self._virtual_time = 0.0
+        self._sequence = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Smoothed time a slot is held, for Retry-After estimates.
+        self._hold_seconds = 1.0
+        self._stats = {"admitted": 0, "queued": 0, "rejected": 0}
+
+    @property
+    def queued(self) -> int:
+        return sum(self._queued_by_user.values())
+
+    def _retry_after(self) -> float:
+        drain_rate = self.max_concurrency / max(self._hold_seconds, 0.001)
+        if self.bucket.rate > 0:
+            drain_rate = min(drain_rate, self.bucket.rate)
+        return min(self.max_wait, max(1.0, (self.queued + 1) / drain_rate))
+
+    def _reject(self, reason: str) -> AdmissionRejectedError:
+        self._stats["rejected"] += 1
+        ADMISSION_REJECTED.inc(upstream=self.name, reason=reason)
+        return AdmissionRejectedError(self.name, reason, self._retry_after())
+
+    def check(self) -> None:
+        """Fail now if a call from the current request would be rejected for a full queue.
+
+        For responses that start streaming before their upstream call is made.
+        """
+        user_id = _request_context.get().user_id
+        if self.queued >= self.max_queue:
+            raise self._reject("queue_full")
+        if self._queued_by_user.get(user_id, 0) >= self.max_queue_per_user:
+            raise self._reject("user_queue_full")
+
+    def _enqueue(self, context: RequestContext) -> _Waiter:
+        waiter = _Waiter(
+            context.user_id, context.priority, asyncio.get_running_loop().create_future()
+        )
+        start = max(self._virtual_time, self._last_finish.get(context.user_id, 0.0))
+        self._last_finish[context.user_id] = start + 1 / self.weights.get(context.user_id, 1.0)
+        heapq.heappush(self._queues[context.priority], (start, next(self._sequence), waiter))
+        self._queued_by_user[context.user_id] = self._queued_by_user.get(context.user_id, 0) + 1
+        self._stats["queued"] += 1
+        ADMISSION_QUEUE_DEPTH.inc(upstream=self.name, priority=context.priority)
+        return waiter
+
+    def _dequeued(self, waiter: _Waiter) -> None:
+        count = self._queued_by_user[waiter.user_id] - 1
+        if count:
+            self._queued_by_user[waiter.user_id] = count
+        else:
+            del self._queued_by_user[waiter.user_id]
+        if not self._queued_by_user:
+            # Nobody is waiting: every user starts afresh.
+            self._last_finish.clear()
+        ADMISSION_QUEUE_DEPTH.dec(upstream=self.name, priority=waiter.priority)
+
+    def _next_queue(self) -> Optional[List[Tuple[float, int, _Waiter]]]:
+        """The queue to dispatch from next, or None if nobody is waiting."""
+        for priority in PRIORITIES:
+            queue = self._queues[priority]
+            # Waiters that timed out or were cancelled are dropped here.
+            while queue and queue[0][2].future.done():
+                heapq.heappop(queue)
+            if queue:
+                return queue
+        return None
+
+    def _dispatch(self) -> None:
+        self._timer = None
+        while self.in_flight < self.max_concurrency and (queue := self._next_queue()):
+            if not self.bucket.try_take():
+                self._timer = asyncio.get_running_loop().call_later(
+                    self.bucket.wait_time(), self._dispatch
+                )
+                return
+            self._virtual_time, _, waiter = heapq.heappop(queue)
+            self._dequeued(waiter)
+            self.in_flight += 1
+            waiter.future.set_result(None)
+
+    async def _acquire(self) -> None:
+        context = _request_context.get()
+        if (
+            self.in_flight < self.max_concurrency
+            and self._next_queue() is None
+            and self.bucket.try_take()
+        ):
+            self.in_flight += 1
+            self._stats["admitted"] += 1
+            ADMISSION_WAIT_SECONDS.observe(0.0, upstream=self.name, priority=context.priority)
+            return
+        self.check()
+        waiter = self._enqueue(context)
+        if self._timer is None:
+            self._dispatch()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.future.done():
+                # Admitted just as the wait ended; hand the slot on.
+                self._release()
+            else:
+                waiter.future.cancel()
+                self._dequeued(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                raise self._reject("timeout") from e
+            raise
+        self._stats["admitted"] += 1
+        ADMISSION_WAIT_SECONDS.observe(
+            time.perf_counter() - waiter.queued_at, upstream=self.name, priority=context.priority
+        )
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        if self._timer is None:
+            self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one of the upstream's slots for the duration of the block.
+
+        Raises:
+            AdmissionRejectedError: If the queue is full or the wait too long
+        """
+        await self._acquire()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._hold_seconds = 0.9 * self._hold_seconds + 0.1 * (time.perf_counter() - started)
+            self._release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "rate": self.bucket.rate,
+            "waiting": {
+                priority: sum(not w.future.done() for _, _, w in queue)
+                for priority, queue in self._queues.items()
+            },
+        }
+
+
+_schedulers: Dict[str, AdmissionScheduler] = {}
+
+
+def get_admission(name: str) -> AdmissionScheduler:
+    """Return the process-wide admission scheduler for an upstream, e.g. ``"openai"``.
+
+    Concurrency and rate come from the ``<name>_max_concurrency`` and
+    ``<name>_rate_limit`` settings; queue limits are shared by every upstream.
+    """
+    if name not in _schedulers:
+        settings = get_settings()
+        _schedulers[name] = AdmissionScheduler(
+            name,
+            max_concurrency=getattr(settings, f"{name}_max_concurrency"),
+            rate=getattr(settings, f"{name}_rate_limit"),
+            burst=settings.admission_rate_burst,
+            max_queue=settings.admission_max_queue,
+            max_queue_per_user=settings.admission_max_queue_per_user,
+            max_wait=settings.admission_max_wait,
+            weights=settings.admission_user_weights
+        )
+    return _schedulers[name]
+
+
+def admission_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: scheduler.stats() for name, scheduler in _schedulers.items()}
@@ -0,0 +1,146 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional
+
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class AudioCache:
+    """Content-addressed cache for synthesized audio.
+
+    Entries are keyed on everything that affects the audio (engine, text,
+    voice, language and output format). The memory tier is an LRU bounded by
+    a byte budget; the optional disk tier keeps evicted and cold entries
+    under ``disk_dir`` with its own byte budget, evicting the least recently
+    written files first.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        disk_dir: Optional[str] = None,
+        disk_max_bytes: int = 0
+    ):
+        self.max_bytes = max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_dir = Path(disk_dir) if disk_dir else None
+        self._disk_entries: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+        self._disk_lock = threading.Lock()
+        self._stats = {
+            "hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "disk_evictions": 0
+        }
+        if self._disk_dir is not None:
+            self._load_disk_index()
+
+    @staticmethod
+    def make_key(
+        engine: str, text: str, voice_id: str, language: str, output_format: str
+    ) -> str:
+        payload = json.dumps([engine, text, voice_id, language, output_format], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        if (data := self._entries.get(key)) is not None:
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return data
+        if self._disk_dir is not None and key in self._disk_entries:
+            data = await asyncio.to_thread(self._read_disk, key)
+            if data is not None:
+                self._stats["disk_hits"] += 1
+                self._store_memory(key, data)
+                return data
+        self._stats["misses"] += 1
+        return None
+
+    async def put(self, key: str, data: bytes) -> None:
+        self._store_memory(key, data)
+        if self._disk_dir is not None and key not in self._disk_entries:
+            await asyncio.to_thread(self._write_disk, key, data)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            **self._stats,
+            "entries": len(self._entries),
+            "memory_bytes": self._memory_bytes,
+            "disk_entries": len(self._disk_entries),
+            "disk_bytes": self._disk_bytes,
+        }
+
+    def _store_memory(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        if (previous := self._entries.pop(key, None)) is not None:
+            self._memory_bytes -= len(previous)
+        self._entries[key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self._stats["evictions"] += 1
+
+    def _path(self, key: str) -> Path:
+        assert self._disk_dir is not None
+        return self._disk_dir / key[:2] / f"{key}.audio"
+
+    def _load_disk_index(self) -> None:
+        assert self._disk_dir is not None
+        files = sorted(self._disk_dir.glob("*/*.audio"), key=lambda path: path.stat().st_mtime)
+        for path in files:
+            size = path.stat().st_size
+            self._disk_entries[path.stem] = size
+            self._disk_bytes += size
+        logger.info("Loaded %d cached audio files from %s", len(files), self._disk_dir)
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        try:
+            return self._path(key).read_bytes()
+        except FileNotFoundError:
+            self._forget_disk(key)
+            return None
+
+    def _write_disk(self, key: str, data: bytes) -> None:
+        if self.disk_max_bytes and len(data) > self.disk_max_bytes:
+            return
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+        with self._disk_lock:
+            if key in self._disk_entries:
+                return
+            self._disk_entries[key] = len(data)
+            self._disk_bytes += len(data)
+            while self.disk_max_bytes and self._disk_bytes > self.disk_max_bytes:
+                evicted_key, size = self._disk_entries.popitem(last=False)
+                self._disk_bytes -= size
+                self._path(evicted_key).unlink(missing_ok=True)
+                self._stats["disk_evictions"] += 1
+
+    def _forget_disk(self, key: str) -> None:
+        with self._disk_lock:
+            if (size := self._disk_entries.pop(key, None)) is not None:
+                self._disk_bytes -= size
+
+
+@lru_cache()
+def get_audio_cache() -> AudioCache:
+    settings = get_settings()
+    return AudioCache(
+        max_bytes=settings.tts_cache_max_bytes,
+        disk_dir=settings.tts_cache_dir,
+        disk_max_bytes=settings.tts_cache_disk_max_bytes,
+    )
@@ -0,0 +1,78 @@
+import asyncio
+import struct
+from typing import Optional
+
+from .audio_session import DEFAULT_FORMAT, AudioFormat
+from .flow_control import WebSocketChannel
+from .tracing import get_tracer
+
+# Binary framing: flags (bit 0 = final) and sequence number, then the payload.
+BINARY_FRAME_HEADER = struct.Struct("!BI")
+FINAL_FLAG = 0x01
+
+
+class AudioFrameSender:
+    """Send one utterance of streamed audio over a WebSocket.
+
+    With ``json`` framing each chunk goes out as a JSON header
+    ``{type, seq, format, size, is_final}`` followed by its binary payload;
+    ``end()`` sends a closing header with ``is_final`` set and no payload. A
+    lock shared by everything writing to the same socket keeps each
+    header/payload pair together. With ``binary`` framing each chunk is a
+    single binary message prefixed by ``BINARY_FRAME_HEADER``, and the format
+    is the one agreed in the session header.
+
+    For PCM and μ-law, chunks are cut at frame boundaries of the format's
+    ``frame_ms``; the remainder is held until the next chunk or ``end()``.
+    """
+
+    def __init__(
+        self,
+        channel: WebSocketChannel,
+        audio_format: AudioFormat = DEFAULT_FORMAT,
+        lock: Optional[asyncio.Lock] = None,
+        binary: bool = False
+    ):
+        self.channel = channel
+        self.audio_format = audio_format
+        self.lock = lock or asyncio.Lock()
+        self.binary = binary
+        self.seq = 0
+        self._pending = b""
+
+    def _header(self, size: int, is_final: bool) -> dict:
+        return {
+            "type": "audio",
+            "seq": self.seq,
+            "format": self.audio_format.name,
+            "size": size,
+            "is_final": is_final
+        }
+
+    async def _send(self, chunk: bytes, is_final: bool) -> None:
+        async with self.lock:
+            if self.binary:
+                flags = FINAL_FLAG if is_final else 0
+                await self.channel.send_bytes(BINARY_FRAME_HEADER.pack(flags, self.seq) + chunk)
+                return
+            await self.channel.send_json(self._header(len(chunk), is_final))
+            if chunk:
+                await self.channel.send_bytes(chunk)
+
+    async def send_chunk(self, chunk: bytes) -> None:
+        if (frame_bytes := self.audio_format.frame_bytes) is not None:
+            chunk = self._pending + chunk
+            cut = len(chunk) - len(chunk) % frame_bytes
+            chunk, self._pending = chunk[:cut], chunk[cut:]
+            if not chunk:
+                return
+        with get_tracer().span("websocket.send", bytes=len(chunk)):
+            await self._send(chunk, False)
+        self.seq += 1
+
+    async def end(self) -> None:
+        if self._pending:
+            chunk, self._pending = self._pending, b""
+            await self._send(chunk, False)
+            self.seq += 1
+        await self._send(b"", True)
@@ -0,0 +1,160 @@
+import json
+from typing import Any, Dict, MutableMapping, NamedTuple, Optional, Sequence, Tuple
+
+from .config import get_settings
+from .flow_control import WebSocketChannel
+
+# Supported sample rates per codec, preferred first. Output rates are the ones
+# Azure can synthesize to; Opus input is decoded by the SDK, whatever its rate.
+INPUT_SAMPLE_RATES: Dict[str, Tuple[int, ...]] = {
+    "pcm": (16000, 8000),
+    "mulaw": (8000, 16000),
+    "opus": (48000, 24000, 16000),
+}
+OUTPUT_SAMPLE_RATES: Dict[str, Tuple[int, ...]] = {
+    "pcm": (16000, 8000, 24000, 48000),
+    "mulaw": (8000,),
+    "opus": (24000, 16000, 48000),
+}
+FRAMINGS = ("json", "binary")
+MIN_FRAME_MS, MAX_FRAME_MS = 10, 200
+
+
+class AudioFormat(NamedTuple):
+    """Codec, sample rate, channels and frame duration of one audio direction."""
+
+    codec: str = "pcm"
+    sample_rate: int = 16000
+    channels: int = 1
+    frame_ms: int = 20
+
+    @property
+    def name(self) -> str:
+        """Azure's name for the format, e.g. ``raw-16khz-16bit-mono-pcm``."""
+        container = "ogg" if self.codec == "opus" else "raw"
+        bits = 8 if self.codec == "mulaw" else 16
+        rate = (
+            f"{self.sample_rate // 1000}khz" if self.sample_rate % 1000 == 0
+            else f"{self.sample_rate}hz"
+        )
+        return f"{container}-{rate}-{bits}bit-mono-{self.codec}"
+
+    @property
+    def frame_bytes(self) -> Optional[int]:
+        """Bytes per frame for sample-based codecs; None for Opus."""
+        if self.codec == "opus":
+            return None
+        sample_bytes = 1 if self.codec == "mulaw" else 2
+        return self.sample_rate * self.frame_ms // 1000 * sample_bytes * self.channels
+
+    def describe(self) -> Dict[str, Any]:
+        return {**self._asdict(), "format": self.name}
+
+
+DEFAULT_FORMAT = AudioFormat()
+
+
+class AudioSession(NamedTuple):
+    """What a WebSocket client and the server agreed to exchange.
+
+    ``framing`` is how audio is sent to the client: ``json`` sends a JSON
+    header message before each binary chunk, ``binary`` prefixes each chunk
+    with a 5-byte header instead (see ``AudioFrameSender``).
+    """
+
+    input: AudioFormat = DEFAULT_FORMAT
+    output: AudioFormat = DEFAULT_FORMAT
+    framing: str = "json"
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "type": "session",
+            "input": self.input.describe(),
+            "output": self.output.describe(),
+            "framing": self.framing,
+        }
+
+
+def _pick_format(requested: Any, sample_rates: Dict[str, Tuple[int, ...]]) -> AudioFormat:
+    """Choose the closest supported format to what the client asked for.
+
+    ``codec`` may be a list in order of preference; the first supported one
+    wins, falling back to PCM. An unsupported sample rate falls back to the
+    codec's preferred one, and audio is always mono.
+    """
+    if requested is None:
+        requested = {}
+    if not isinstance(requested, dict):
+        raise ValueError("Audio format must be an object")
+    codecs = requested.get("codec", "pcm")
+    if isinstance(codecs, str):
+        codecs = [codecs]
+    codec = next((codec for codec in codecs if codec in sample_rates), "pcm")
+    rates = sample_rates[codec]
+    sample_rate = requested.get("sample_rate", rates[0])
+    if sample_rate not in rates:
+        sample_rate = rates[0]
+    frame_ms = requested.get("frame_ms", DEFAULT_FORMAT.frame_ms)
+    if not isinstance(frame_ms, int):
+        raise ValueError("frame_ms must be an integer")
+    frame_ms = min(MAX_FRAME_MS, max(MIN_FRAME_MS, frame_ms))
+    return AudioFormat(codec, sample_rate, 1, frame_ms)
+
+
+def supported_input_codecs() -> Sequence[str]:
+    # Compressed input is decoded by GStreamer inside the Speech SDK.
+    if get_settings().azure_compressed_input:
+        return tuple(INPUT_SAMPLE_RATES)
+    return ("pcm", "mulaw")
+
+
+def negotiate(header: Dict[str, Any], input_codecs: Optional[Sequence[str]] = None) -> AudioSession:
+    """Answer a client's ``{"type": "session", ...}`` header.
+
+    Args:
+        header (dict): The client's ``input``/``output`` formats and ``framing``
+        input_codecs (Sequence[str]): Input codecs this server can decode;
+            defaults to ``supported_input_codecs()``
+
+    Returns:
+        AudioSession: The formats the server will use, which may differ from
+        the requested ones
+
+    Raises:
+        ValueError: If the header is malformed
+    """
+    input_codecs = input_codecs or supported_input_codecs()
+    input_rates = {
+        codec: rates for codec, rates in INPUT_SAMPLE_RATES.items() if codec in input_codecs
+    }
+    framing = header.get("framing", "json")
+    return AudioSession(
+        input=_pick_format(header.get("input"), input_rates),
+        output=_pick_format(header.get("output"), OUTPUT_SAMPLE_RATES),
+        framing=framing if framing in FRAMINGS else "json"
+    )
+
+
+async def open_audio_session(
+    channel: WebSocketChannel
+) -> Tuple[AudioSession, Optional[MutableMapping[str, Any]]]:
+    """Read the optional session header that starts an audio WebSocket.
+
+    A client that sends ``{"type": "session", ...}`` first gets the negotiated
+    session back. Clients that start sending audio straight away get the
+    default session, and their first message is returned for the caller to
+    handle.
+
+    Raises:
+        ValueError: If the header is malformed
+        WebSocketDisconnect: If the client disconnects first
+    """
+    message = await channel.receive()
+    if message.get("text") is None:
+        return AudioSession(), message
+    header = json.loads(message["text"])
+    if not isinstance(header, dict) or header.get("type") != "session":
+        raise ValueError("Expected a session header or audio")
+    session = negotiate(header)
+    await channel.send_json(session.describe())
+    return session, None
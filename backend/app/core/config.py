@@ -1,5 +1,6 @@
 from functools import lru_cache
 import logging
+from typing import Any, Dict, List, Literal, Optional
 
 from pydantic_settings import BaseSettings
 
@@ -13,6 +14,139 @@ class Settings(BaseSettings):
     azure_speech_key: str
     zonos_api_key: str
 
+    # Upstream HTTP connection pools
+    http_pool_limit: int = 100
+    http_pool_limit_per_host: int = 20
+    http_keepalive_timeout: float = 30.0
+    http_connect_timeout: float = 5.0
+    http_read_timeout: float = 60.0
+
+    # Azure Speech
+    azure_max_concurrency: int = 8
+    azure_pool_size: int = 2
+    azure_pool_max_idle_seconds: float = 240.0
+    azure_pool_preconnect: bool = True
+    azure_compressed_input: bool = False
+    azure_speech_region: str = "japaneast"
+
+    # Upstream endpoints (overridden to point at local stand-ins, e.g. for benchmarks)
+    zonos_base_url: str = "https://api.zonos.ai/v1"
+    openai_base_url: Optional[str] = None
+
+    # Upstream deadlines, retries, hedging and circuit breakers
+    zonos_deadline: float = 20.0
+    openai_deadline: float = 30.0
+    azure_deadline: float = 20.0
+    upstream_max_retries: int = 2
+    upstream_retry_backoff: float = 0.2
+    upstream_retry_backoff_max: float = 2.0
+    upstream_hedge_percentile: float = 0.95
+    upstream_hedge_min_samples: int = 20
+    circuit_failure_threshold: int = 5
+    circuit_reset_seconds: float = 30.0
+    tts_fallback_to_azure: bool = True
+
+    # Startup warm-up and readiness probes
+    # Off by default so workers that never serve speech never load the SDK.
+    startup_warm_up: bool = False
+    health_probe_interval: float = 30.0
+    health_probe_timeout: float = 5.0
+    # Every worker serves chat; speech workers should add "azure".
+    health_required_upstreams: str = "openai"
+
+    # Admission control: per-upstream concurrency and rate, fair queueing
+    # (azure_max_concurrency above also applies)
+    openai_max_concurrency: int = 20
+    zonos_max_concurrency: int = 20
+    openai_rate_limit: float = 0.0
+    zonos_rate_limit: float = 0.0
+    azure_rate_limit: float = 0.0
+    admission_rate_burst: int = 10
+    admission_max_queue: int = 200
+    admission_max_queue_per_user: int = 20
+    admission_max_wait: float = 10.0
+    admission_user_weights: Dict[str, float] = {}
+
+    # Per-request tracing
+    tracing_exporter: Literal["none", "stdout", "collector"] = "none"
+    tracing_sample_rate: float = 0.01
+    tracing_slow_threshold_seconds: float = 0.0
+    tracing_collector_max_traces: int = 200
+
+    # Voice activity detection in front of recognition
+    vad_enabled: bool = True
+    vad_margin_db: float = 10.0
+    vad_min_speech_db: float = -45.0
+    vad_pre_roll_ms: int = 200
+    # Ending an utterance forces a final result, so this must be longer than
+    # the pauses people make within a sentence.
+    vad_end_silence_ms: int = 1000
+    vad_flush_silence_ms: int = 1000
+
+    # WebSocket flow control
+    websocket_max_connections: int = 200
+    websocket_max_frame_bytes: int = 64 * 1024
+    websocket_max_utterance_bytes: int = 60 * 32000
+    websocket_high_watermark_bytes: int = 1024 * 1024
+    websocket_low_watermark_bytes: int = 256 * 1024
+
+    # Event loop watchdog
+    loop_watchdog_enabled: bool = False
+    loop_watchdog_interval: float = 0.25
+    loop_watchdog_threshold: float = 0.1
+    loop_watchdog_max_incidents: int = 50
+
+    # /debug/* endpoints: disabled unless set, then required as X-Debug-Token
+    debug_token: Optional[str] = None
+
+    # Sentence-level parallel synthesis
+    tts_chunk_concurrency: int = 4
+
+    # Batch synthesis
+    tts_batch_max_items: int = 50
+    tts_batch_concurrency: int = 4
+
+    # Synthesized audio cache
+    tts_cache_max_bytes: int = 64 * 1024 * 1024
+    tts_cache_dir: Optional[str] = None
+    tts_cache_disk_max_bytes: int = 1024 * 1024 * 1024
+
+    # Stored audio served from /api/audio/{id}
+    audio_store_dir: Optional[str] = None
+    audio_store_ttl_seconds: float = 3600.0
+    audio_store_cleanup_interval: float = 300.0
+
+    # Per-user conversation history
+    chat_history_backend: Literal["memory", "sqlite"] = "memory"
+    chat_history_sqlite_path: str = "conversations.db"
+    chat_history_max_tokens: int = 2000
+    chat_history_max_users: int = 10000
+    chat_summary_max_tokens: int = 200
+
+    # Chat model routing
+    chat_model: str = "gpt-4"
+    chat_routing_mode: Literal["off", "shadow", "on"] = "shadow"
+    chat_routing_rules: List[Dict[str, Any]] = [
+        {
+            "name": "small_talk",
+            "intents": ["greeting", "smalltalk"],
+            "max_chars": 80,
+            "models": ["gpt-4o-mini", "gpt-4"],
+            "max_latency": 2.0,
+        },
+    ]
+    chat_model_overrides: Dict[str, str] = {}
+    chat_routing_max_error_rate: float = 0.2
+    chat_routing_min_samples: int = 10
+    chat_routing_probe_interval: float = 30.0
+
+    # Chat response cache (off by default)
+    chat_cache_enabled: bool = False
+    chat_cache_similarity_threshold: float = 0.85
+    chat_cache_ttl_seconds: float = 3600.0
+    chat_cache_max_entries: int = 5000
+    chat_cache_max_message_chars: int = 40
+
     class Config:
         env_file = ".env"
 
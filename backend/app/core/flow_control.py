@@ -0,0 +1,281 @@
+import asyncio
+import json
+import logging
+from collections import deque
+from functools import lru_cache
+from typing import Any, Deque, Dict, MutableMapping, Optional, Tuple
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from .config import get_settings
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Close codes from RFC 6455.
+MESSAGE_TOO_BIG = 1009
+TRY_AGAIN_LATER = 1013
+
+# How long a closing connection may spend flushing messages still queued.
+CLOSE_FLUSH_SECONDS = 1.0
+
+WEBSOCKET_FLOW_EVENTS = metrics.counter(
+    "websocket_flow_events_total",
+    "WebSocket flow control events: rejected, paused, dropped, too_large.",
+    ["event"]
+)
+
+
+class ConnectionLimiter:
+    """Caps concurrent WebSocket connections in this worker process."""
+
+    def __init__(self, max_connections: int):
+        self.max_connections = max_connections
+        self.active = 0
+        self.rejected = 0
+
+    def try_acquire(self) -> bool:
+        if self.active >= self.max_connections:
+            self.rejected += 1
+            return False
+        self.active += 1
+        return True
+
+    def release(self) -> None:
+        self.active -= 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "active": self.active,
+            "max_connections": self.max_connections,
+            "rejected": self.rejected,
+        }
+
+
+@lru_cache()
+def get_connection_limiter() -> ConnectionLimiter:
+    return ConnectionLimiter(get_settings().websocket_max_connections)
+
+
+class WebSocketChannel:
+    """Flow-controlled view of one accepted WebSocket connection.
+
+    Outbound messages are queued and written by a single writer task. Once
+    ``high_watermark`` bytes are waiting, senders block until the writer has
+    drained the queue to ``low_watermark``, and droppable messages (partial
+    results that the next one supersedes) are discarded instead of queued,
+    so a slow client cannot make the server buffer without bound.
+
+    Inbound frames are read ahead by a reader task into a queue with the same
+    watermarks. When it fills, the client is sent
+    ``{"type": "flow", "action": "pause"}`` and the reader stops reading until
+    the handler has caught up, after which ``"resume"`` is sent. A frame over
+    ``max_frame_bytes``, or more than ``max_utterance_bytes`` of audio between
+    ``end_utterance()`` calls, gets an error message and closes the
+    connection with 1009; the handler sees it as ``WebSocketDisconnect``.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        high_watermark: int,
+        low_watermark: int,
+        max_frame_bytes: int,
+        max_utterance_bytes: int,
+        limiter: Optional[ConnectionLimiter] = None
+    ):
+        self.websocket = websocket
+        self.high_watermark = high_watermark
+        self.low_watermark = low_watermark
+        self.max_frame_bytes = max_frame_bytes
+        self.max_utterance_bytes = max_utterance_bytes
+        self._limiter = limiter
+        self._outbound: Deque[Tuple[str, Any, int]] = deque()
+        self._outbound_bytes = 0
+        self._outbound_ready = asyncio.Event()
+        self._outbound_drained = asyncio.Event()
+        self._inbound: "asyncio.Queue[MutableMapping[str, Any]]" = asyncio.Queue()
+        self._inbound_bytes = 0
+        self._inbound_drained = asyncio.Event()
+        self._utterance_bytes = 0
+        self._close_code: Optional[int] = None
+        self._closing = False
+        self._disconnected = False
+        self.paused = False
+        self.dropped = 0
+        self._reader: Optional[asyncio.Task] = None
+        self._writer: Optional[asyncio.Task] = None
+
+    @classmethod
+    async def accept(cls, websocket: WebSocket) -> Optional["WebSocketChannel"]:
+        """Accept the connection, or reject it with 1013 if this worker is full."""
+        settings = get_settings()
+        limiter = get_connection_limiter()
+        await websocket.accept()
+        if not limiter.try_acquire():
+            WEBSOCKET_FLOW_EVENTS.inc(event="rejected")
+            logger.warning(
+                "Rejecting WebSocket connection: %d connections open", limiter.active
+            )
+            await websocket.send_json({"type": "error", "error": "Server busy, retry later"})
+            await websocket.close(code=TRY_AGAIN_LATER)
+            return None
+        channel = cls(
+            websocket,
+            high_watermark=settings.websocket_high_watermark_bytes,
+            low_watermark=settings.websocket_low_watermark_bytes,
+            max_frame_bytes=settings.websocket_max_frame_bytes,
+            max_utterance_bytes=settings.websocket_max_utterance_bytes,
+            limiter=limiter
+        )
+        channel.start()
+        return channel
+
+    def start(self) -> None:
+        self._reader = asyncio.create_task(self._read())
+        self._writer = asyncio.create_task(self._write())
+
+    # --- Outbound -----------------------------------------------------------
+
+    def _enqueue(self, kind: str, data: Any, size: int) -> None:
+        self._outbound.append((kind, data, size))
+        self._outbound_bytes += size
+        self._outbound_ready.set()
+
+    async def _send(self, kind: str, data: Any, size: int, droppable: bool) -> None:
+        if self._disconnected:
+            raise WebSocketDisconnect(self._close_code or 1006)
+        if self._outbound_bytes >= self.high_watermark:
+            if droppable:
+                self.dropped += 1
+                WEBSOCKET_FLOW_EVENTS.inc(event="dropped")
+                return
+            self._outbound_drained.clear()
+            await self._outbound_drained.wait()
+            if self._disconnected:
+                raise WebSocketDisconnect(self._close_code or 1006)
+        self._enqueue(kind, data, size)
+
+    async def send_json(self, data: Any, droppable: bool = False) -> None:
+        text = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+        await self._send("text", text, len(text), droppable)
+
+    async def send_bytes(self, data: bytes) -> None:
+        await self._send("bytes", data, len(data), False)
+
+    async def _write(self) -> None:
+        try:
+            while True:
+                if not self._outbound:
+                    if self._closing:
+                        return
+                    self._outbound_ready.clear()
+                    await self._outbound_ready.wait()
+                    continue
+                kind, data, size = self._outbound.popleft()
+                if kind == "text":
+                    await self.websocket.send_text(data)
+                else:
+                    await self.websocket.send_bytes(data)
+                self._outbound_bytes -= size
+                if self._outbound_bytes <= self.low_watermark:
+                    self._outbound_drained.set()
+        except (WebSocketDisconnect, RuntimeError, OSError):
+            # The client is gone; wake any sender still waiting for room.
+            self._disconnected = True
+            self._outbound_drained.set()
+
+    # --- Inbound ------------------------------------------------------------
+
+    async def _reject_frame(self, error: str) -> None:
+        WEBSOCKET_FLOW_EVENTS.inc(event="too_large")
+        self._close_code = MESSAGE_TOO_BIG
+        await self.send_json({"type": "error", "error": error})
+        await self._inbound.put({"type": "websocket.disconnect", "code": MESSAGE_TOO_BIG})
+
+    async def _read(self) -> None:
+        while True:
+            message = await self.websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                self._disconnected = True
+                self._outbound_drained.set()
+                await self._inbound.put(message)
+                return
+            size = len(message.get("bytes") or message.get("text") or "")
+            if size > self.max_frame_bytes:
+                await self._reject_frame("Frame too large")
+                return
+            if message.get("bytes") is not None:
+                self._utterance_bytes += size
+                if self._utterance_bytes > self.max_utterance_bytes:
+                    await self._reject_frame("Utterance too long")
+                    return
+            self._inbound_bytes += size
+            await self._inbound.put(message)
+            if self._inbound_bytes >= self.high_watermark:
+                WEBSOCKET_FLOW_EVENTS.inc(event="paused")
+                self.paused = True
+                self._inbound_drained.clear()
+                await self.send_json({"type": "flow", "action": "pause"})
+                await self._inbound_drained.wait()
+                self.paused = False
+                await self.send_json({"type": "flow", "action": "resume"})
+
+    async def receive(self) -> MutableMapping[str, Any]:
+        message = await self._inbound.get()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000))
+        self._inbound_bytes -= len(message.get("bytes") or message.get("text") or "")
+        if self.paused and self._inbound_bytes <= self.low_watermark:
+            self._inbound_drained.set()
+        return message
+
+    async def receive_bytes(self) -> bytes:
+        data: bytes = (await self.receive())["bytes"]
+        return data
+
+    async def receive_json(self) -> Any:
+        message = await self.receive()
+        if message.get("text") is not None:
+            return json.loads(message["text"])
+        return json.loads(message["bytes"].decode("utf-8"))
+
+    def end_utterance(self) -> None:
+        """Start counting ``max_utterance_bytes`` afresh, e.g. after a final result."""
+        self._utterance_bytes = 0
+
+    # --- Lifetime -----------------------------------------------------------
+
+    async def close(self, code: Optional[int] = None) -> None:
+        """Stop reading, flush what is queued and release the connection slot.
+
+        The socket itself is only closed when ``code`` is given or a limit
+        was exceeded; otherwise the client has already gone.
+        """
+        if self._closing:
+            return
+        self._closing = True
+        if self._reader is not None:
+            self._reader.cancel()
+        if self._writer is not None:
+            self._outbound_ready.set()
+            try:
+                await asyncio.wait_for(self._writer, CLOSE_FLUSH_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+        if self._limiter is not None:
+            self._limiter.release()
+        code = code or self._close_code
+        if code is not None and not self._disconnected:
+            try:
+                await self.websocket.close(code=code)
+            except RuntimeError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "outbound_bytes": self._outbound_bytes,
+            "inbound_bytes": self._inbound_bytes,
+            "paused": self.paused,
+            "dropped": self.dropped,
+        }
@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import time
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence
+
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+Probe = Callable[[], Awaitable[None]]
+
+
+class HealthMonitor:
+    """Cached readiness of this worker and of the upstreams it depends on.
+
+    Probes are coroutines that raise if their upstream is unusable. A
+    background task runs them all every ``interval`` seconds and keeps the
+    results, so ``/readyz`` answers from memory however often it is polled;
+    probes should use free endpoints, never paid synthesis or completions.
+
+    The worker is ready once the optional warm-up has finished and every
+    probe named in ``required`` last succeeded. With ``interval`` 0 no probes
+    run and only warm-up counts.
+    """
+
+    def __init__(self, interval: float, timeout: float, required: Sequence[str]):
+        self.interval = interval
+        self.timeout = timeout
+        self.required = tuple(required)
+        self.started_at = time.monotonic()
+        self._probes: Dict[str, Probe] = {}
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._warm_up: Optional[asyncio.Task] = None
+
+    def register(self, name: str, probe: Probe) -> None:
+        self._probes[name] = probe
+
+    async def _run_probe(self, name: str, probe: Probe) -> None:
+        started = time.perf_counter()
+        error = None
+        try:
+            await asyncio.wait_for(probe(), self.timeout)
+        except asyncio.TimeoutError:
+            error = f"timed out after {self.timeout:g}s"
+        except Exception as e:  # pylint: disable=broad-except
+            error = str(e) or type(e).__name__
+        if error is not None and self._results.get(name, {}).get("ok", True):
+            logger.warning("Health probe for %s failed: %s", name, error)
+        self._results[name] = {
+            "ok": error is None,
+            "error": error,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+            "checked_at": time.time(),
+        }
+
+    async def refresh(self) -> None:
+        """Run every probe now and replace the cached results."""
+        await asyncio.gather(*(
+            self._run_probe(name, probe) for name, probe in self._probes.items()
+        ))
+
+    async def _refresh_periodically(self) -> None:
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._refresh_periodically())
+
+    async def stop(self) -> None:
+        for task in (self._task, self._warm_up):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = None
+
+    def warm_up(self, warm_up: Awaitable[None]) -> None:
+        """Run ``warm_up`` in the background; the worker is not ready until it ends.
+
+        A failed warm-up is logged and does not keep the worker unready, since
+        everything it prepares is also built on first use.
+        """
+        async def run() -> None:
+            started = time.perf_counter()
+            try:
+                await warm_up
+            except Exception as e:  # pylint: disable=broad-except
+                logger.error("Warm-up failed: %s", str(e))
+                return
+            logger.info("Warm-up finished in %.2f s", time.perf_counter() - started)
+
+        self._warm_up = asyncio.create_task(run())
+
+    @property
+    def warm_up_state(self) -> str:
+        if self._warm_up is None:
+            return "skipped"
+        return "done" if self._warm_up.done() else "running"
+
+    def results(self) -> Dict[str, Dict[str, Any]]:
+        return dict(self._results)
+
+    def readiness(self) -> Dict[str, Any]:
+        upstreams = {
+            name: self._results.get(name, {"ok": False, "error": "not probed yet"})
+            for name in self._probes
+        }
+        required = [name for name in self.required if name in upstreams]
+        if self.interval <= 0:
+            required = []
+        ready = self.warm_up_state != "running" and all(upstreams[name]["ok"] for name in required)
+        return {
+            "ready": ready,
+            "warm_up": self.warm_up_state,
+            "required": required,
+            "upstreams": upstreams,
+        }
+
+    def liveness(self) -> Dict[str, Any]:
+        return {"status": "ok", "uptime_seconds": round(time.monotonic() - self.started_at, 1)}
+
+
+@lru_cache()
+def get_health_monitor() -> HealthMonitor:
+    settings = get_settings()
+    return HealthMonitor(
+        interval=settings.health_probe_interval,
+        timeout=settings.health_probe_timeout,
+        required=[
+            name.strip() for name in settings.health_required_upstreams.split(",") if name.strip()
+        ]
+    )
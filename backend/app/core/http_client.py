@@ -0,0 +1,199 @@
+import logging
+from typing import Any, Dict, Optional
+
+import aiohttp
+import httpx
+import openai
+
+from .config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+# Regional token endpoint of the Speech resource named by azure_speech_region
+AZURE_TOKEN_URL = "https://{region}.api.cognitive.microsoft.com/sts/v1.0/issueToken"
+
+
+class UpstreamClients:
+    """Application-scoped connection pools for the HTTP upstreams.
+
+    One ``aiohttp.ClientSession`` is shared by every Zonos request and one
+    ``openai.AsyncOpenAI`` client by every OpenAI request, so keep-alive
+    connections are reused instead of paying a TCP/TLS handshake per call.
+    The pools are opened by ``startup()`` and closed by ``shutdown()``; if a
+    client is requested before startup it is created on first use.
+    """
+
+    def __init__(self) -> None:
+        self._settings: Optional[Settings] = None
+        self._zonos_session: Optional[aiohttp.ClientSession] = None
+        self._openai_client: Optional[openai.AsyncOpenAI] = None
+        # Only the Azure readiness probe uses this; speech goes through the SDK.
+        self._azure_probe_session: Optional[aiohttp.ClientSession] = None
+        self._zonos_stats = {
+            "requests": 0, "in_flight": 0, "connections_created": 0, "connections_reused": 0
+        }
+        self._openai_stats = {"requests": 0}
+
+    async def startup(self, settings: Optional[Settings] = None) -> None:
+        self._settings = settings or get_settings()
+        self._create_zonos_session()
+        self._create_openai_client()
+        logger.info("Upstream connection pools initialized")
+
+    async def shutdown(self) -> None:
+        if self._zonos_session is not None:
+            await self._zonos_session.close()
+            self._zonos_session = None
+        if self._openai_client is not None:
+            await self._openai_client.close()
+            self._openai_client = None
+        if self._azure_probe_session is not None:
+            await self._azure_probe_session.close()
+            self._azure_probe_session = None
+        logger.info("Upstream connection pools closed")
+
+    @property
+    def settings(self) -> Settings:
+        if self._settings is None:
+            self._settings = get_settings()
+        return self._settings
+
+    @property
+    def zonos_session(self) -> aiohttp.ClientSession:
+        if self._zonos_session is None or self._zonos_session.closed:
+            self._create_zonos_session()
+        assert self._zonos_session is not None
+        return self._zonos_session
+
+    @property
+    def openai_client(self) -> openai.AsyncOpenAI:
+        if self._openai_client is None:
+            self._create_openai_client()
+        assert self._openai_client is not None
+        return self._openai_client
+
+    def _create_zonos_session(self) -> None:
+        settings = self.settings
+        connector = aiohttp.TCPConnector(
+            limit=settings.http_pool_limit,
+            limit_per_host=settings.http_pool_limit_per_host,
+            keepalive_timeout=settings.http_keepalive_timeout,
+        )
+        timeout = aiohttp.ClientTimeout(
+            total=settings.http_read_timeout,
+            connect=settings.http_connect_timeout,
+        )
+        self._zonos_session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=timeout,
+            trace_configs=[self._zonos_trace_config()],
+        )
+
+    def _create_openai_client(self) -> None:
+        settings = self.settings
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.http_pool_limit_per_host,
+                max_keepalive_connections=settings.http_pool_limit_per_host,
+                keepalive_expiry=settings.http_keepalive_timeout,
+            ),
+            timeout=httpx.Timeout(
+                settings.http_read_timeout, connect=settings.http_connect_timeout
+            ),
+            event_hooks={"request": [self._on_openai_request]},
+        )
+        # Retries are handled by app.core.resilience, not by the SDK. SDK
+        # releases that bundle their own httpx fork annotate http_client with
+        # it, but accept any httpx-compatible client.
+        self._openai_client = openai.AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            base_url=settings.openai_base_url,
+            http_client=http_client,  # type: ignore[arg-type,unused-ignore]
+            max_retries=0
+        )
+
+    # Readiness probes. Each goes through the same pool as real requests, so the
+    # first one also opens the connections that requests will reuse.
+
+    async def probe_openai(self) -> None:
+        """List models, which needs a valid key but costs nothing."""
+        await self.openai_client.models.list()
+
+    async def probe_zonos(self) -> None:
+        """Check the Zonos API answers; any response below 500 counts."""
+        async with self.zonos_session.get(
+            self.settings.zonos_base_url,
+            headers={"Authorization": f"Bearer {self.settings.zonos_api_key}"}
+        ) as response:
+            if response.status >= 500:
+                raise ValueError(f"Zonos returned {response.status}")
+
+    async def probe_azure(self) -> None:
+        """Issue a Speech access token, which checks the key without synthesizing.
+
+        The Speech SDK keeps its own connections, so the probe has a small
+        session of its own rather than skewing the Zonos pool and its stats.
+        """
+        url = AZURE_TOKEN_URL.format(region=self.settings.azure_speech_region)
+        if self._azure_probe_session is None or self._azure_probe_session.closed:
+            self._azure_probe_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=1, keepalive_timeout=self.settings.http_keepalive_timeout
+                ),
+                timeout=aiohttp.ClientTimeout(
+                    total=self.settings.http_read_timeout,
+                    connect=self.settings.http_connect_timeout,
+                ),
+            )
+        async with self._azure_probe_session.post(
+            url, headers={"Ocp-Apim-Subscription-Key": self.settings.azure_speech_key}
+        ) as response:
+            if response.status != 200:
+                raise ValueError(f"Azure token endpoint returned {response.status}")
+
+    async def _on_openai_request(self, request: httpx.Request) -> None:
+        self._openai_stats["requests"] += 1
+
+    def _zonos_trace_config(self) -> aiohttp.TraceConfig:
+        stats = self._zonos_stats
+
+        async def on_request_start(*_: Any) -> None:
+            stats["requests"] += 1
+            stats["in_flight"] += 1
+
+        async def on_request_finished(*_: Any) -> None:
+            stats["in_flight"] -= 1
+
+        async def on_connection_create_end(*_: Any) -> None:
+            stats["connections_created"] += 1
+
+        async def on_connection_reuseconn(*_: Any) -> None:
+            stats["connections_reused"] += 1
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_end.append(on_request_finished)
+        trace_config.on_request_exception.append(on_request_finished)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace_config
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return basic pool statistics for each upstream."""
+        settings = self.settings
+        return {
+            "zonos": {
+                "open": self._zonos_session is not None and not self._zonos_session.closed,
+                "limit": settings.http_pool_limit,
+                "limit_per_host": settings.http_pool_limit_per_host,
+                **self._zonos_stats,
+            },
+            "openai": {
+                "open": self._openai_client is not None,
+                "limit": settings.http_pool_limit_per_host,
+                **self._openai_stats,
+            },
+        }
+
+
+upstream_clients = UpstreamClients()
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from functools import lru_cache
+from typing import Any, Deque, Dict, List, Optional
+
+from .config import get_settings
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG_SECONDS = metrics.histogram(
+    "event_loop_lag_seconds", "How late the watchdog's timer fired on the event loop.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+LOOP_BLOCKED_TOTAL = metrics.counter(
+    "event_loop_blocked_total", "Times the event loop was held longer than the threshold."
+)
+
+
+class LoopWatchdog:
+    """Measures event-loop lag and captures the stack of whatever blocks the loop.
+
+    A task on the loop ticks every ``interval`` seconds and records how late
+    each tick fires. A daemon thread checks the ticks; if none has arrived
+    ``threshold`` seconds after it was due, the loop thread's current stack
+    is captured, since that is the code holding the loop, and logged once the
+    loop recovers with the total blocked time. Cost is one timer and one
+    thread wake-up per ``interval``, so a coarse interval is cheap enough to
+    leave on; blocks shorter than the interval can still be missed.
+    """
+
+    def __init__(self, interval: float, threshold: float, max_incidents: int):
+        self.interval = interval
+        self.threshold = threshold
+        self._incidents: Deque[Dict[str, Any]] = deque(maxlen=max_incidents)
+        self._pending: Optional[Dict[str, Any]] = None
+        self._last_tick = 0.0
+        self._max_lag = 0.0
+        self._ticks = 0
+        self._loop_thread_id = 0
+        self._task: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._tick())
+        self._thread = threading.Thread(
+            target=self._monitor, name="loop-watchdog", daemon=True
+        )
+        self._thread.start()
+        logger.info(
+            "Event loop watchdog started (interval %.3fs, threshold %.3fs)",
+            self.interval, self.threshold
+        )
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval * 2)
+            self._thread = None
+
+    async def _tick(self) -> None:
+        while True:
+            scheduled = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - scheduled)
+            with self._lock:
+                self._last_tick = now
+                incident, self._pending = self._pending, None
+            self._ticks += 1
+            self._max_lag = max(self._max_lag, lag)
+            LOOP_LAG_SECONDS.observe(lag)
+            if incident is not None:
+                incident["blocked_ms"] = round(lag * 1000, 1)
+                self._incidents.append(incident)
+                logger.warning(
+                    "Event loop blocked for %.0f ms; stack at detection:\n%s",
+                    lag * 1000, "".join(incident["stack"])
+                )
+
+    def _monitor(self) -> None:
+        while not self._stop.wait(self.interval / 2):
+            with self._lock:
+                # One incident per block: the next tick closes it.
+                if self._pending is not None:
+                    continue
+                if time.monotonic() - self._last_tick - self.interval < self.threshold:
+                    continue
+                frame = sys._current_frames().get(self._loop_thread_id)  # pylint: disable=W0212
+                if frame is None:
+                    continue
+                self._pending = {
+                    "detected_at": time.time(),
+                    "stack": traceback.format_stack(frame),
+                }
+            LOOP_BLOCKED_TOTAL.inc()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": True,
+            "interval": self.interval,
+            "threshold": self.threshold,
+            "ticks": self._ticks,
+            "max_lag_ms": round(self._max_lag * 1000, 1),
+            "blocked": LOOP_BLOCKED_TOTAL.value(),
+        }
+
+    def incidents(self) -> List[Dict[str, Any]]:
+        return list(self._incidents)
+
+
+@lru_cache()
+def get_loop_watchdog() -> Optional[LoopWatchdog]:
+    settings = get_settings()
+    if not settings.loop_watchdog_enabled:
+        return None
+    return LoopWatchdog(
+        interval=settings.loop_watchdog_interval,
+        threshold=settings.loop_watchdog_threshold,
+        max_incidents=settings.loop_watchdog_max_incidents
+    )
@@ -0,0 +1,316 @@
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Type, TypeVar
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BYTE_BUCKETS = (1024, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+LabelValues = Tuple[str, ...]
+# (metric name, label names, label values, value) for gauges read at scrape time.
+Sample = Tuple[str, Sequence[str], Sequence[str], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+M = TypeVar("M", bound=_Metric)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        return super().render() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in self._values.items()
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: Any) -> None:
+        self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram, as in the Prometheus exposition format.
+
+    ``observe`` is a bisect and three list updates; buckets are only summed
+    into cumulative counts when rendering.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # Per label set: [per-bucket counts (last is +Inf), sum, count]
+        self._values: Dict[LabelValues, List[Any]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        series = self._values.get(key)
+        if series is None:
+            series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: Any) -> int:
+        series = self._values.get(self._key(labels))
+        return series[2] if series else 0
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for key, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                labels = _format_labels(self.labelnames, key, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Process-wide metrics, rendered in the Prometheus text format.
+
+    Instruments are created once (asking for an existing name returns it)
+    and updated in place. Components that already keep their own ``stats()``
+    are exported through collectors, which are only called on scrape.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], List[Sample]]] = []
+
+    def _get_or_create(self, cls: Type[M], name: str, *args: Any, **kwargs: Any) -> M:
+        if name not in self._metrics:
+            self._metrics[name] = cls(name, *args, **kwargs)
+        metric = self._metrics[name]
+        if not isinstance(metric, cls):
+            raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets)
+
+    def add_collector(self, collector: Callable[[], List[Sample]]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        documented = set()
+        for collector in self._collectors:
+            for name, labelnames, labelvalues, value in collector():
+                if name not in documented:
+                    documented.add(name)
+                    lines.append(f"# TYPE {name} gauge")
+                labels = _format_labels(labelnames, [str(v) for v in labelvalues])
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = metrics.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.",
+    ["method", "route", "status"]
+)
+HTTP_FIRST_BYTE_SECONDS = metrics.histogram(
+    "http_response_first_byte_seconds", "Time until the first response body byte.",
+    ["method", "route"]
+)
+HTTP_IN_FLIGHT = metrics.gauge("http_requests_in_flight", "HTTP requests being served.")
+WEBSOCKET_CONNECTIONS = metrics.gauge(
+    "websocket_connections", "Open WebSocket connections.", ["route"]
+)
+WEBSOCKET_CONNECTIONS_TOTAL = metrics.counter(
+    "websocket_connections_total", "Accepted WebSocket connections.", ["route"]
+)
+WEBSOCKET_BYTES = metrics.counter(
+    "websocket_bytes_total", "WebSocket payload bytes.", ["route", "direction"]
+)
+WEBSOCKET_CONNECTION_BYTES = metrics.histogram(
+    "websocket_connection_bytes", "Payload bytes per WebSocket connection.",
+    ["route", "direction"], BYTE_BUCKETS
+)
+STREAM_FIRST_CHUNK_SECONDS = metrics.histogram(
+    "stream_first_chunk_seconds",
+    "Time from request to the first streamed token or audio chunk.",
+    ["stream"]
+)
+
+
+def _route_path(scope: Dict[str, Any]) -> str:
+    # Label by route template, not raw path, to keep cardinality bounded.
+    template: Optional[str] = getattr(scope.get("route"), "path", None)
+    if template is None:
+        return "unmatched"
+    # Routes of an included router may report their path without the
+    # router's prefix; take the prefix from the leading request segments.
+    path: str = scope["path"]
+    prefix_segments = path.count("/") - template.count("/")
+    if prefix_segments > 0:
+        return "/".join(path.split("/")[:prefix_segments + 1]) + template
+    return template
+
+
+def _payload_size(message: Dict[str, Any]) -> int:
+    if message.get("bytes") is not None:
+        return len(message["bytes"])
+    if message.get("text") is not None:
+        return len(message["text"].encode("utf-8"))
+    return 0
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording HTTP latency and WebSocket traffic.
+
+    Written as plain ASGI rather than ``BaseHTTPMiddleware`` so streamed
+    responses pass through untouched and the per-request cost stays at a few
+    dictionary updates.
+    """
+
+    def __init__(self, app: Callable[..., Any]):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] == "http":
+            await self._http(scope, receive, send)
+        elif scope["type"] == "websocket":
+            await self._websocket(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
+
+    async def _http(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        started = time.perf_counter()
+        status = 500
+        first_byte: Optional[float] = None
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            nonlocal status, first_byte
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif first_byte is None and message.get("body"):
+                first_byte = time.perf_counter()
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            method, route = scope["method"], _route_path(scope)
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started, method=method, route=route, status=status
+            )
+            if first_byte is not None:
+                HTTP_FIRST_BYTE_SECONDS.observe(first_byte - started, method=method, route=route)
+
+    async def _websocket(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        totals = {"in": 0, "out": 0}
+        route: Optional[str] = None
+
+        def count(direction: str, message: Dict[str, Any]) -> None:
+            size = _payload_size(message)
+            totals[direction] += size
+            WEBSOCKET_BYTES.inc(size, route=route, direction=direction)
+
+        async def receive_wrapper() -> Dict[str, Any]:
+            message: Dict[str, Any] = await receive()
+            if route is not None and message["type"] == "websocket.receive":
+                count("in", message)
+            return message
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            nonlocal route
+            if message["type"] == "websocket.accept":
+                route = _route_path(scope)
+                WEBSOCKET_CONNECTIONS.inc(route=route)
+                WEBSOCKET_CONNECTIONS_TOTAL.inc(route=route)
+            elif route is not None and message["type"] == "websocket.send":
+                count("out", message)
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            if route is not None:
+                WEBSOCKET_CONNECTIONS.dec(route=route)
+                for direction, size in totals.items():
+                    WEBSOCKET_CONNECTION_BYTES.observe(size, route=route, direction=direction)
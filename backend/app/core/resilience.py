@@ -0,0 +1,343 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Set, TypeVar, cast
+
+import aiohttp
+import httpx
+import openai
+
+from .config import get_settings
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+UPSTREAM_SECONDS = metrics.histogram(
+    "upstream_request_duration_seconds",
+    "Upstream call latency including retries and hedges.", ["upstream", "outcome"]
+)
+UPSTREAM_IN_FLIGHT = metrics.gauge(
+    "upstream_requests_in_flight", "Upstream calls in progress.", ["upstream"]
+)
+
+
+class UpstreamError(ValueError):
+    """An upstream answered with an error status."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class UpstreamUnavailableError(ValueError):
+    """The upstream's circuit is open, so the call was not attempted."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} is unavailable, retry after {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class UpstreamTimeoutError(ValueError):
+    """The call did not finish within the upstream's deadline."""
+
+
+# Network failures and timeouts, as raised by the clients each upstream uses.
+TRANSIENT_ERRORS = (
+    ConnectionError,
+    TimeoutError,
+    aiohttp.ClientConnectionError,
+    httpx.TransportError,
+    openai.APIConnectionError,
+    UpstreamTimeoutError,
+    UpstreamUnavailableError,
+)
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether a failed call may succeed if repeated.
+
+    Errors carrying an HTTP status (``status`` as on ``UpstreamError`` and
+    aiohttp, ``status_code`` as on openai) are retried only for 429 and 5xx;
+    otherwise only network failures and timeouts are. Anything else, such
+    as a bug or a result the upstream refused, fails the same way again.
+    """
+    status = getattr(error, "status", None) or getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    return isinstance(error, TRANSIENT_ERRORS)
+
+
+class CircuitBreaker:
+    """Fail fast after ``failure_threshold`` consecutive failures.
+
+    While open, calls are rejected for ``reset_timeout`` seconds. After that
+    one trial call is let through (half-open); its success closes the
+    circuit and its failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            return "open"
+        return "half_open"
+
+    def retry_after(self) -> float:
+        if self._opened_at is None:
+            return 0.0
+        return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def abandon_trial(self) -> None:
+        """The trial call was cancelled before it had an outcome; let the next call try."""
+        self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._trial_in_flight or self._failures >= self.failure_threshold:
+            if self._opened_at is None or self._trial_in_flight:
+                logger.warning("Circuit opened after %d failures", self._failures)
+            self._opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+
+class LatencyWindow:
+    """Latencies of the most recent ``size`` successful calls."""
+
+    def __init__(self, size: int = 200):
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class ResilientUpstream:
+    """Deadline, retry, hedging and circuit-breaker policy for one upstream.
+
+    ``call`` runs an attempt factory under an overall ``deadline``. Retryable
+    failures (see ``is_retryable``) are repeated up to ``max_retries`` times
+    with full-jitter exponential backoff, as long as the deadline allows.
+    Once ``hedge_min_samples`` latencies are known, an attempt still running
+    past the ``hedge_percentile`` latency gets a second, hedged copy and the
+    first to succeed wins. Retryable failures feed the circuit breaker; while
+    it is open, calls fail immediately with ``UpstreamUnavailableError``.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        deadline: float,
+        max_retries: int,
+        backoff_base: float,
+        backoff_max: float,
+        hedge_percentile: float,
+        hedge_min_samples: int,
+        breaker: CircuitBreaker
+    ):
+        self.name = name
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.breaker = breaker
+        self.latencies = LatencyWindow()
+        self._stats = {
+            "calls": 0, "retries": 0, "hedges": 0, "hedge_wins": 0,
+            "timeouts": 0, "failures": 0, "rejected": 0
+        }
+
+    async def call(self, fn: Callable[[], Awaitable[T]], hedge: bool = True) -> T:
+        """Run ``fn`` under this upstream's policy.
+
+        Args:
+            fn: Starts one attempt; called again for every retry and hedge
+            hedge: Set to False for calls whose result must be released
+                explicitly, such as an open stream. Their latency measures
+                something else, e.g. the time to open the stream, so it is
+                kept out of the percentile that hedges are timed by
+
+        Raises:
+            UpstreamUnavailableError: If the circuit is open
+            UpstreamTimeoutError: If the deadline passes before a success
+        """
+        started = time.perf_counter()
+        outcome = "error"
+        UPSTREAM_IN_FLIGHT.inc(upstream=self.name)
+        try:
+            result = await self._call(fn, hedge)
+            outcome = "success"
+            return result
+        except UpstreamUnavailableError:
+            outcome = "rejected"
+            raise
+        except UpstreamTimeoutError:
+            outcome = "timeout"
+            raise
+        finally:
+            UPSTREAM_IN_FLIGHT.dec(upstream=self.name)
+            UPSTREAM_SECONDS.observe(
+                time.perf_counter() - started, upstream=self.name, outcome=outcome
+            )
+
+    async def _call(self, fn: Callable[[], Awaitable[T]], hedge: bool) -> T:
+        trial = self.breaker.state == "half_open"
+        if not self.breaker.allow():
+            self._stats["rejected"] += 1
+            raise UpstreamUnavailableError(self.name, self.breaker.retry_after())
+        self._stats["calls"] += 1
+        try:
+            return await self._call_with_retries(fn, hedge)
+        except asyncio.CancelledError:
+            # A cancelled call (client gone, barge-in, lost hedge) says nothing
+            # about the upstream, but must not keep the half-open trial taken.
+            if trial:
+                self.breaker.abandon_trial()
+            raise
+
+    async def _call_with_retries(self, fn: Callable[[], Awaitable[T]], hedge: bool) -> T:
+        expires_at = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            remaining = expires_at - time.monotonic()
+            try:
+                result = await asyncio.wait_for(self._attempt(fn, hedge), remaining)
+            except asyncio.TimeoutError as e:
+                self._stats["timeouts"] += 1
+                self._record_failure()
+                raise UpstreamTimeoutError(
+                    f"{self.name} did not respond within {self.deadline:.1f}s"
+                ) from e
+            except Exception as e:  # pylint: disable=broad-except
+                if not is_retryable(e):
+                    # The request itself was rejected; the upstream is healthy.
+                    self.breaker.record_success()
+                    raise
+                self._record_failure()
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                if attempt >= self.max_retries or delay >= expires_at - time.monotonic():
+                    raise
+                if not self.breaker.allow():
+                    raise UpstreamUnavailableError(self.name, self.breaker.retry_after()) from e
+                attempt += 1
+                self._stats["retries"] += 1
+                logger.warning(
+                    "%s call failed (%s), retry %d in %.2fs", self.name, str(e), attempt, delay
+                )
+                await asyncio.sleep(delay)
+                continue
+            self.breaker.record_success()
+            return result
+
+    def _record_failure(self) -> None:
+        self._stats["failures"] += 1
+        self.breaker.record_failure()
+
+    def _hedge_delay(self) -> Optional[float]:
+        if self.hedge_percentile <= 0 or len(self.latencies) < self.hedge_min_samples:
+            return None
+        return self.latencies.percentile(self.hedge_percentile)
+
+    async def _timed(self, fn: Callable[[], Awaitable[T]]) -> T:
+        started = time.monotonic()
+        result = await fn()
+        self.latencies.add(time.monotonic() - started)
+        return result
+
+    async def _attempt(self, fn: Callable[[], Awaitable[T]], hedge: bool) -> T:
+        hedge_delay = self._hedge_delay() if hedge else None
+        primary = asyncio.ensure_future(self._timed(fn) if hedge else fn())
+        tasks: Set["asyncio.Future[Any]"] = {primary}
+        try:
+            if hedge_delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+                if not done:
+                    self._stats["hedges"] += 1
+                    tasks.add(asyncio.ensure_future(self._timed(fn)))
+            error: Optional[BaseException] = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self._stats["hedge_wins"] += 1
+                        return cast(T, task.result())
+                    error = task.exception()
+            assert error is not None
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "state": self.breaker.state,
+            "p50_seconds": self.latencies.percentile(0.5),
+            "hedge_after_seconds": self._hedge_delay(),
+        }
+
+
+_upstreams: Dict[str, ResilientUpstream] = {}
+
+
+def get_upstream(name: str) -> ResilientUpstream:
+    """Return the process-wide policy for an upstream, e.g. ``"zonos"``.
+
+    The deadline is read from the ``<name>_deadline`` setting; the other
+    parameters are shared by every upstream.
+    """
+    if name not in _upstreams:
+        settings = get_settings()
+        _upstreams[name] = ResilientUpstream(
+            name,
+            deadline=getattr(settings, f"{name}_deadline"),
+            max_retries=settings.upstream_max_retries,
+            backoff_base=settings.upstream_retry_backoff,
+            backoff_max=settings.upstream_retry_backoff_max,
+            hedge_percentile=settings.upstream_hedge_percentile,
+            hedge_min_samples=settings.upstream_hedge_min_samples,
+            breaker=CircuitBreaker(
+                settings.circuit_failure_threshold, settings.circuit_reset_seconds
+            )
+        )
+    return _upstreams[name]
+
+
+def resilience_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: upstream.stats() for name, upstream in _upstreams.items()}
@@ -0,0 +1,39 @@
+import re
+from typing import List, Optional
+
+# Japanese terminators end a sentence immediately. ASCII ones only count once
+# whitespace follows, so "3.14" or "e.g." inside a streamed token is not cut.
+_SENTENCE_END = re.compile(r"[。！？]+[」』）]*|[.!?]+[\"')\]]*(?=\s)")
+
+
+class SentenceBuffer:
+    """Accumulate streamed text and release it one complete sentence at a time."""
+
+    def __init__(self) -> None:
+        self._buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        """Append text and return any sentences it completed."""
+        self._buffer += text
+        sentences = []
+        while match := _SENTENCE_END.search(self._buffer):
+            sentence = self._buffer[:match.end()].strip()
+            self._buffer = self._buffer[match.end():]
+            if sentence:
+                sentences.append(sentence)
+        return sentences
+
+    def flush(self) -> Optional[str]:
+        """Return whatever is left as a final sentence, if anything."""
+        remainder = self._buffer.strip()
+        self._buffer = ""
+        return remainder or None
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text at Japanese (。！？) and English (.!?) sentence boundaries."""
+    buffer = SentenceBuffer()
+    sentences = buffer.feed(text + " ")
+    if remainder := buffer.flush():
+        sentences.append(remainder)
+    return sentences
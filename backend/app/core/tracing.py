@@ -0,0 +1,276 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Deque, Dict, Iterator, List, Optional, Protocol
+
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class _Trace:
+    """Spans recorded so far for one trace, exported together when the root ends."""
+
+    def __init__(self, trace_id: str, sampled: bool, max_spans: int):
+        self.trace_id = trace_id
+        self.sampled = sampled
+        self.max_spans = max_spans
+        self.started_at = time.time()
+        self.spans: List["Span"] = []
+        self.dropped = 0
+
+    def add(self, span: "Span") -> None:
+        if len(self.spans) < self.max_spans:
+            self.spans.append(span)
+        else:
+            self.dropped += 1
+
+
+class Span:
+    """One timed stage of a trace. Times are ``time.monotonic()`` seconds."""
+
+    def __init__(
+        self,
+        trace: _Trace,
+        name: str,
+        parent: Optional["Span"],
+        start: float,
+        attributes: Dict[str, Any]
+    ):
+        self.trace = trace
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.start = start
+        self.end: Optional[float] = None
+        self.status = "ok"
+        self.attributes = attributes
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.monotonic()) - self.start
+
+    def to_dict(self, trace_start: float) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ms": round((self.start - trace_start) * 1000, 3),
+            "duration_ms": round(self.duration * 1000, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan(Span):
+    """Stands in for a span when nothing is recorded; attribute writes are dropped."""
+
+    def __init__(self) -> None:  # pylint: disable=super-init-not-called
+        pass
+
+    @property
+    def attributes(self) -> Dict[str, Any]:
+        return {}
+
+    @attributes.setter
+    def attributes(self, value: Dict[str, Any]) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class SpanExporter(Protocol):
+    def export(self, trace: Dict[str, Any]) -> None:
+        ...
+
+
+class StdoutExporter:
+    """Write each finished trace to stdout as one JSON line."""
+
+    def export(self, trace: Dict[str, Any]) -> None:
+        sys.stdout.write(json.dumps(trace, ensure_ascii=False, default=str) + "\n")
+        sys.stdout.flush()
+
+
+class CollectorExporter:
+    """Keep the most recent traces in memory, standing in for a trace collector.
+
+    Traces are served by ``GET /debug/traces``.
+    """
+
+    def __init__(self, max_traces: int):
+        self._traces: Deque[Dict[str, Any]] = deque(maxlen=max_traces)
+
+    def export(self, trace: Dict[str, Any]) -> None:
+        self._traces.append(trace)
+
+    def traces(self, min_duration_ms: float = 0.0) -> List[Dict[str, Any]]:
+        return [trace for trace in self._traces if trace["duration_ms"] >= min_duration_ms]
+
+
+def _mark_failed(span: Span, error: BaseException) -> None:
+    if isinstance(error, (asyncio.CancelledError, GeneratorExit)):
+        span.status = "cancelled"
+    else:
+        span.status = "error"
+        span.attributes["error"] = str(error)
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """In-process tracer for breaking a request or voice turn into stages.
+
+    ``trace()`` opens a root span and ``span()`` a child of whatever span is
+    current in the task's context, so spans opened by services nest under the
+    route's trace, including inside tasks it creates. Whether a trace is kept
+    is decided twice: up front with probability ``sample_rate``, and again
+    when it ends, keeping any trace slower than ``slow_threshold`` seconds
+    (0 disables this). Traces that can be kept by neither are not recorded.
+    """
+
+    def __init__(
+        self,
+        exporter: Optional[SpanExporter],
+        sample_rate: float,
+        slow_threshold: float,
+        max_spans: int = 256
+    ):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.max_spans = max_spans
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None and (self.sample_rate > 0 or self.slow_threshold > 0)
+
+    @contextmanager
+    def trace(
+        self, name: str, start_time: Optional[float] = None, **attributes: Any
+    ) -> Iterator[Span]:
+        """Start a trace, or a child span if one is already in progress.
+
+        Args:
+            name: Name of the root span, e.g. ``"converse.turn"``
+            start_time: ``time.monotonic()`` at which the traced work began,
+                if earlier than now
+            **attributes: Correlation ids such as ``client_id`` and ``user_id``
+        """
+        if _current_span.get() is not None:
+            with self.span(name, start_time, **attributes) as span:
+                yield span
+            return
+        if not self.enabled:
+            yield _NOOP_SPAN
+            return
+        sampled = random.random() < self.sample_rate
+        if not sampled and self.slow_threshold <= 0:
+            yield _NOOP_SPAN
+            return
+        trace = _Trace(os.urandom(16).hex(), sampled, self.max_spans)
+        root = None
+        try:
+            with self._open(trace, name, None, start_time, attributes) as root:
+                yield root
+        finally:
+            # Failed and cancelled traces are exported too.
+            if root is not None and (trace.sampled or root.duration >= self.slow_threshold):
+                self._export(trace, root)
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        start_time: Optional[float] = None,
+        activate: bool = True,
+        **attributes: Any
+    ) -> Iterator[Span]:
+        """Time a stage under the current span; a no-op outside a recorded trace.
+
+        Async generators should pass ``activate=False``: the span is then not
+        made current, since the generator's frames run in its consumer's context.
+        """
+        parent = _current_span.get()
+        if parent is None:
+            yield _NOOP_SPAN
+            return
+        with self._open(parent.trace, name, parent, start_time, attributes, activate) as span:
+            yield span
+
+    def record_span(self, name: str, start_time: float, end_time: float, **attributes: Any) -> None:
+        """Add an already finished stage, measured by the caller, under the current span."""
+        parent = _current_span.get()
+        if parent is None:
+            return
+        span = Span(parent.trace, name, parent, start_time, attributes)
+        span.end = end_time
+        parent.trace.add(span)
+
+    @contextmanager
+    def _open(
+        self,
+        trace: _Trace,
+        name: str,
+        parent: Optional[Span],
+        start_time: Optional[float],
+        attributes: Dict[str, Any],
+        activate: bool = True
+    ) -> Iterator[Span]:
+        span = Span(trace, name, parent, start_time or time.monotonic(), attributes)
+        trace.add(span)
+        token = _current_span.set(span) if activate else None
+        try:
+            yield span
+        except BaseException as e:
+            _mark_failed(span, e)
+            raise
+        finally:
+            span.end = time.monotonic()
+            if token is not None:
+                try:
+                    _current_span.reset(token)
+                except ValueError:
+                    # Closed from another context, e.g. a collected generator.
+                    pass
+
+    def _export(self, trace: _Trace, root: Span) -> None:
+        assert self.exporter is not None
+        try:
+            self.exporter.export({
+                "trace_id": trace.trace_id,
+                "name": root.name,
+                "started_at": trace.started_at,
+                "duration_ms": round(root.duration * 1000, 3),
+                "sampled": trace.sampled,
+                "dropped_spans": trace.dropped,
+                "attributes": root.attributes,
+                "spans": [span.to_dict(root.start) for span in trace.spans],
+            })
+        except Exception as e:  # pylint: disable=broad-except
+            logger.error("Error exporting trace %s: %s", trace.trace_id, str(e))
+
+
+@lru_cache()
+def get_tracer() -> Tracer:
+    settings = get_settings()
+    exporter: Optional[SpanExporter] = None
+    if settings.tracing_exporter == "stdout":
+        exporter = StdoutExporter()
+    elif settings.tracing_exporter == "collector":
+        exporter = CollectorExporter(settings.tracing_collector_max_traces)
+    return Tracer(
+        exporter,
+        sample_rate=settings.tracing_sample_rate,
+        slow_threshold=settings.tracing_slow_threshold_seconds
+    )
@@ -0,0 +1,160 @@
+from collections import deque
+from typing import Deque, List, NamedTuple, Optional
+
+import numpy as np
+
+from .audio_session import AudioFormat
+from .config import get_settings
+from .metrics import metrics
+
+# Frames the detector classifies, independent of how the client chunks audio.
+FRAME_MS = 20
+# Recent frame energies the noise floor is estimated from (3 s).
+NOISE_WINDOW_FRAMES = 150
+NOISE_PERCENTILE = 10
+
+VAD_BYTES = metrics.counter(
+    "vad_audio_bytes_total", "Received audio bytes by VAD decision.", ["decision"]
+)
+VAD_UTTERANCES = metrics.counter(
+    "vad_utterances_total", "Utterances whose end was detected locally."
+)
+
+
+def _mulaw_table() -> np.ndarray:
+    """G.711 μ-law byte to 16-bit linear sample."""
+    encoded = ~np.arange(256, dtype=np.int32) & 0xFF
+    exponent = (encoded >> 4) & 0x07
+    magnitude = ((((encoded & 0x0F) << 3) + 0x84) << exponent) - 0x84
+    return np.where(encoded & 0x80, -magnitude, magnitude).astype(np.float32)
+
+
+_MULAW_TO_LINEAR = _mulaw_table()
+
+
+class VadResult(NamedTuple):
+    audio: bytes
+    speech_started: bool = False
+    speech_ended: bool = False
+
+
+class VoiceActivityDetector:
+    """Energy-based voice activity detection on PCM or μ-law audio.
+
+    Audio is cut into 20 ms frames and each frame's energy is computed for a
+    whole chunk at once with numpy. A frame is speech when it is at least
+    ``margin_db`` above the noise floor (a low percentile of the last 3 s of
+    frame energies) and above ``min_speech_db`` dBFS.
+
+    ``process`` returns only the audio worth recognizing: speech, the
+    ``pre_roll_ms`` before it so onsets are not clipped, and trailing
+    non-speech until ``end_silence_ms`` of it marks the end of the
+    utterance. Everything else is dropped.
+    """
+
+    def __init__(
+        self,
+        audio_format: AudioFormat,
+        margin_db: float,
+        min_speech_db: float,
+        pre_roll_ms: int,
+        end_silence_ms: int
+    ):
+        if audio_format.codec not in ("pcm", "mulaw"):
+            raise ValueError(f"VAD does not support {audio_format.codec} audio")
+        self.audio_format = audio_format
+        self.margin_db = margin_db
+        self.min_speech_db = min_speech_db
+        self.end_silence_frames = max(1, end_silence_ms // FRAME_MS)
+        self._sample_bytes = 1 if audio_format.codec == "mulaw" else 2
+        self.frame_bytes = audio_format.sample_rate * FRAME_MS // 1000 * self._sample_bytes
+        self._energies = np.full(NOISE_WINDOW_FRAMES, min_speech_db - margin_db, np.float32)
+        self.pre_roll_frames = max(1, pre_roll_ms // FRAME_MS)
+        self._pre_roll: Deque[bytes] = deque(maxlen=self.pre_roll_frames)
+        self._pending = b""
+        self._in_speech = False
+        self._silent_frames = 0
+
+    @property
+    def in_speech(self) -> bool:
+        """Whether an utterance has started and not yet ended."""
+        return self._in_speech
+
+    def _samples(self, audio: bytes) -> np.ndarray:
+        if self.audio_format.codec == "mulaw":
+            return _MULAW_TO_LINEAR[np.frombuffer(audio, dtype=np.uint8)]
+        return np.frombuffer(audio, dtype="<i2").astype(np.float32)
+
+    def frame_energies(self, audio: bytes) -> np.ndarray:
+        """Energy in dBFS of each whole frame in ``audio``."""
+        frames = self._samples(audio).reshape(-1, self.frame_bytes // self._sample_bytes)
+        power = np.mean(np.square(frames / 32768.0), axis=1)
+        energies: np.ndarray = 10 * np.log10(power + 1e-10)
+        return energies
+
+    def _is_speech(self, energies: np.ndarray) -> np.ndarray:
+        noise_floor = np.percentile(self._energies, NOISE_PERCENTILE)
+        speech = energies >= max(self.min_speech_db, noise_floor + self.margin_db)
+        recent = energies[-NOISE_WINDOW_FRAMES:]
+        self._energies = np.concatenate((self._energies[len(recent):], recent))
+        return speech
+
+    def process(self, audio: bytes) -> VadResult:
+        """Filter the next chunk of audio; partial frames wait for the next call."""
+        audio = self._pending + audio
+        whole = len(audio) - len(audio) % self.frame_bytes
+        audio, self._pending = audio[:whole], audio[whole:]
+        if not audio:
+            return VadResult(b"")
+        speech = self._is_speech(self.frame_energies(audio))
+        forwarded: List[bytes] = []
+        started = ended = False
+        for index, is_speech in enumerate(speech):
+            frame = audio[index * self.frame_bytes:(index + 1) * self.frame_bytes]
+            if not self._in_speech:
+                if not is_speech:
+                    self._pre_roll.append(frame)
+                    continue
+                self._in_speech, started = True, True
+                forwarded.extend(self._pre_roll)
+                self._pre_roll.clear()
+            forwarded.append(frame)
+            self._silent_frames = 0 if is_speech else self._silent_frames + 1
+            if self._silent_frames >= self.end_silence_frames:
+                self._in_speech, self._silent_frames, ended = False, 0, True
+                VAD_UTTERANCES.inc()
+        kept = b"".join(forwarded)
+        VAD_BYTES.inc(len(kept), decision="forwarded")
+        VAD_BYTES.inc(len(audio) - len(kept), decision="dropped")
+        return VadResult(kept, started, ended)
+
+    def trim(self, audio: bytes) -> bytes:
+        """Cut leading and trailing non-speech from a complete recording."""
+        audio = audio[:len(audio) - len(audio) % self.frame_bytes]
+        if not audio:
+            return b""
+        speech = np.flatnonzero(self._is_speech(self.frame_energies(audio)))
+        if speech.size == 0:
+            return b""
+        first = max(0, speech[0] - self.pre_roll_frames) * self.frame_bytes
+        last = (speech[-1] + 1 + self.end_silence_frames) * self.frame_bytes
+        return audio[first:last]
+
+    def silence(self, duration_ms: int) -> bytes:
+        """Encoded digital silence, e.g. to let the recognizer close an utterance."""
+        size = self.audio_format.sample_rate * duration_ms // 1000 * self._sample_bytes
+        return (b"\xff" if self.audio_format.codec == "mulaw" else b"\x00") * size
+
+
+def create_vad(audio_format: AudioFormat) -> Optional[VoiceActivityDetector]:
+    """Build a detector from settings, or None if disabled or the codec is compressed."""
+    settings = get_settings()
+    if not settings.vad_enabled or audio_format.codec not in ("pcm", "mulaw"):
+        return None
+    return VoiceActivityDetector(
+        audio_format,
+        margin_db=settings.vad_margin_db,
+        min_speech_db=settings.vad_min_speech_db,
+        pre_roll_ms=settings.vad_pre_roll_ms,
+        end_silence_ms=settings.vad_end_silence_ms
+    )
@@ -1,12 +1,27 @@
 import logging
+from typing import Any, Dict, List
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
+from .core.audio_cache import get_audio_cache
+from .core.config import get_settings
+from .core.health import get_health_monitor
+from .core.http_client import upstream_clients
+from .core.loop_watchdog import get_loop_watchdog
+from .core.metrics import MetricsMiddleware, Sample, metrics
+from .core.resilience import resilience_stats
+from .core.singleflight import single_flight_stats
+from .routes.audio import router as audio_router
 from .routes.base import router as base_router
 from .routes.speech import router as speech_router
 from .routes.chat import router as chat_router
+from .routes.converse import router as converse_router
 from .routes.tts import router as tts_router
+from .services.audio_store import get_audio_store
+from .services.response_cache import get_response_cache
+from .services.speech_service import get_speech_service, speech_pool_stats
 
 # Configure logging
 logging.basicConfig(
@@ -25,18 +40,96 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 # Include routes
 app.include_router(base_router)
 app.include_router(speech_router, prefix="/api")
 app.include_router(chat_router, prefix="/api")
 app.include_router(tts_router, prefix="/api")
+app.include_router(converse_router, prefix="/api")
+app.include_router(audio_router, prefix="/api")
+
+
+def _stats_samples(name: str, label: str, stats: Dict[str, Dict[str, Any]]) -> List[Sample]:
+    return [
+        (f"{name}_{key}", (label,), (component,), value)
+        for component, values in stats.items()
+        for key, value in values.items()
+        if isinstance(value, (int, float))
+    ]
+
+
+def _collect_component_stats() -> List[Sample]:
+    """Export the ``/stats/*`` counters, including cache hit rates, as gauges."""
+    audio_cache: Dict[str, float] = dict(get_audio_cache().stats())
+    lookups = audio_cache["hits"] + audio_cache["disk_hits"] + audio_cache["misses"]
+    audio_cache["hit_rate"] = (
+        (audio_cache["hits"] + audio_cache["disk_hits"]) / lookups if lookups else 0.0
+    )
+    caches: Dict[str, Dict[str, float]] = {"tts": audio_cache}
+    if (response_cache := get_response_cache()) is not None:
+        caches["chat"] = response_cache.stats()
+    upstreams = resilience_stats()
+    return [
+        *_stats_samples("cache", "cache", caches),
+        *_stats_samples("http_pool", "upstream", upstream_clients.stats()),
+        *_stats_samples("coalescing", "upstream", single_flight_stats()),
+        *_stats_samples("speech_pool", "pool", speech_pool_stats()),
+        *_stats_samples("upstream_resilience", "upstream", upstreams),
+        *[
+            ("upstream_circuit_open", ("upstream",), (name,), int(stats["state"] != "closed"))
+            for name, stats in upstreams.items()
+        ],
+        *[
+            ("upstream_probe_up", ("upstream",), (name,), int(result["ok"]))
+            for name, result in get_health_monitor().results().items()
+        ],
+    ]
+
+
+metrics.add_collector(_collect_component_stats)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint() -> PlainTextResponse:
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+async def _warm_up() -> None:
+    """Build the speech service and its pooled synthesizers and recognizers."""
+    await get_speech_service().warm_up()
 
 
 # Add startup event handler
 
 
 @app.on_event("startup")
-async def startup_event():
+async def startup_event() -> None:
     logger.info("Application starting up...")
-    # TODO: Add health checks for required services (Azure, OpenAI, Zonos)
+    settings = get_settings()
+    if (watchdog := get_loop_watchdog()) is not None:
+        watchdog.start()
+    await upstream_clients.startup()
+    get_audio_store().start_cleanup(settings.audio_store_cleanup_interval)
+    # Warm-up and the first round of probes run in the background, so the
+    # worker starts serving at once and /readyz says when it is fully ready.
+    health = get_health_monitor()
+    health.register("openai", upstream_clients.probe_openai)
+    health.register("zonos", upstream_clients.probe_zonos)
+    health.register("azure", upstream_clients.probe_azure)
+    if settings.startup_warm_up:
+        health.warm_up(_warm_up())
+    health.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event() -> None:
+    logger.info("Application shutting down...")
+    await get_health_monitor().stop()
+    get_audio_store().stop_cleanup()
+    await upstream_clients.shutdown()
+    if (watchdog := get_loop_watchdog()) is not None:
+        await watchdog.stop()
@@ -0,0 +1,38 @@
+import logging
+import mimetypes
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import FileResponse
+
+from app.services.audio_store import get_audio_store
+
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+router = APIRouter()
+
+
+@router.get("/audio/{audio_id}")
+async def get_audio(audio_id: str, request: Request) -> Response:
+    """Serve stored audio with Range, ETag and If-None-Match support.
+
+    Ids are content hashes, so the id itself is a strong ETag and a stored
+    file never changes.
+    """
+    audio_store = get_audio_store()
+    path = audio_store.path_for(audio_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Audio not found")
+    etag = f'"{audio_id}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={int(audio_store.ttl_seconds)}"
+    }
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match == "*":
+        return Response(status_code=304, headers=headers)
+    media_type = mimetypes.guess_type(audio_id)[0] or "application/octet-stream"
+    return FileResponse(path, media_type=media_type, headers=headers)
@@ -1,5 +1,22 @@
-from fastapi import APIRouter
+import secrets
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import JSONResponse
+from app.core.admission import admission_stats
+from app.core.audio_cache import get_audio_cache
+from app.core.config import get_settings
+from app.core.flow_control import get_connection_limiter
+from app.core.health import get_health_monitor
+from app.core.http_client import upstream_clients
+from app.core.loop_watchdog import get_loop_watchdog
+from app.core.resilience import resilience_stats
+from app.core.singleflight import single_flight_stats
+from app.core.tracing import CollectorExporter, get_tracer
 from app.routes.speech.routes import router as speech_router
+from app.services.response_cache import get_response_cache
+from app.services import speech_service
+from app.services.model_router import get_model_router
 
 router = APIRouter()
 
@@ -10,3 +27,91 @@ router.include_router(speech_router, tags=["speech"])
 @router.get("/")
 async def root():
     return {"message": "Welcome to AI Companion API"}
+
+
+@router.get("/healthz")
+async def healthz() -> Dict[str, Any]:
+    """Liveness: answers as long as the event loop does; never calls upstreams."""
+    return get_health_monitor().liveness()
+
+
+@router.get("/readyz")
+async def readyz() -> JSONResponse:
+    """Readiness from the last cached probe results; 503 until ready."""
+    readiness = get_health_monitor().readiness()
+    return JSONResponse(readiness, status_code=200 if readiness["ready"] else 503)
+
+
+@router.get("/stats/http")
+async def http_pool_stats() -> Dict[str, Any]:
+    return upstream_clients.stats()
+
+
+@router.get("/stats/websocket")
+async def websocket_stats() -> Dict[str, Any]:
+    return get_connection_limiter().stats()
+
+
+@router.get("/stats/tts-cache")
+async def tts_cache_stats() -> Dict[str, Any]:
+    return get_audio_cache().stats()
+
+
+@router.get("/stats/chat-cache")
+async def chat_cache_stats() -> Dict[str, Any]:
+    response_cache = get_response_cache()
+    return response_cache.stats() if response_cache else {"enabled": False}
+
+
+@router.get("/stats/chat-router")
+async def chat_router_stats() -> Dict[str, Any]:
+    return get_model_router().stats()
+
+
+@router.get("/stats/admission")
+async def upstream_admission_stats() -> Dict[str, Any]:
+    return admission_stats()
+
+
+@router.get("/stats/coalescing")
+async def coalescing_stats() -> Dict[str, Any]:
+    return single_flight_stats()
+
+
+@router.get("/stats/speech-pool")
+async def speech_pool_stats() -> Dict[str, Any]:
+    return speech_service.speech_pool_stats()
+
+
+@router.get("/stats/resilience")
+async def upstream_resilience_stats() -> Dict[str, Any]:
+    return resilience_stats()
+
+
+def require_debug_token(x_debug_token: Optional[str] = Header(None)) -> None:
+    """Guard ``/debug/*``: they expose user ids and live stacks.
+
+    Without ``DEBUG_TOKEN`` set the endpoints do not exist; with it, the
+    ``X-Debug-Token`` header must match.
+    """
+    token = get_settings().debug_token
+    if not token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_debug_token is None or not secrets.compare_digest(x_debug_token, token):
+        raise HTTPException(status_code=401, detail="Invalid debug token")
+
+
+@router.get("/debug/traces", dependencies=[Depends(require_debug_token)])
+async def recent_traces(min_duration_ms: float = 0.0) -> Dict[str, Any]:
+    exporter = get_tracer().exporter
+    if not isinstance(exporter, CollectorExporter):
+        return {"enabled": False}
+    return {"traces": exporter.traces(min_duration_ms)}
+
+
+@router.get("/debug/event-loop", dependencies=[Depends(require_debug_token)])
+async def event_loop_stats() -> Dict[str, Any]:
+    watchdog = get_loop_watchdog()
+    if watchdog is None:
+        return {"enabled": False}
+    return {**watchdog.stats(), "incidents": watchdog.incidents()}
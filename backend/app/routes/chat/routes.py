@@ -1,9 +1,15 @@
+import json
 import logging
+from typing import Any, AsyncIterator, Dict
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
-from app.services.chat_service import ChatService
+from app.core.admission import AdmissionRejectedError, get_admission, set_request_context
+from app.core.resilience import UpstreamTimeoutError, UpstreamUnavailableError
+from app.core.tracing import get_tracer
+from app.services.chat_service import ChatService, get_chat_service
 
 
 # Configure logging
@@ -28,10 +34,12 @@ class ChatResponse(BaseModel):
 async def chat_endpoint(request: ChatRequest):
     try:
         logger.info("Received chat request from user %s", request.user_id)
-        chat_service = ChatService()
-        generated_response = await chat_service.generate_response(
-            message=request.message, user_id=request.user_id
-        )
+        set_request_context(request.user_id)
+        chat_service = get_chat_service()
+        with get_tracer().trace("http.chat", user_id=request.user_id):
+            generated_response = await chat_service.generate_response(
+                message=request.message, user_id=request.user_id
+            )
         if not generated_response:
             raise HTTPException(
                 status_code=500, detail="Failed to generate response"
@@ -41,7 +49,72 @@ async def chat_endpoint(request: ChatRequest):
         )
         logger.info("Successfully processed chat request for user %s", request.user_id)
         return response
+    except AdmissionRejectedError as e:
+        logger.warning("Rejected chat request: %s", str(e))
+        raise HTTPException(
+            status_code=429, detail=str(e), headers={"Retry-After": f"{e.retry_after:.0f}"}
+        ) from e
+    except UpstreamUnavailableError as e:
+        logger.error("Error processing chat request: %s", str(e))
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": f"{e.retry_after:.0f}"}
+        ) from e
+    except UpstreamTimeoutError as e:
+        logger.error("Error processing chat request: %s", str(e))
+        raise HTTPException(status_code=504, detail=str(e)) from e
     except Exception as e:
         error_msg = "Internal server error: %s"
         logger.error("Error processing chat request: %s", str(e))
         raise HTTPException(status_code=500, detail=error_msg % str(e)) from e
+
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _stream_chat_events(
+    chat_service: ChatService, request: ChatRequest
+) -> AsyncIterator[str]:
+    tokens = []
+    try:
+        with get_tracer().trace("http.chat_stream", user_id=request.user_id):
+            async for token in chat_service.stream_response(
+                message=request.message, user_id=request.user_id
+            ):
+                tokens.append(token)
+                yield _sse_event("token", {"token": token})
+        yield _sse_event("done", {"response": "".join(tokens), "status": "success"})
+        logger.info("Successfully streamed chat response for user %s", request.user_id)
+    except ValueError as e:
+        logger.error("Error streaming chat response: %s", str(e))
+        yield _sse_event("error", {"detail": str(e), "status": "error"})
+
+
+@router.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest) -> StreamingResponse:
+    """Stream the reply as Server-Sent Events.
+
+    Emits one ``token`` event per content delta, then a single ``done`` event
+    carrying the full response, or an ``error`` event if the stream fails.
+    Returns 429 up front if the OpenAI queue is already full.
+    """
+    try:
+        logger.info("Received streaming chat request from user %s", request.user_id)
+        set_request_context(request.user_id)
+        get_admission("openai").check()
+        chat_service = get_chat_service()
+    except AdmissionRejectedError as e:
+        logger.warning("Rejected streaming chat request: %s", str(e))
+        raise HTTPException(
+            status_code=429, detail=str(e), headers={"Retry-After": f"{e.retry_after:.0f}"}
+        ) from e
+    except Exception as e:
+        logger.error("Error preparing streaming chat request: %s", str(e))
+        raise HTTPException(
+            status_code=500, detail=f"Internal server error: {str(e)}"
+        ) from e
+    return StreamingResponse(
+        _stream_chat_events(chat_service, request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,209 @@
+import asyncio
+import copy
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+
+from app.core.admission import AdmissionRejectedError, set_request_context
+from app.core.audio_framing import AudioFrameSender
+from app.core.audio_session import AudioSession, open_audio_session
+from app.core.flow_control import WebSocketChannel
+from app.core.tracing import get_tracer
+from app.services.chat_service import get_chat_service
+from app.services.conversation_service import ConversationService
+from app.services.speech_service import RecognitionSession, get_speech_service
+
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+class _Utterance:
+    """Receive and recognition timings of the utterance in progress, for tracing."""
+
+    def __init__(self) -> None:
+        self._reset()
+
+    def _reset(self) -> None:
+        self.first_audio: Optional[float] = None
+        self.last_audio: Optional[float] = None
+        self.first_result: Optional[float] = None
+        self.recognized: Optional[float] = None
+        self.frames = 0
+        self.bytes = 0
+
+    def on_audio(self, size: int) -> None:
+        self.last_audio = time.monotonic()
+        if self.first_audio is None:
+            self.first_audio = self.last_audio
+        self.frames += 1
+        self.bytes += size
+
+    def on_result(self, is_final: bool) -> None:
+        now = time.monotonic()
+        if self.first_result is None:
+            self.first_result = now
+        if is_final:
+            self.recognized = now
+
+    def finish(self) -> "_Utterance":
+        """Return the timings so far and start tracking the next utterance."""
+        finished = copy.copy(self)
+        self._reset()
+        return finished
+
+
+async def _run_turn(
+    channel: WebSocketChannel,
+    conversation: ConversationService,
+    text: str,
+    client_id: int,
+    user_id: str,
+    utterance: _Utterance,
+    audio: AudioSession,
+    lock: asyncio.Lock
+) -> None:
+    async def send_token(token: str) -> None:
+        async with lock:
+            await channel.send_json({"type": "token", "token": token})
+
+    tracer = get_tracer()
+    with tracer.trace(
+        "converse.turn", utterance.first_audio, client_id=client_id, user_id=user_id
+    ):
+        if utterance.first_audio is not None and utterance.last_audio is not None:
+            tracer.record_span(
+                "websocket.receive", utterance.first_audio, utterance.last_audio,
+                frames=utterance.frames, bytes=utterance.bytes
+            )
+        if utterance.first_result is not None and utterance.recognized is not None:
+            tracer.record_span("recognition", utterance.first_result, utterance.recognized)
+        sender = AudioFrameSender(channel, audio.output, lock, binary=audio.framing == "binary")
+        try:
+            response = await conversation.run_turn(text, user_id, send_token, sender)
+            with tracer.span("websocket.send", event="turn_end"):
+                async with lock:
+                    await channel.send_json(
+                        {"type": "turn_end", "text": text, "response": response}
+                    )
+            logger.info("Completed conversation turn for user %s", user_id)
+        except WebSocketDisconnect:
+            logger.info("Client %s disconnected during a conversation turn", client_id)
+        except AdmissionRejectedError as e:
+            logger.warning("Conversation turn for user %s rejected: %s", user_id, str(e))
+            await _send_turn_error(
+                channel, lock, {"error": "Server busy", "retry_after": e.retry_after}
+            )
+        except Exception as e:  # pylint: disable=broad-except
+            # The turn runs as a task nobody awaits: whatever goes wrong, the
+            # client must hear about it rather than wait for a turn_end.
+            logger.error("Error in conversation turn for user %s: %s", user_id, str(e))
+            await _send_turn_error(channel, lock, {"error": "Conversation turn failed"})
+
+
+async def _send_turn_error(
+    channel: WebSocketChannel, lock: asyncio.Lock, error: Dict[str, Any]
+) -> None:
+    try:
+        async with lock:
+            await channel.send_json({"type": "error", **error})
+    except WebSocketDisconnect:
+        pass
+
+
+async def _handle_recognition_events(
+    channel: WebSocketChannel,
+    session: RecognitionSession,
+    conversation: ConversationService,
+    client_id: int,
+    user_id: str,
+    utterance: _Utterance,
+    audio: AudioSession,
+    lock: asyncio.Lock
+) -> None:
+    turn: Optional[asyncio.Task] = None
+    try:
+        async for event in session.events():
+            if event.get("type") in ("recognizing", "recognized"):
+                utterance.on_result(bool(event.get("is_final")))
+            async with lock:
+                await channel.send_json(event, droppable=event.get("type") == "recognizing")
+            if not (event.get("is_final") and event.get("text")):
+                continue
+            finished = utterance.finish()
+            if turn is not None and not turn.done():
+                # The user spoke again: drop the reply that is still playing out.
+                logger.info("Barge-in from user %s, canceling current turn", user_id)
+                turn.cancel()
+            turn = asyncio.create_task(_run_turn(
+                channel, conversation, event["text"], client_id, user_id, finished, audio, lock
+            ))
+    finally:
+        if turn is not None and not turn.done():
+            turn.cancel()
+
+
+@router.websocket("/converse")
+async def converse(websocket: WebSocket) -> None:
+    """Full voice turn over one socket: audio in, recognition events, reply tokens and audio out.
+
+    Binary frames from the client are fed to continuous recognition. Every
+    final transcript starts a turn that streams ``token`` events, framed reply
+    audio (see ``AudioFrameSender``) and a closing ``turn_end`` event. An
+    optional ``{"type": "session", ...}`` first message negotiates the audio
+    codecs and framing (see ``negotiate``).
+    """
+    client_id = id(websocket)
+    user_id = websocket.query_params.get("user_id", str(client_id))
+    set_request_context(user_id)
+    logger.info("New WebSocket connection for conversation. Client ID: %s", client_id)
+    if (channel := await WebSocketChannel.accept(websocket)) is None:
+        return
+    speech_service = get_speech_service()
+    try:
+        audio, first_message = await open_audio_session(channel)
+        with get_tracer().trace("converse.connect", client_id=client_id, user_id=user_id):
+            session = await speech_service.start_recognition_session(
+                audio.input, on_utterance_end=channel.end_utterance
+            )
+    except WebSocketDisconnect:
+        logger.info("WebSocket disconnected for conversation. Client ID: %s", client_id)
+        await channel.close()
+        return
+    except AdmissionRejectedError as e:
+        logger.warning("Rejected conversation for client %s: %s", client_id, str(e))
+        await channel.send_json({"error": "Server busy", "retry_after": e.retry_after})
+        await channel.close(code=1000)
+        return
+    except (ValueError, RuntimeError) as e:
+        logger.error("Error starting recognition for client %s: %s", client_id, str(e))
+        await channel.send_json({"error": "Speech recognition failed"})
+        await channel.close(code=1000)
+        return
+    conversation = ConversationService(get_chat_service(), speech_service)
+    lock = asyncio.Lock()
+    utterance = _Utterance()
+    events = asyncio.create_task(_handle_recognition_events(
+        channel, session, conversation, client_id, user_id, utterance, audio, lock
+    ))
+    if first_message is not None:
+        utterance.on_audio(len(first_message["bytes"]))
+        session.write(first_message["bytes"])
+    try:
+        while True:
+            audio_data = await channel.receive_bytes()
+            utterance.on_audio(len(audio_data))
+            session.write(audio_data)
+    except WebSocketDisconnect:
+        logger.info("WebSocket disconnected for conversation. Client ID: %s", client_id)
+    except (ConnectionError, TimeoutError) as e:
+        logger.error("WebSocket connection error for client %s: %s", client_id, str(e))
+    finally:
+        events.cancel()
+        await session.stop()
+        await channel.close()
@@ -1,9 +1,16 @@
+import asyncio
 import logging
+import time
+from typing import Optional
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-import azure.cognitiveservices.speech as speechsdk
 
-from app.services.speech_service import SpeechService
+from app.core.admission import AdmissionRejectedError, set_request_context
+from app.core.audio_framing import AudioFrameSender
+from app.core.audio_session import AudioSession, negotiate, open_audio_session
+from app.core.flow_control import WebSocketChannel
+from app.core.tracing import get_tracer
+from app.services.speech_service import RecognitionSession, get_speech_service
 
 
 # Configure logging
@@ -11,64 +18,177 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/speech")
-speech_service = SpeechService()
+
+
+async def _stream_synthesized_audio(
+    channel: WebSocketChannel, text: str, audio: AudioSession
+) -> int:
+    """Send audio as it is synthesized and return the number of chunks sent."""
+    sender = AudioFrameSender(channel, audio.output, binary=audio.framing == "binary")
+    async for chunk in get_speech_service().stream_text_to_speech(text, audio.output):
+        await sender.send_chunk(chunk)
+    await sender.end()
+    return sender.seq
+
+
+async def _synthesize_for_client(
+    channel: WebSocketChannel, text: str, client_id: int, data: dict, audio: AudioSession
+) -> None:
+    if data.get("stream"):
+        chunks = await _stream_synthesized_audio(channel, text, audio)
+        logger.info("Streamed %d audio chunks to client %s", chunks, client_id)
+    else:
+        audio_data = await get_speech_service().text_to_speech(text)
+        with get_tracer().span("websocket.send", bytes=len(audio_data)):
+            await channel.send_bytes(audio_data)
+        logger.info("Successfully sent synthesized audio to client %s", client_id)
 
 
 @router.websocket("/synthesize")
 async def synthesize_speech(websocket: WebSocket):
+    """Synthesize each ``{"text": ...}`` message, whole or streamed with ``"stream": true``.
+
+    A ``{"type": "session", ...}`` message, at any point, negotiates the
+    codec and framing of streamed audio (see ``negotiate``).
+    """
     client_id = id(websocket)
+    set_request_context(websocket.query_params.get("user_id", str(client_id)))
     logger.info("New WebSocket connection for synthesis. Client ID: %s", client_id)
-    await websocket.accept()
+    if (channel := await WebSocketChannel.accept(websocket)) is None:
+        return
+    audio = AudioSession()
     try:
         while True:
-            data = await websocket.receive_json()
-            if text := data.get("text"):
+            data = await channel.receive_json()
+            if data.get("type") == "session":
+                try:
+                    audio = negotiate(data)
+                    await channel.send_json(audio.describe())
+                except ValueError as e:
+                    logger.warning("Invalid session header from client %s: %s", client_id, str(e))
+                    await channel.send_json({"error": "Invalid session header"})
+            elif text := data.get("text"):
                 logger.info("Synthesizing speech for client %s. Text: %.50s...", client_id, text)
                 try:
-                    audio_data = await speech_service.text_to_speech(text)
-                    await websocket.send_bytes(audio_data)
-                    logger.info("Successfully sent synthesized audio to client %s", client_id)
+                    with get_tracer().trace("speech.synthesize", client_id=client_id):
+                        await _synthesize_for_client(channel, text, client_id, data, audio)
+                except AdmissionRejectedError as e:
+                    logger.warning("Rejected synthesis for client %s: %s", client_id, str(e))
+                    await channel.send_json({"error": "Server busy", "retry_after": e.retry_after})
                 except ValueError as e:
                     logger.error("Error synthesizing speech for client %s: %s", client_id, str(e))
-                    await websocket.send_json({"error": "Speech synthesis failed"})
+                    await channel.send_json({"error": "Speech synthesis failed"})
             else:
                 logger.warning("Invalid data from client %s: missing 'text' field", client_id)
-                await websocket.send_json({"error": "Missing 'text' field in request"})
+                await channel.send_json({"error": "Missing 'text' field in request"})
     except WebSocketDisconnect:
         logger.info("WebSocket disconnected for synthesis. Client ID: %s", client_id)
     except (ConnectionError, TimeoutError) as e:
         logger.error("Connection error in synthesis WebSocket for client %s: %s", client_id, str(e))
         try:
-            await websocket.send_json({"error": "Connection error"})
+            await channel.send_json({"error": "Connection error"})
         except WebSocketDisconnect:
             pass
+    finally:
+        await channel.close()
 
 
-@router.websocket("/recognize")
-async def recognize_speech(websocket: WebSocket):
-    client_id = id(websocket)
-    logger.info("New WebSocket connection for recognition. Client ID: %s", client_id)
-    await websocket.accept()
+async def _forward_recognition_events(
+    channel: WebSocketChannel, session: RecognitionSession, client_id: int
+) -> None:
+    tracer = get_tracer()
+    first_result: Optional[float] = None
+    async for event in session.events():
+        if event.get("type") not in ("recognizing", "recognized"):
+            await channel.send_json(event)
+            continue
+        now = time.monotonic()
+        first_result = first_result or now
+        if not event.get("is_final"):
+            # A slow client can miss partial results; the next one supersedes them.
+            await channel.send_json(event, droppable=True)
+            continue
+        # One trace per utterance, from its first partial result.
+        with tracer.trace("speech.utterance", first_result, client_id=client_id):
+            tracer.record_span("recognition", first_result, now)
+            with tracer.span("websocket.send"):
+                await channel.send_json(event)
+        first_result = None
+        logger.info("Sent final recognition result to client %s", client_id)
+
+
+async def _receive_audio(
+    channel: WebSocketChannel, session: RecognitionSession, client_id: int
+) -> None:
     try:
         while True:
-            audio_data = await websocket.receive_bytes()
-            logger.info("Audio data from client %s. Size: %d bytes", client_id, len(audio_data))
-            try:
-                result = await speech_service.recognize_speech(audio_data)
-                response = {
-                    "text": result.text if result.text else "",
-                    "is_final": result.reason == speechsdk.ResultReason.RecognizedSpeech
-                }
-                await websocket.send_json(response)
-                logger.info("Successfully sent recognition result to client %s", client_id)
-            except ValueError as e:
-                logger.error("Error recognizing speech for client %s: %s", client_id, str(e))
-                await websocket.send_json({"error": "Speech recognition failed"})
+            audio_data = await channel.receive_bytes()
+            logger.debug("Audio data from client %s. Size: %d bytes", client_id, len(audio_data))
+            session.write(audio_data)
     except WebSocketDisconnect:
         logger.info("WebSocket disconnected for recognition. Client ID: %s", client_id)
     except (ConnectionError, TimeoutError) as e:
         logger.error("WebSocket connection error for client %s: %s", client_id, str(e))
         try:
-            await websocket.send_json({"error": "Connection error"})
+            await channel.send_json({"error": "Connection error"})
         except WebSocketDisconnect:
             pass
+
+
+@router.websocket("/recognize")
+async def recognize_speech(websocket: WebSocket):
+    """Recognize streamed audio, optionally after a ``{"type": "session", ...}`` header.
+
+    Without a header, binary frames are 16 kHz 16-bit mono PCM. If Azure
+    ends the session first, e.g. by canceling it, the socket is closed
+    with 1011.
+    """
+    client_id = id(websocket)
+    set_request_context(websocket.query_params.get("user_id", str(client_id)))
+    logger.info("New WebSocket connection for recognition. Client ID: %s", client_id)
+    if (channel := await WebSocketChannel.accept(websocket)) is None:
+        return
+    try:
+        audio, first_message = await open_audio_session(channel)
+        with get_tracer().trace("speech.connect", client_id=client_id):
+            session = await get_speech_service().start_recognition_session(
+                audio.input, on_utterance_end=channel.end_utterance
+            )
+    except WebSocketDisconnect:
+        logger.info("WebSocket disconnected for recognition. Client ID: %s", client_id)
+        await channel.close()
+        return
+    except AdmissionRejectedError as e:
+        logger.warning("Rejected recognition for client %s: %s", client_id, str(e))
+        await channel.send_json({"error": "Server busy", "retry_after": e.retry_after})
+        await channel.close(code=1000)
+        return
+    except (ValueError, RuntimeError) as e:
+        logger.error("Error starting recognition for client %s: %s", client_id, str(e))
+        await channel.send_json({"error": "Speech recognition failed"})
+        await channel.close(code=1000)
+        return
+    sender = asyncio.create_task(_forward_recognition_events(channel, session, client_id))
+    if first_message is not None:
+        session.write(first_message["bytes"])
+    receiver = asyncio.create_task(_receive_audio(channel, session, client_id))
+    close_code: Optional[int] = None
+    try:
+        await asyncio.wait((sender, receiver), return_when=asyncio.FIRST_COMPLETED)
+        if not receiver.done():
+            # Audio sent from now on would go nowhere.
+            logger.warning("Recognition session ended for client %s", client_id)
+            close_code = 1011
+    finally:
+        receiver.cancel()
+        sender.cancel()
+        sender_result, _ = await asyncio.gather(sender, receiver, return_exceptions=True)
+        if isinstance(sender_result, Exception) and not isinstance(
+            sender_result, WebSocketDisconnect
+        ):
+            logger.error(
+                "Error forwarding recognition events to client %s: %s",
+                client_id, str(sender_result)
+            )
+        await session.stop()
+        await channel.close(code=close_code)
@@ -1,9 +1,18 @@
+import asyncio
+import json
 import logging
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
 
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 
-from app.services.tts_service import TTSService
+from app.core.admission import AdmissionRejectedError, set_request_context
+from app.core.config import get_settings
+from app.core.resilience import UpstreamTimeoutError, UpstreamUnavailableError
+from app.core.tracing import get_tracer
+from app.services.audio_store import get_audio_store
+from app.services.tts_service import get_tts_service
 
 
 # Configure logging
@@ -18,6 +27,8 @@ class TTSRequest(BaseModel):
     text: str
     voice_id: str = "default"
     language: str = "ja-JP"
+    # Used for fair queueing; requests without one share the client's address.
+    user_id: Optional[str] = None
 
 
 class TTSResponse(BaseModel):
@@ -25,30 +36,231 @@ class TTSResponse(BaseModel):
     status: str
 
 
+class TTSBatchRequest(BaseModel):
+    items: List[TTSRequest] = Field(min_length=1)
+    stream: bool = False
+    user_id: Optional[str] = None
+
+
+class TTSBatchItem(BaseModel):
+    index: int
+    status: str
+    audio_url: Optional[str] = None
+    error: Optional[str] = None
+    code: Optional[int] = None
+    retry_after: Optional[float] = None
+
+
+class TTSBatchResponse(BaseModel):
+    results: List[TTSBatchItem]
+    succeeded: int
+    failed: int
+
+
+async def _synthesize_to_store(request: TTSRequest) -> str:
+    """Synthesize ``request``, store the audio and return its URL.
+
+    Raises:
+        ValueError: If synthesis fails or returns no audio, including the
+            upstream errors from ``app.core.resilience``
+    """
+    audio_data = await get_tts_service().synthesize_speech(
+        text=request.text,
+        voice_id=request.voice_id,
+        language=request.language
+    )
+    if not audio_data:
+        raise ValueError("Failed to synthesize speech")
+    # Azure fallback audio is WAV; Zonos returns MP3.
+    extension = "wav" if audio_data[:4] == b"RIFF" else "mp3"
+    audio_id = await get_audio_store().save(audio_data, extension)
+    return f"/api/audio/{audio_id}"
+
+
+def _client_id(http_request: Request) -> Optional[str]:
+    return http_request.client.host if http_request.client else None
+
+
 @router.post("/synthesize", response_model=TTSResponse)
-async def synthesize_speech(request: TTSRequest):
+async def synthesize_speech(request: TTSRequest, http_request: Request):
     try:
         logger.info("Received TTS request for text: %.50s...", request.text)
-        tts_service = TTSService()
-        audio_data = await tts_service.synthesize_speech(
-            text=request.text,
-            voice_id=request.voice_id,
-            language=request.language
-        )
-        if not audio_data:
-            raise HTTPException(
-                status_code=500,
-                detail="Failed to synthesize speech"
-            )
-        # TODO: Store audio data and generate URL
-        # For now, we'll return a placeholder
-        response = TTSResponse(
-            audio_url="/api/audio/temp.mp3",  # This will be replaced with actual storage
-            status="success"
-        )
+        set_request_context(request.user_id or _client_id(http_request))
+        with get_tracer().trace("http.synthesize", chars=len(request.text)):
+            audio_url = await _synthesize_to_store(request)
+        response = TTSResponse(audio_url=audio_url, status="success")
         logger.info("Successfully processed TTS request")
         return response
+    except AdmissionRejectedError as e:
+        logger.warning("Rejected TTS request: %s", str(e))
+        raise HTTPException(
+            status_code=429, detail=str(e), headers={"Retry-After": f"{e.retry_after:.0f}"}
+        ) from e
+    except UpstreamUnavailableError as e:
+        logger.error("Error processing TTS request: %s", str(e))
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": f"{e.retry_after:.0f}"}
+        ) from e
+    except UpstreamTimeoutError as e:
+        logger.error("Error processing TTS request: %s", str(e))
+        raise HTTPException(status_code=504, detail=str(e)) from e
     except Exception as e:
         error_msg = f"Internal server error: {str(e)}"
         logger.error("Error processing TTS request: %s", str(e))
         raise HTTPException(status_code=500, detail=error_msg) from e
+
+
+@router.post("/synthesize/stream")
+async def synthesize_speech_stream(request: TTSRequest, http_request: Request) -> StreamingResponse:
+    """Synthesize sentence by sentence and stream the audio segments in order.
+
+    The first segment is awaited before responding so that an upstream
+    failure still returns an error status; a later failure aborts the
+    response rather than ending it as if the audio were complete.
+    """
+    logger.info("Received chunked TTS request for text: %.50s...", request.text)
+    set_request_context(request.user_id or _client_id(http_request))
+    segments = get_tts_service().synthesize_chunked(
+        text=request.text,
+        voice_id=request.voice_id,
+        language=request.language
+    )
+    try:
+        first_segment = await anext(segments)
+    except StopAsyncIteration as e:
+        raise HTTPException(status_code=400, detail="No text to synthesize") from e
+    except AdmissionRejectedError as e:
+        await segments.aclose()
+        logger.warning("Rejected chunked TTS request: %s", str(e))
+        raise HTTPException(
+            status_code=429, detail=str(e), headers={"Retry-After": f"{e.retry_after:.0f}"}
+        ) from e
+    except UpstreamUnavailableError as e:
+        await segments.aclose()
+        logger.error("Error processing chunked TTS request: %s", str(e))
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": f"{e.retry_after:.0f}"}
+        ) from e
+    except UpstreamTimeoutError as e:
+        await segments.aclose()
+        logger.error("Error processing chunked TTS request: %s", str(e))
+        raise HTTPException(status_code=504, detail=str(e)) from e
+    except Exception as e:
+        await segments.aclose()
+        logger.error("Error processing chunked TTS request: %s", str(e))
+        raise HTTPException(
+            status_code=500, detail=f"Internal server error: {str(e)}"
+        ) from e
+
+    async def stream_segments() -> AsyncIterator[bytes]:
+        try:
+            yield first_segment
+            async for segment in segments:
+                yield segment
+            logger.info("Successfully streamed chunked TTS response")
+        except Exception as e:
+            # The status is already sent; aborting the response is the only
+            # way left to tell the client its audio is incomplete.
+            logger.error("Error streaming chunked TTS response: %s", str(e))
+            raise
+        finally:
+            # Also reached when the client disconnects: cancel pending segments.
+            await segments.aclose()
+
+    return StreamingResponse(stream_segments(), media_type="audio/mpeg")
+
+
+def _batch_item(index: int, audio_url: Optional[str], error: Optional[Exception]) -> TTSBatchItem:
+    if error is None:
+        return TTSBatchItem(index=index, status="success", audio_url=audio_url)
+    if isinstance(error, (AdmissionRejectedError, UpstreamUnavailableError)):
+        return TTSBatchItem(
+            index=index, status="error", error=str(error),
+            code=429 if isinstance(error, AdmissionRejectedError) else 503,
+            retry_after=error.retry_after
+        )
+    code = 504 if isinstance(error, UpstreamTimeoutError) else 500
+    return TTSBatchItem(index=index, status="error", error=str(error), code=code)
+
+
+@router.post("/synthesize/batch", response_model=TTSBatchResponse)
+async def synthesize_speech_batch(
+    request: TTSBatchRequest, http_request: Request
+) -> Union[TTSBatchResponse, StreamingResponse]:
+    """Synthesize several phrases in one call.
+
+    Identical items are synthesized once and share an ``audio_url``; at most
+    ``TTS_BATCH_CONCURRENCY`` run at a time. One item failing does not fail
+    the batch: each result carries its own ``status`` and, on error, the
+    status ``code`` the single-item endpoint would have returned. With
+    ``"stream": true`` results are sent as NDJSON lines in completion order,
+    followed by a ``{"type": "summary"}`` line. Batch items queue behind
+    interactive requests for the same upstream.
+    """
+    settings = get_settings()
+    if len(request.items) > settings.tts_batch_max_items:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many items: at most {settings.tts_batch_max_items} per batch"
+        )
+    # Positions of each distinct item, in first-seen order.
+    positions: Dict[Tuple[str, str, str], List[int]] = {}
+    for index, item in enumerate(request.items):
+        positions.setdefault((item.text, item.voice_id, item.language), []).append(index)
+    logger.info(
+        "Received TTS batch of %d items (%d distinct)", len(request.items), len(positions)
+    )
+    set_request_context(request.user_id or _client_id(http_request), priority="batch")
+    semaphore = asyncio.Semaphore(settings.tts_batch_concurrency)
+
+    async def synthesize(key: Tuple[str, str, str]) -> Tuple[List[int], List[TTSBatchItem]]:
+        text, voice_id, language = key
+        audio_url, error = None, None
+        try:
+            async with semaphore:
+                audio_url = await _synthesize_to_store(
+                    TTSRequest(text=text, voice_id=voice_id, language=language)
+                )
+        except Exception as e:  # pylint: disable=broad-except
+            logger.error("Error synthesizing batch item: %s", str(e))
+            error = e
+        indices = positions[key]
+        return indices, [_batch_item(index, audio_url, error) for index in indices]
+
+    tasks = [asyncio.create_task(synthesize(key)) for key in positions]
+
+    if not request.stream:
+        try:
+            with get_tracer().trace(
+                "http.synthesize_batch", items=len(request.items), distinct=len(positions)
+            ):
+                completed = await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        results = sorted(
+            (item for _, items in completed for item in items), key=lambda item: item.index
+        )
+        succeeded = sum(item.status == "success" for item in results)
+        return TTSBatchResponse(
+            results=results, succeeded=succeeded, failed=len(results) - succeeded
+        )
+
+    async def stream_results() -> AsyncIterator[str]:
+        succeeded = failed = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                _, items = await next_done
+                for item in items:
+                    if item.status == "success":
+                        succeeded += 1
+                    else:
+                        failed += 1
+                    yield json.dumps({"type": "result", **item.model_dump()}) + "\n"
+            yield json.dumps({"type": "summary", "succeeded": succeeded, "failed": failed}) + "\n"
+        finally:
+            # The client may disconnect before every item is done.
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
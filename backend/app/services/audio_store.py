@@ -0,0 +1,100 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from app.core.config import get_settings
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_AUDIO_ID = re.compile(r"^[0-9a-f]{32}\.[a-z0-9]{1,5}$")
+
+
+class AudioStore:
+    """Write-once file store for synthesized audio served from /api/audio/{id}.
+
+    Audio is content-addressed, so saving the same bytes twice yields the same
+    id and a single file. Files are removed once they have not been written
+    for ``ttl_seconds``; saving existing audio again refreshes its lifetime.
+    """
+
+    def __init__(self, directory: str, ttl_seconds: float):
+        self.directory = Path(directory)
+        self.ttl_seconds = ttl_seconds
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._cleanup_task: Optional[asyncio.Task] = None
+
+    async def save(self, audio_data: bytes, extension: str = "mp3") -> str:
+        """Store audio and return its id."""
+        audio_id = f"{hashlib.sha256(audio_data).hexdigest()[:32]}.{extension}"
+        await asyncio.to_thread(self._write, audio_id, audio_data)
+        return audio_id
+
+    def path_for(self, audio_id: str) -> Optional[Path]:
+        """Return the file for ``audio_id`` or None if it is unknown or expired."""
+        if not _AUDIO_ID.match(audio_id):
+            return None
+        path = self.directory / audio_id
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl_seconds:
+                return None
+        except FileNotFoundError:
+            return None
+        return path
+
+    def _write(self, audio_id: str, audio_data: bytes) -> None:
+        path = self.directory / audio_id
+        if path.exists():
+            os.utime(path)
+            return
+        tmp_path = path.with_suffix(f".{os.getpid()}.{id(audio_data)}.tmp")
+        tmp_path.write_bytes(audio_data)
+        os.replace(tmp_path, path)
+
+    def cleanup_expired(self) -> int:
+        """Delete expired audio files and return how many were removed."""
+        cutoff = time.time() - self.ttl_seconds
+        removed = 0
+        for path in self.directory.iterdir():
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        return removed
+
+    async def _run_cleanup(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if removed := await asyncio.to_thread(self.cleanup_expired):
+                    logger.info("Removed %d expired audio files", removed)
+            except OSError as e:
+                logger.error("Error cleaning up audio store: %s", str(e))
+
+    def start_cleanup(self, interval: float) -> None:
+        if self._cleanup_task is None:
+            self._cleanup_task = asyncio.create_task(self._run_cleanup(interval))
+
+    def stop_cleanup(self) -> None:
+        if self._cleanup_task is not None:
+            self._cleanup_task.cancel()
+            self._cleanup_task = None
+
+
+@lru_cache()
+def get_audio_store() -> AudioStore:
+    settings = get_settings()
+    directory = settings.audio_store_dir or os.path.join(
+        tempfile.gettempdir(), "ai-companion-audio"
+    )
+    return AudioStore(directory, settings.audio_store_ttl_seconds)
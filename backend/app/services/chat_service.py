@@ -1,21 +1,95 @@
+import hashlib
+import json
 import logging
-from typing import Optional
+import time
+from functools import lru_cache
+from typing import AsyncIterator, Dict, List, Optional, cast
 import openai
+from openai.types.chat import ChatCompletion, ChatCompletionMessageParam
+from app.core.admission import AdmissionRejectedError, get_admission
 from app.core.config import get_settings
+from app.core.http_client import upstream_clients
+from app.core.metrics import STREAM_FIRST_CHUNK_SECONDS
+from app.core.resilience import UpstreamTimeoutError, UpstreamUnavailableError, get_upstream
+from app.core.singleflight import get_single_flight
+from app.core.tracing import get_tracer
+from app.services.memory_service import get_conversation_store
+from app.services.model_router import extract_features, get_model_router
+from app.services.response_cache import get_response_cache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SYSTEM_PROMPT = "You are a friendly Japanese-speaking AI companion"
+# Intents whose reply does not need the conversation so far.
+STATELESS_INTENTS = frozenset({"greeting"})
+
 
 class ChatService:
 
     def __init__(self):
         self.settings = get_settings()
-        openai.api_key = self.settings.OPENAI_API_KEY
+        self.router = get_model_router()
+        self.memory = get_conversation_store()
+        self.response_cache = get_response_cache()
+        self.single_flight = get_single_flight("openai")
+        self.resilience = get_upstream("openai")
+        self.admission = get_admission("openai")
+
+    @property
+    def client(self) -> openai.AsyncOpenAI:
+        return upstream_clients.openai_client
+
+    @staticmethod
+    def _build_messages(
+        message: str, history: List[Dict[str, str]]
+    ) -> List[ChatCompletionMessageParam]:
+        # Stored history holds only system, user and assistant turns.
+        return cast(List[ChatCompletionMessageParam], [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            *history,
+            {"role": "user", "content": message}
+        ])
+
+    # A reply depends on the user's history, so only replies to a message with
+    # no history before it are cached. They are served to messages with no
+    # history, and to greetings whatever came before; every other message
+    # with history skips the cache and is counted as a bypass.
+
+    def _cached_response(self, message: str, history: List[Dict[str, str]]) -> Optional[str]:
+        if self.response_cache is None:
+            return None
+        if len(message) > self.settings.chat_cache_max_message_chars:
+            return None
+        if history and extract_features(message).intent not in STATELESS_INTENTS:
+            self.response_cache.bypass()
+            return None
+        return self.response_cache.get(message, SYSTEM_PROMPT)
+
+    def _cache_response(self, message: str, history: List[Dict[str, str]], reply: str) -> None:
+        if self.response_cache is not None and not history:
+            if len(message) <= self.settings.chat_cache_max_message_chars:
+                self.response_cache.put(message, SYSTEM_PROMPT, reply)
+
+    async def _complete(
+        self, model: str, messages: List[ChatCompletionMessageParam]
+    ) -> ChatCompletion:
+        async with self.admission.slot():
+            response = await self.resilience.call(
+                lambda: self.client.chat.completions.create(model=model, messages=messages)
+            )
+        # A whole completion says nothing about the time to first output the
+        # router compares, so only its outcome is recorded.
+        self.router.record(model, None)
+        return response
+
+    async def _remember(self, user_id: str, message: str, reply: str) -> None:
+        await self.memory.append(user_id, "user", message)
+        await self.memory.append(user_id, "assistant", reply)
 
     async def generate_response(self, message: str, user_id: str) -> Optional[str]:
-        """Generate a response using GPT-4 for the given message.
+        """Generate a response with the model the router picks for the message.
 
         Args:
             message (str): The user's input message
@@ -27,23 +101,116 @@ class ChatService:
         Raises:
             Exception: If there's an error in generating the response
         """
+        history = await self.memory.get_messages(user_id)
+        if (cached := self._cached_response(message, history)) is not None:
+            logger.info("Serving cached response for user %s", user_id)
+            await self._remember(user_id, message, cached)
+            return cached
+        model = self.router.route(message, user_id).model
         try:
-            logger.info("Generating response for user %s", user_id)
-            messages = [
-                {"role": "system", "content": "You are a friendly Japanese-speaking AI companion"},
-                {"role": "user", "content": message}
-            ]
-            response = await openai.chat.completions.create(model="gpt-4", messages=messages)
+            logger.info("Generating response for user %s with %s", user_id, model)
+            messages = self._build_messages(message, history)
+            # Identical prompts in flight at the same time share one completion.
+            prompt_key = hashlib.sha256(
+                json.dumps([model, messages], ensure_ascii=False).encode("utf-8")
+            ).hexdigest()
+            with get_tracer().span("llm", model=model):
+                response = await self.single_flight.do(
+                    prompt_key, lambda: self._complete(model, messages)
+                )
 
             if not response.choices:
-                logger.error("No response generated from GPT-4")
+                logger.error("No response generated from %s", model)
                 return None
 
             generated_text = response.choices[0].message.content
+            if generated_text:
+                self._cache_response(message, history, generated_text)
+                await self._remember(user_id, message, generated_text)
             logger.info("Generated response for user %s", user_id)
             return generated_text
 
+        except AdmissionRejectedError as e:
+            logger.warning("Chat request for user %s rejected: %s", user_id, str(e))
+            raise
+        except (UpstreamUnavailableError, UpstreamTimeoutError) as e:
+            logger.error("Error generating chat response: %s", str(e))
+            self.router.record(model, None, ok=False)
+            raise
         except Exception as e:
             error_msg = "Failed to generate response: %s"
             logger.error("Error generating chat response: %s", str(e))
+            self.router.record(model, None, ok=False)
             raise ValueError(error_msg % str(e)) from e
+
+    async def stream_response(self, message: str, user_id: str) -> AsyncIterator[str]:
+        """Stream a response token by token as the routed model produces it.
+
+        Args:
+            message (str): The user's input message
+            user_id (str): Unique identifier for the user
+
+        Yields:
+            str: The next non-empty content delta from the completion
+
+        Raises:
+            ValueError: If the stream cannot be opened or breaks mid-response
+        """
+        history = await self.memory.get_messages(user_id)
+        if (cached := self._cached_response(message, history)) is not None:
+            logger.info("Serving cached response for user %s", user_id)
+            await self._remember(user_id, message, cached)
+            yield cached
+            return
+        model = self.router.route(message, user_id).model
+        with get_tracer().span("llm.stream", activate=False, model=model) as span:
+            first_token: Optional[float] = None
+            try:
+                logger.info("Streaming response for user %s with %s", user_id, model)
+                messages = self._build_messages(message, history)
+                tokens: List[str] = []
+                # The slot is held until the stream ends, as its connection is.
+                async with self.admission.slot():
+                    started = time.perf_counter()
+                    # Only opening the stream is retried; a hedged duplicate
+                    # would leave an open stream behind.
+                    stream = await self.resilience.call(
+                        lambda: self.client.chat.completions.create(
+                            model=model, messages=messages, stream=True
+                        ),
+                        hedge=False
+                    )
+                    async for chunk in stream:
+                        if not chunk.choices:
+                            continue
+                        if token := chunk.choices[0].delta.content:
+                            if not tokens:
+                                first_token = time.perf_counter() - started
+                                STREAM_FIRST_CHUNK_SECONDS.observe(
+                                    first_token, stream="chat_tokens"
+                                )
+                                span.attributes["first_token_ms"] = round(first_token * 1000, 3)
+                            tokens.append(token)
+                            yield token
+                span.attributes["tokens"] = len(tokens)
+                self.router.record(model, first_token)
+                if tokens:
+                    self._cache_response(message, history, "".join(tokens))
+                    await self._remember(user_id, message, "".join(tokens))
+                logger.info("Finished streaming response for user %s", user_id)
+            except AdmissionRejectedError as e:
+                logger.warning("Chat stream for user %s rejected: %s", user_id, str(e))
+                raise
+            except (UpstreamUnavailableError, UpstreamTimeoutError) as e:
+                logger.error("Error streaming chat response: %s", str(e))
+                self.router.record(model, None, ok=False)
+                raise
+            except Exception as e:
+                logger.error("Error streaming chat response: %s", str(e))
+                self.router.record(model, None, ok=False)
+                raise ValueError(f"Failed to stream response: {str(e)}") from e
+
+
+@lru_cache()
+def get_chat_service() -> ChatService:
+    return ChatService()
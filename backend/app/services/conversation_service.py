@@ -0,0 +1,77 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional
+
+from app.core.audio_framing import AudioFrameSender
+from app.core.text import SentenceBuffer
+from app.services.chat_service import ChatService
+from app.services.speech_service import SpeechService
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ConversationService:
+    """Run one voice turn: stream the LLM reply and synthesize it sentence by sentence.
+
+    The LLM stream and speech synthesis run concurrently. As soon as the reply
+    contains a complete sentence it is queued for synthesis, so the first audio
+    is sent while the rest of the reply is still being generated.
+    """
+
+    def __init__(self, chat_service: ChatService, speech_service: SpeechService):
+        self.chat_service = chat_service
+        self.speech_service = speech_service
+
+    async def run_turn(
+        self,
+        text: str,
+        user_id: str,
+        on_token: Callable[[str], Awaitable[None]],
+        audio_sender: AudioFrameSender
+    ) -> str:
+        """Generate and speak the reply to ``text``.
+
+        Args:
+            text (str): The recognized user utterance
+            user_id (str): Unique identifier for the user
+            on_token (Callable): Called with each LLM token as it arrives
+            audio_sender (AudioFrameSender): Destination for synthesized audio
+
+        Returns:
+            str: The full generated reply
+
+        Raises:
+            ValueError: If the LLM stream or speech synthesis fails
+        """
+        sentences: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
+        tokens: List[str] = []
+
+        async def produce_sentences() -> None:
+            buffer = SentenceBuffer()
+            try:
+                async for token in self.chat_service.stream_response(text, user_id):
+                    tokens.append(token)
+                    await on_token(token)
+                    for sentence in buffer.feed(token):
+                        sentences.put_nowait(sentence)
+                if remainder := buffer.flush():
+                    sentences.put_nowait(remainder)
+            finally:
+                sentences.put_nowait(None)
+
+        producer = asyncio.create_task(produce_sentences())
+        try:
+            while (sentence := await sentences.get()) is not None:
+                logger.info("Synthesizing sentence for user %s: %.50s...", user_id, sentence)
+                async for chunk in self.speech_service.stream_text_to_speech(
+                    sentence, audio_sender.audio_format
+                ):
+                    await audio_sender.send_chunk(chunk)
+            await producer
+        finally:
+            if not producer.done():
+                producer.cancel()
+        await audio_sender.end()
+        return "".join(tokens)
@@ -0,0 +1,225 @@
+import asyncio
+import logging
+import re
+import sqlite3
+import threading
+from collections import OrderedDict, deque
+from functools import lru_cache
+from typing import Deque, Dict, List, NamedTuple, Tuple, Union
+
+from app.core.config import get_settings
+from app.core.text import split_sentences
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_CJK = re.compile(r"[぀-ヿ㐀-䶿一-鿿＀-￯]")
+# Per-message overhead of the chat format (role and separators).
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate: about one token per CJK character and per 4 other characters."""
+    cjk = len(_CJK.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4 + MESSAGE_OVERHEAD_TOKENS
+
+
+class Turn(NamedTuple):
+    role: str
+    content: str
+    tokens: int
+
+
+def _summarize(summary: str, evicted: List[Turn], max_tokens: int) -> str:
+    """Fold evicted turns into the rolling summary.
+
+    Keeps the first sentence of each evicted user turn and drops the oldest
+    lines once the summary exceeds ``max_tokens``.
+    """
+    lines = summary.splitlines() if summary else []
+    for turn in evicted:
+        if turn.role == "user" and (sentences := split_sentences(turn.content)):
+            lines.append(f"- {sentences[0]}")
+    while lines and estimate_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+def _to_messages(summary: str, turns: List[Turn]) -> List[Dict[str, str]]:
+    messages = []
+    if summary:
+        messages.append({
+            "role": "system",
+            "content": f"Earlier in this conversation the user said:\n{summary}"
+        })
+    messages.extend({"role": turn.role, "content": turn.content} for turn in turns)
+    return messages
+
+
+class _Conversation:
+    def __init__(self) -> None:
+        self.turns: Deque[Turn] = deque()
+        self.total_tokens = 0
+        self.summary = ""
+
+
+class InMemoryConversationStore:
+    """Per-user chat history kept in process memory.
+
+    Every turn's token count is computed once when it is appended and a
+    running total is kept, so trimming to ``max_tokens`` never re-tokenizes
+    the history. Turns pushed out of the budget are folded into a short
+    summary. At most ``max_users`` conversations are kept, least recently
+    used first out.
+    """
+
+    def __init__(self, max_tokens: int, summary_max_tokens: int, max_users: int):
+        self.max_tokens = max_tokens
+        self.summary_max_tokens = summary_max_tokens
+        self.max_users = max_users
+        self._conversations: "OrderedDict[str, _Conversation]" = OrderedDict()
+
+    async def get_messages(self, user_id: str) -> List[Dict[str, str]]:
+        if (conversation := self._conversations.get(user_id)) is None:
+            return []
+        self._conversations.move_to_end(user_id)
+        return _to_messages(conversation.summary, list(conversation.turns))
+
+    async def append(self, user_id: str, role: str, content: str) -> None:
+        conversation = self._conversations.get(user_id)
+        if conversation is None:
+            conversation = self._conversations[user_id] = _Conversation()
+            while len(self._conversations) > self.max_users:
+                self._conversations.popitem(last=False)
+        self._conversations.move_to_end(user_id)
+
+        turn = Turn(role, content, estimate_tokens(content))
+        conversation.turns.append(turn)
+        conversation.total_tokens += turn.tokens
+        evicted = []
+        while conversation.total_tokens > self.max_tokens and len(conversation.turns) > 1:
+            old = conversation.turns.popleft()
+            conversation.total_tokens -= old.tokens
+            evicted.append(old)
+        if evicted:
+            conversation.summary = _summarize(
+                conversation.summary, evicted, self.summary_max_tokens
+            )
+
+    async def clear(self, user_id: str) -> None:
+        self._conversations.pop(user_id, None)
+
+
+class SQLiteConversationStore:
+    """Per-user chat history persisted in SQLite.
+
+    Token counts are stored with each turn and the per-user total is kept in
+    the ``conversations`` table, so appending and trimming touch only the
+    affected rows. Queries run on a worker thread to keep the event loop free.
+    """
+
+    def __init__(self, path: str, max_tokens: int, summary_max_tokens: int):
+        self.max_tokens = max_tokens
+        self.summary_max_tokens = summary_max_tokens
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS conversations (
+                user_id TEXT PRIMARY KEY,
+                total_tokens INTEGER NOT NULL DEFAULT 0,
+                summary TEXT NOT NULL DEFAULT ''
+            );
+            CREATE TABLE IF NOT EXISTS turns (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id TEXT NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                tokens INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS turns_user_id ON turns (user_id, id);
+            """
+        )
+
+    async def get_messages(self, user_id: str) -> List[Dict[str, str]]:
+        summary, turns = await asyncio.to_thread(self._load, user_id)
+        return _to_messages(summary, turns)
+
+    async def append(self, user_id: str, role: str, content: str) -> None:
+        turn = Turn(role, content, estimate_tokens(content))
+        await asyncio.to_thread(self._append, user_id, turn)
+
+    async def clear(self, user_id: str) -> None:
+        await asyncio.to_thread(self._clear, user_id)
+
+    def _load(self, user_id: str) -> Tuple[str, List[Turn]]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT summary FROM conversations WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            turns = [Turn(*r) for r in self._db.execute(
+                "SELECT role, content, tokens FROM turns WHERE user_id = ? ORDER BY id",
+                (user_id,)
+            )]
+        return (row[0] if row else ""), turns
+
+    def _append(self, user_id: str, turn: Turn) -> None:
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO turns (user_id, role, content, tokens) VALUES (?, ?, ?, ?)",
+                (user_id, turn.role, turn.content, turn.tokens)
+            )
+            self._db.execute(
+                "INSERT INTO conversations (user_id, total_tokens) VALUES (?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET total_tokens = total_tokens + ?",
+                (user_id, turn.tokens, turn.tokens)
+            )
+            total, summary = self._db.execute(
+                "SELECT total_tokens, summary FROM conversations WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            if total <= self.max_tokens:
+                return
+            evicted: List[Turn] = []
+            evicted_ids = []
+            rows = self._db.execute(
+                "SELECT id, role, content, tokens FROM turns WHERE user_id = ? ORDER BY id",
+                (user_id,)
+            ).fetchall()
+            for row_id, role, content, tokens in rows[:-1]:
+                if total <= self.max_tokens:
+                    break
+                evicted.append(Turn(role, content, tokens))
+                evicted_ids.append((row_id,))
+                total -= tokens
+            self._db.executemany("DELETE FROM turns WHERE id = ?", evicted_ids)
+            self._db.execute(
+                "UPDATE conversations SET total_tokens = ?, summary = ? WHERE user_id = ?",
+                (total, _summarize(summary, evicted, self.summary_max_tokens), user_id)
+            )
+
+    def _clear(self, user_id: str) -> None:
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM turns WHERE user_id = ?", (user_id,))
+            self._db.execute("DELETE FROM conversations WHERE user_id = ?", (user_id,))
+
+
+ConversationStore = Union[InMemoryConversationStore, SQLiteConversationStore]
+
+
+@lru_cache()
+def get_conversation_store() -> ConversationStore:
+    settings = get_settings()
+    if settings.chat_history_backend == "sqlite":
+        logger.info("Using SQLite conversation store at %s", settings.chat_history_sqlite_path)
+        return SQLiteConversationStore(
+            settings.chat_history_sqlite_path,
+            settings.chat_history_max_tokens,
+            settings.chat_summary_max_tokens
+        )
+    return InMemoryConversationStore(
+        settings.chat_history_max_tokens,
+        settings.chat_summary_max_tokens,
+        settings.chat_history_max_users
+    )
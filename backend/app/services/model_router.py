@@ -0,0 +1,329 @@
+import logging
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Any, Deque, Dict, FrozenSet, NamedTuple, Optional, Sequence, Set, Tuple
+
+from app.core.config import get_settings
+from app.core.metrics import metrics
+from app.core.resilience import LatencyWindow
+from app.services.response_cache import normalize_message
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CHAT_ROUTE_DECISIONS = metrics.counter(
+    "chat_route_decisions_total",
+    "Chat model routing decisions; in shadow mode, the model that would have been used.",
+    ["model", "reason", "mode"]
+)
+CHAT_MODEL_LATENCY = metrics.histogram(
+    "chat_model_latency_seconds",
+    "Time from request to the first output of each chat model.",
+    ["model"]
+)
+CHAT_MODEL_ERRORS = metrics.counter(
+    "chat_model_errors_total", "Failed chat completions per model.", ["model"]
+)
+
+INTENTS = ("greeting", "smalltalk", "question", "complex")
+LANGUAGES = ("ja", "en", "other")
+
+# Checked against the normalized message (see ``normalize_message``).
+GREETINGS = (
+    "こんにちは", "こんばんは", "おはよう", "おやすみ", "ありがとう", "よろしく",
+    "ただいま", "おつかれ", "またね", "さようなら", "hello", "hi", "hey", "thanks",
+    "thankyou", "goodmorning", "goodnight", "bye",
+)
+# Checked against the lowercased message.
+COMPLEX_MARKERS = (
+    "なぜ", "どうして", "説明", "教えて", "比較", "違い", "方法", "手順", "理由", "要約",
+    "まとめて", "翻訳", "計算", "コード", "プログラム", "why", "how ", "explain",
+    "compare", "summar", "translate", "calculate", "code", "```",
+)
+QUESTION_ENDINGS = ("?", "？", "か", "かな", "の")
+# Longer messages are treated as complex whatever they contain.
+COMPLEX_MIN_CHARS = 200
+
+
+class RequestFeatures(NamedTuple):
+    chars: int
+    language: str
+    intent: str
+
+
+def _language(message: str) -> str:
+    kana = cjk = latin = 0
+    for c in message:
+        if "\u3040" <= c <= "\u30ff":
+            kana += 1
+        elif "\u4e00" <= c <= "\u9fff":
+            cjk += 1
+        elif c.isascii() and c.isalpha():
+            latin += 1
+    if kana or cjk > latin:
+        return "ja"
+    return "en" if latin else "other"
+
+
+def _intent(message: str, normalized: str) -> str:
+    lowered = message.lower()
+    if len(message) >= COMPLEX_MIN_CHARS or any(m in lowered for m in COMPLEX_MARKERS):
+        return "complex"
+    if normalized.startswith(GREETINGS) and len(normalized) <= 20:
+        return "greeting"
+    if message.rstrip().endswith(QUESTION_ENDINGS):
+        return "question"
+    return "smalltalk"
+
+
+def extract_features(message: str) -> RequestFeatures:
+    """Cheap, local features of one chat message: length, language and intent."""
+    return RequestFeatures(
+        chars=len(message),
+        language=_language(message),
+        intent=_intent(message, normalize_message(message))
+    )
+
+
+class RoutingRule(NamedTuple):
+    """Send matching messages to the first healthy model of ``models``.
+
+    Unset conditions match anything. ``max_latency`` is the median latency,
+    in seconds, above which a model is skipped for the next candidate.
+    """
+
+    name: str
+    models: Tuple[str, ...]
+    intents: Optional[FrozenSet[str]] = None
+    languages: Optional[FrozenSet[str]] = None
+    max_chars: Optional[int] = None
+    max_latency: Optional[float] = None
+
+    @classmethod
+    def parse(cls, raw: Dict[str, Any]) -> "RoutingRule":
+        """Build a rule from its settings form.
+
+        Raises:
+            ValueError: If a field is unknown or a required one is missing
+        """
+        if unknown := set(raw) - set(cls._fields) - {"model"}:
+            raise ValueError(f"Unknown routing rule fields: {sorted(unknown)}")
+        models = raw.get("models") or ([raw["model"]] if raw.get("model") else [])
+        if not models:
+            raise ValueError("A routing rule needs at least one model")
+        if unknown := set(raw.get("intents") or ()) - set(INTENTS):
+            raise ValueError(f"Unknown intents: {sorted(unknown)}")
+        if unknown := set(raw.get("languages") or ()) - set(LANGUAGES):
+            raise ValueError(f"Unknown languages: {sorted(unknown)}")
+        return cls(
+            name=raw.get("name") or models[0],
+            models=tuple(models),
+            intents=frozenset(raw["intents"]) if raw.get("intents") else None,
+            languages=frozenset(raw["languages"]) if raw.get("languages") else None,
+            max_chars=raw.get("max_chars"),
+            max_latency=raw.get("max_latency")
+        )
+
+    def matches(self, features: RequestFeatures) -> bool:
+        return (
+            (self.intents is None or features.intent in self.intents)
+            and (self.languages is None or features.language in self.languages)
+            and (self.max_chars is None or features.chars <= self.max_chars)
+        )
+
+
+class ModelStats:
+    """Latency and outcome of the most recent calls to one model."""
+
+    def __init__(self, size: int = 200):
+        self.size = size
+        self.latency = LatencyWindow(size)
+        self._outcomes: Deque[bool] = deque(maxlen=size)
+        self.requests = 0
+        self.errors = 0
+
+    def reset(self) -> None:
+        """Forget recent calls, keeping the lifetime counts."""
+        self.latency = LatencyWindow(self.size)
+        self._outcomes.clear()
+
+    def record(self, latency: Optional[float], ok: bool) -> None:
+        self.requests += 1
+        self._outcomes.append(ok)
+        if ok and latency is not None:
+            self.latency.add(latency)
+        if not ok:
+            self.errors += 1
+
+    @property
+    def samples(self) -> int:
+        return len(self._outcomes)
+
+    @property
+    def error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    def stats(self) -> Dict[str, Any]:
+        p50, p95 = self.latency.percentile(0.5), self.latency.percentile(0.95)
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "recent_error_rate": round(self.error_rate, 3),
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
+
+
+class RouteDecision(NamedTuple):
+    model: str
+    reason: str
+    features: Optional[RequestFeatures] = None
+
+
+class ModelRouter:
+    """Choose the chat model for each request.
+
+    A per-user override wins; otherwise the first rule matching the
+    message's features picks the model, and ``default_model`` is used when
+    none does. Within a rule, a model whose recent error rate is above
+    ``max_error_rate`` or whose median latency is above the rule's
+    ``max_latency`` is passed over for the next one; stats only count once a
+    model has ``min_samples`` calls. If no candidate is healthy, the one with
+    the lowest median latency is used.
+
+    A passed-over model gets no traffic to show it has recovered, so, like a
+    half-open circuit, one request is sent to it every ``probe_interval``
+    seconds; if that succeeds its recent stats are forgotten and it is
+    judged afresh. A probe that is never recorded, e.g. because the call
+    was cancelled, simply expires when the next one is due. In ``shadow``
+    mode the chosen model is not called, so no probes are sent.
+
+    ``mode`` is ``on`` to use the chosen model, ``shadow`` to keep using
+    ``default_model`` while logging and counting what would have been
+    chosen, and ``off`` to skip routing entirely.
+    """
+
+    def __init__(
+        self,
+        default_model: str,
+        rules: Sequence[RoutingRule],
+        mode: str = "on",
+        overrides: Optional[Dict[str, str]] = None,
+        max_error_rate: float = 0.2,
+        min_samples: int = 10,
+        probe_interval: float = 30.0
+    ):
+        self.default_model = default_model
+        self.rules = list(rules)
+        self.mode = mode
+        self.overrides = dict(overrides or {})
+        self.max_error_rate = max_error_rate
+        self.min_samples = min_samples
+        self.probe_interval = probe_interval
+        self._stats: Dict[str, ModelStats] = {}
+        # Passed-over models: when they were last excluded or probed.
+        self._excluded: Dict[str, float] = {}
+        # Models whose latest probe has not been recorded yet.
+        self._probing: Set[str] = set()
+
+    def model_stats(self, model: str) -> ModelStats:
+        if (stats := self._stats.get(model)) is None:
+            stats = self._stats[model] = ModelStats()
+        return stats
+
+    def _within_limits(self, model: str, rule: RoutingRule) -> bool:
+        stats = self.model_stats(model)
+        if stats.samples < self.min_samples:
+            return True
+        if stats.error_rate > self.max_error_rate:
+            return False
+        median = stats.latency.percentile(0.5)
+        return rule.max_latency is None or median is None or median <= rule.max_latency
+
+    def _healthy(self, model: str, rule: RoutingRule) -> bool:
+        if self._within_limits(model, rule):
+            self._excluded.pop(model, None)
+            return True
+        now = time.monotonic()
+        since = self._excluded.setdefault(model, now)
+        if self.mode == "shadow" or now - since < self.probe_interval:
+            return False
+        self._excluded[model] = now
+        self._probing.add(model)
+        logger.info("Probing passed-over chat model %s", model)
+        return True
+
+    def _pick(self, rule: RoutingRule) -> Tuple[str, str]:
+        for model in rule.models:
+            if self._healthy(model, rule):
+                return model, f"rule:{rule.name}"
+
+        def median(model: str) -> float:
+            value = self.model_stats(model).latency.percentile(0.5)
+            return value if value is not None else float("inf")
+
+        return min(rule.models, key=median), f"rule:{rule.name}:degraded"
+
+    def decide(self, message: str, user_id: str) -> RouteDecision:
+        """What the router picks, whatever the mode."""
+        if (model := self.overrides.get(user_id)) is not None:
+            return RouteDecision(model, "override")
+        features = extract_features(message)
+        for rule in self.rules:
+            if rule.matches(features):
+                model, reason = self._pick(rule)
+                return RouteDecision(model, reason, features)
+        return RouteDecision(self.default_model, "default", features)
+
+    def route(self, message: str, user_id: str) -> RouteDecision:
+        """The model to call for this request."""
+        if self.mode == "off":
+            return RouteDecision(self.default_model, "off")
+        decision = self.decide(message, user_id)
+        CHAT_ROUTE_DECISIONS.inc(model=decision.model, reason=decision.reason, mode=self.mode)
+        if self.mode == "shadow":
+            logger.info(
+                "Router would use %s (%s, %s) for user %s; using %s",
+                decision.model, decision.reason, decision.features, user_id, self.default_model
+            )
+            return RouteDecision(self.default_model, "shadow", decision.features)
+        return decision
+
+    def record(self, model: str, latency: Optional[float], ok: bool = True) -> None:
+        """Record one call; ``latency`` is the time until its first output."""
+        if model in self._probing:
+            self._probing.discard(model)
+            if ok:
+                self.model_stats(model).reset()
+                self._excluded.pop(model, None)
+        self.model_stats(model).record(latency, ok)
+        if ok and latency is not None:
+            CHAT_MODEL_LATENCY.observe(latency, model=model)
+        if not ok:
+            CHAT_MODEL_ERRORS.inc(model=model)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "default_model": self.default_model,
+            "rules": [rule.name for rule in self.rules],
+            "models": {model: stats.stats() for model, stats in self._stats.items()},
+        }
+
+
+@lru_cache()
+def get_model_router() -> ModelRouter:
+    settings = get_settings()
+    return ModelRouter(
+        default_model=settings.chat_model,
+        rules=[RoutingRule.parse(raw) for raw in settings.chat_routing_rules],
+        mode=settings.chat_routing_mode,
+        overrides=settings.chat_model_overrides,
+        max_error_rate=settings.chat_routing_max_error_rate,
+        min_samples=settings.chat_routing_min_samples,
+        probe_interval=settings.chat_routing_probe_interval
+    )
@@ -0,0 +1,161 @@
+import hashlib
+import logging
+import math
+import time
+import unicodedata
+from collections import Counter, OrderedDict
+from functools import lru_cache
+from typing import Dict, NamedTuple, Optional, Set
+
+from app.core.config import get_settings
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+NGRAM_SIZE = 2
+
+
+def normalize_message(text: str) -> str:
+    """NFKC-fold, lowercase and drop whitespace, punctuation and symbols."""
+    folded = unicodedata.normalize("NFKC", text).lower()
+    return "".join(c for c in folded if unicodedata.category(c)[0] not in "PZSC")
+
+
+def _ngrams(text: str) -> Counter:
+    if len(text) < NGRAM_SIZE:
+        return Counter([text])
+    return Counter(text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1))
+
+
+class _Entry(NamedTuple):
+    prompt_hash: str
+    normalized: str
+    ngrams: Counter
+    norm: float
+    response: str
+    expires_at: float
+
+
+class ResponseCache:
+    """Exact and approximate cache for chat replies.
+
+    Messages are normalized (``normalize_message``) and keyed together with a
+    hash of the system prompt. A miss on the exact key falls back to the
+    cached message with the highest character-bigram cosine similarity, if it
+    reaches ``similarity_threshold``. Candidates are found through an inverted
+    n-gram index, so lookups only score entries sharing at least one bigram.
+    Entries expire after ``ttl_seconds``; beyond ``max_entries`` the least
+    recently used entry is evicted. Callers count the lookups they skip,
+    e.g. for a reply that would depend on conversation history, with
+    ``bypass``.
+    """
+
+    def __init__(self, similarity_threshold: float, ttl_seconds: float, max_entries: int):
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._index: Dict[str, Set[str]] = {}
+        self._stats = {
+            "exact_hits": 0, "approximate_hits": 0, "misses": 0, "evictions": 0,
+            "expirations": 0, "history_bypasses": 0
+        }
+
+    @staticmethod
+    def _key(prompt_hash: str, normalized: str) -> str:
+        return f"{prompt_hash}:{normalized}"
+
+    def get(self, message: str, system_prompt: str) -> Optional[str]:
+        prompt_hash = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+        normalized = normalize_message(message)
+        now = time.monotonic()
+        key = self._key(prompt_hash, normalized)
+        if (entry := self._live_entry(key, now)) is not None:
+            self._entries.move_to_end(key)
+            self._stats["exact_hits"] += 1
+            return entry.response
+        if (closest := self._closest(prompt_hash, normalized, now)) is not None:
+            self._entries.move_to_end(closest)
+            self._stats["approximate_hits"] += 1
+            return self._entries[closest].response
+        self._stats["misses"] += 1
+        return None
+
+    def put(self, message: str, system_prompt: str, response: str) -> None:
+        prompt_hash = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+        normalized = normalize_message(message)
+        if not normalized:
+            return
+        key = self._key(prompt_hash, normalized)
+        self._remove(key)
+        ngrams = _ngrams(normalized)
+        self._entries[key] = _Entry(
+            prompt_hash, normalized, ngrams,
+            math.sqrt(sum(count * count for count in ngrams.values())),
+            response, time.monotonic() + self.ttl_seconds
+        )
+        for gram in ngrams:
+            self._index.setdefault(gram, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self._stats["evictions"] += 1
+
+    def bypass(self) -> None:
+        self._stats["history_bypasses"] += 1
+
+    def stats(self) -> Dict[str, float]:
+        hits = self._stats["exact_hits"] + self._stats["approximate_hits"]
+        lookups = hits + self._stats["misses"]
+        return {
+            **self._stats,
+            "entries": len(self._entries),
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+    def _live_entry(self, key: str, now: float) -> Optional[_Entry]:
+        if (entry := self._entries.get(key)) is None:
+            return None
+        if entry.expires_at <= now:
+            self._remove(key)
+            self._stats["expirations"] += 1
+            return None
+        return entry
+
+    def _closest(self, prompt_hash: str, normalized: str, now: float) -> Optional[str]:
+        if self.similarity_threshold > 1 or not normalized:
+            return None
+        ngrams = _ngrams(normalized)
+        norm = math.sqrt(sum(count * count for count in ngrams.values()))
+        candidates = set().union(*(self._index.get(gram, ()) for gram in ngrams))
+        best_key, best_score = None, self.similarity_threshold
+        for key in candidates:
+            entry = self._live_entry(key, now)
+            if entry is None or entry.prompt_hash != prompt_hash:
+                continue
+            dot = sum(count * entry.ngrams.get(gram, 0) for gram, count in ngrams.items())
+            score = dot / (norm * entry.norm)
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
+
+    def _remove(self, key: str) -> None:
+        if (entry := self._entries.pop(key, None)) is None:
+            return
+        for gram in entry.ngrams:
+            if (keys := self._index.get(gram)) is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._index[gram]
+
+
+@lru_cache()
+def get_response_cache() -> Optional[ResponseCache]:
+    settings = get_settings()
+    if not settings.chat_cache_enabled:
+        return None
+    return ResponseCache(
+        similarity_threshold=settings.chat_cache_similarity_threshold,
+        ttl_seconds=settings.chat_cache_ttl_seconds,
+        max_entries=settings.chat_cache_max_entries
+    )
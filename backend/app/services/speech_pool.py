@@ -0,0 +1,170 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Deque, Dict, Generic, Optional, Set, Tuple, TypeVar
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SpeechObjectPool(Generic[T]):
+    """Bounded pool of reusable, pre-warmed SDK objects such as synthesizers.
+
+    At most ``size`` objects are checked out at once. Objects are built by
+    ``factory`` on a worker thread, since construction and connection
+    pre-open block. An object is discarded instead of returned if the block
+    using it raises; a replacement is then built in the background. An idle
+    object is not handed out again if ``is_usable`` rejects it (e.g. its
+    connection was closed) or it sat idle longer than ``max_idle_seconds``.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        factory: Callable[[], T],
+        size: int,
+        max_idle_seconds: float,
+        is_usable: Optional[Callable[[T], bool]] = None
+    ):
+        self.name = name
+        self._factory = factory
+        self.size = size
+        self.max_idle_seconds = max_idle_seconds
+        self._is_usable = is_usable
+        self._idle: Deque[Tuple[T, float]] = deque()
+        self._slots = asyncio.Semaphore(size)
+        self._refills: Set[asyncio.Task] = set()
+        self._stats = {"created": 0, "reused": 0, "discarded": 0}
+
+    async def warm(self, count: Optional[int] = None) -> None:
+        """Build idle objects until ``count`` (default: the pool size) are ready."""
+        target = min(self.size, count if count is not None else self.size)
+        while len(self._idle) < target:
+            self._idle.append((await self._create(), time.monotonic()))
+        logger.info("Warmed %d %s objects", len(self._idle), self.name)
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[T]:
+        async with self._slots:
+            item = self._take_idle()
+            if item is None:
+                item = await self._create()
+            else:
+                self._stats["reused"] += 1
+            try:
+                yield item
+            except BaseException:
+                self._stats["discarded"] += 1
+                self._schedule_refill()
+                raise
+            self._idle.append((item, time.monotonic()))
+
+    def _take_idle(self) -> Optional[T]:
+        now = time.monotonic()
+        while self._idle:
+            item, idle_since = self._idle.pop()
+            fresh = now - idle_since <= self.max_idle_seconds
+            if fresh and (self._is_usable is None or self._is_usable(item)):
+                return item
+            self._stats["discarded"] += 1
+        return None
+
+    async def _create(self) -> T:
+        item = await asyncio.to_thread(self._factory)
+        self._stats["created"] += 1
+        return item
+
+    def _schedule_refill(self) -> None:
+        task = asyncio.create_task(self._refill())
+        self._refills.add(task)
+        task.add_done_callback(self._refills.discard)
+
+    async def _refill(self) -> None:
+        try:
+            self._idle.append((await self._create(), time.monotonic()))
+        except Exception as e:  # pylint: disable=broad-except
+            logger.error("Error replacing %s object: %s", self.name, str(e))
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._stats, "idle": len(self._idle), "size": self.size}
+
+
+class SparePool(Generic[T]):
+    """Keeps ``size`` pre-built single-use objects ready, such as recognizers.
+
+    Recognizers are bound to their input stream and cannot be reused, so
+    instead of returning objects the pool hands out a spare and builds a new
+    one in the background. Spares older than ``max_idle_seconds`` or
+    rejected by ``is_usable`` are dropped.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        factory: Callable[[], T],
+        size: int,
+        max_idle_seconds: float,
+        is_usable: Optional[Callable[[T], bool]] = None
+    ):
+        self.name = name
+        self._factory = factory
+        self.size = size
+        self.max_idle_seconds = max_idle_seconds
+        self._is_usable = is_usable
+        self._spares: Deque[Tuple[T, float]] = deque()
+        self._pending = 0
+        self._refills: Set[asyncio.Task] = set()
+        self._stats = {"created": 0, "spare_hits": 0, "spare_misses": 0, "discarded": 0}
+
+    async def warm(self, count: Optional[int] = None) -> None:
+        target = min(self.size, count if count is not None else self.size)
+        while len(self._spares) < target:
+            self._spares.append((await self._create(), time.monotonic()))
+        logger.info("Warmed %d %s objects", len(self._spares), self.name)
+
+    async def take(self) -> T:
+        now = time.monotonic()
+        item = None
+        while self._spares and item is None:
+            spare, created_at = self._spares.popleft()
+            fresh = now - created_at <= self.max_idle_seconds
+            if fresh and (self._is_usable is None or self._is_usable(spare)):
+                item = spare
+            else:
+                self._stats["discarded"] += 1
+        if item is None:
+            self._stats["spare_misses"] += 1
+            item = await self._create()
+        else:
+            self._stats["spare_hits"] += 1
+        self._schedule_refill()
+        return item
+
+    async def _create(self) -> T:
+        item = await asyncio.to_thread(self._factory)
+        self._stats["created"] += 1
+        return item
+
+    def _schedule_refill(self) -> None:
+        if len(self._spares) + self._pending >= self.size:
+            return
+        self._pending += 1
+        task = asyncio.create_task(self._refill())
+        self._refills.add(task)
+        task.add_done_callback(self._refills.discard)
+
+    async def _refill(self) -> None:
+        try:
+            self._spares.append((await self._create(), time.monotonic()))
+        except Exception as e:  # pylint: disable=broad-except
+            logger.error("Error building spare %s object: %s", self.name, str(e))
+        finally:
+            self._pending -= 1
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._stats, "spares": len(self._spares), "size": self.size}
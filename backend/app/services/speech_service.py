@@ -1,44 +1,467 @@
 import asyncio
+import importlib.util
+import sys
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from types import ModuleType
+from typing import (
+    TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, Dict, List, NamedTuple, Optional,
+    TypeVar
+)
 
-import azure.cognitiveservices.speech as speechsdk
-
+from app.core.admission import get_admission
+from app.core.audio_cache import AudioCache, get_audio_cache
+from app.core.audio_session import DEFAULT_FORMAT, AudioFormat
 from app.core.config import get_settings
+from app.core.metrics import STREAM_FIRST_CHUNK_SECONDS
+from app.core.resilience import get_upstream
+from app.core.singleflight import get_single_flight
+from app.core.tracing import get_tracer
+from app.core.vad import VoiceActivityDetector, create_vad
+from app.services.speech_pool import SparePool, SpeechObjectPool
+
+T = TypeVar("T")
+
+
+def _lazy_module(name: str) -> ModuleType:
+    """Import ``name`` on first attribute access instead of now."""
+    if (module := sys.modules.get(name)) is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    assert spec is not None and spec.loader is not None, name
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+# The Speech SDK is only loaded when a SpeechService is built, so workers that
+# never touch speech do not pay for it at startup.
+if TYPE_CHECKING:
+    import azure.cognitiveservices.speech as speechsdk
+else:
+    speechsdk = _lazy_module("azure.cognitiveservices.speech")
+
+# Streamed synthesis uses headerless raw audio, or Ogg pages for Opus, so the
+# client can play chunks as they arrive. Keyed by ``AudioFormat.name``, valued
+# by ``speechsdk.SpeechSynthesisOutputFormat`` member names.
+STREAM_OUTPUT_FORMATS = {
+    "raw-8khz-16bit-mono-pcm": "Raw8Khz16BitMonoPcm",
+    "raw-16khz-16bit-mono-pcm": "Raw16Khz16BitMonoPcm",
+    "raw-24khz-16bit-mono-pcm": "Raw24Khz16BitMonoPcm",
+    "raw-48khz-16bit-mono-pcm": "Raw48Khz16BitMonoPcm",
+    "raw-8khz-8bit-mono-mulaw": "Raw8Khz8BitMonoMULaw",
+    "ogg-16khz-16bit-mono-opus": "Ogg16Khz16BitMonoOpus",
+    "ogg-24khz-16bit-mono-opus": "Ogg24Khz16BitMonoOpus",
+    "ogg-48khz-16bit-mono-opus": "Ogg48Khz16BitMonoOpus",
+}
+
+
+class ServiceConnection:
+    """A pre-opened SDK connection, and whether the service has closed it since.
+
+    ``disconnected`` fires on an SDK thread; the flag is only read on the loop.
+    """
+
+    def __init__(self, connection: "speechsdk.Connection"):
+        self.connection = connection
+        self.closed = False
+        connection.disconnected.connect(self._on_disconnected)
+
+    def _on_disconnected(self, _evt: Any) -> None:
+        self.closed = True
+
+    def open(self, for_continuous_recognition: bool) -> "ServiceConnection":
+        self.connection.open(for_continuous_recognition)
+        return self
+
+
+class RecognizerHandle(NamedTuple):
+    stream: "speechsdk.audio.PushAudioInputStream"
+    recognizer: "speechsdk.SpeechRecognizer"
+    connection: Optional[ServiceConnection]
+
 
+class RecognitionSession:
+    """Continuous recognition over one long-lived push stream.
 
-settings = get_settings()
+    Audio frames written to the session feed a single recognizer, and the
+    SDK's ``recognizing``/``recognized`` callbacks, which fire on SDK threads,
+    are handed back to the event loop as events.
+
+    With a ``vad``, only speech is sent upstream. When it detects the end of
+    an utterance, ``flush_silence_ms`` of silence is pushed at once so the
+    service finalizes the result without waiting for real-time silence.
+
+    ``on_utterance_end`` is called on the event loop whenever an utterance
+    is over: a final result, a result with no speech in it, or the end of
+    speech detected by the ``vad``. With a ``vad`` it is also called for
+    every write made between utterances, as none of that audio is sent.
+    """
+
+    def __init__(
+        self,
+        handle: RecognizerHandle,
+        wait_for: Callable[["speechsdk.ResultFuture"], Awaitable[Any]],
+        vad: Optional[VoiceActivityDetector] = None,
+        flush_silence_ms: int = 0,
+        on_utterance_end: Optional[Callable[[], None]] = None
+    ):
+        self._loop = asyncio.get_running_loop()
+        self._wait_for = wait_for
+        self._on_utterance_end = on_utterance_end
+        self._vad = vad
+        self._flush_silence = vad.silence(flush_silence_ms) if vad is not None else b""
+        self._events: "asyncio.Queue[Optional[Dict[str, Any]]]" = asyncio.Queue()
+        self._stream = handle.stream
+        self._recognizer = handle.recognizer
+        self._recognizer.recognizing.connect(self._on_recognizing)
+        self._recognizer.recognized.connect(self._on_recognized)
+        self._recognizer.canceled.connect(self._on_canceled)
+        self._recognizer.session_stopped.connect(self._on_session_stopped)
+        self._stopped = False
+
+    def _emit(self, event: Optional[Dict[str, Any]]) -> None:
+        self._loop.call_soon_threadsafe(self._events.put_nowait, event)
+
+    def _on_recognizing(self, evt: "speechsdk.SpeechRecognitionEventArgs") -> None:
+        self._emit({"type": "recognizing", "text": evt.result.text, "is_final": False})
+
+    def _on_recognized(self, evt: "speechsdk.SpeechRecognitionEventArgs") -> None:
+        if evt.result.reason == speechsdk.ResultReason.RecognizedSpeech:
+            self._emit({"type": "recognized", "text": evt.result.text, "is_final": True})
+        if self._on_utterance_end is not None:
+            self._loop.call_soon_threadsafe(self._on_utterance_end)
+
+    def _on_canceled(self, evt: "speechsdk.SpeechRecognitionCanceledEventArgs") -> None:
+        if evt.reason == speechsdk.CancellationReason.Error:
+            self._emit({"type": "error", "error": "Speech recognition failed"})
+        self._emit(None)
+
+    def _on_session_stopped(self, evt: "speechsdk.SessionEventArgs") -> None:
+        self._emit(None)
+
+    async def start(self) -> None:
+        await self._wait_for(self._recognizer.start_continuous_recognition_async())
+
+    def write(self, audio_data: bytes) -> None:
+        if self._vad is None:
+            self._stream.write(audio_data)
+            return
+        result = self._vad.process(audio_data)
+        if result.audio:
+            self._stream.write(result.audio)
+        if result.speech_ended and self._flush_silence:
+            self._stream.write(self._flush_silence)
+        if not self._vad.in_speech and self._on_utterance_end is not None:
+            self._on_utterance_end()
+
+    async def stop(self) -> None:
+        if self._stopped:
+            return
+        self._stopped = True
+        self._stream.close()
+        await self._wait_for(self._recognizer.stop_continuous_recognition_async())
+
+    async def events(self) -> AsyncIterator[Dict[str, Any]]:
+        """Yield recognition events until the session stops or is canceled."""
+        while (event := await self._events.get()) is not None:
+            yield event
 
 
 class SpeechService:
 
-    def __init__(self):
-        self.speech_config = speechsdk.SpeechConfig(
-            subscription=settings.azure_speech_key,
-            region="japaneast"
+    def __init__(self, max_concurrency: Optional[int] = None):
+        self.settings = settings = get_settings()
+        self.speech_config = self._create_speech_config()
+        # The SDK only offers blocking ResultFuture.get(), so waits are parked on
+        # a bounded thread pool and the semaphore caps concurrent Azure calls.
+        self.max_concurrency = max_concurrency or settings.azure_max_concurrency
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency, thread_name_prefix="azure-speech"
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.cache = get_audio_cache()
+        self.single_flight = get_single_flight("azure")
+        self.resilience = get_upstream("azure")
+        self.admission = get_admission("azure")
+        # Constructing SDK objects and opening their service connection is
+        # slow, so synthesizers are reused and recognizers are pre-built. An
+        # object whose pre-opened connection the service closed is not reused.
+        self.preconnect = settings.azure_pool_preconnect
+        self._synthesizer_connections: "weakref.WeakKeyDictionary[Any, ServiceConnection]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self.synthesizer_pool = SpeechObjectPool(
+            "synthesizer",
+            lambda: self._create_synthesizer(self.speech_config),
+            self.max_concurrency,
+            settings.azure_pool_max_idle_seconds,
+            self._synthesizer_connected
+        )
+        # One pool per negotiated output format, created on first use.
+        self.stream_synthesizer_pools: Dict[str, SpeechObjectPool] = {}
+        self.stream_synthesizer_pool = self._stream_synthesizer_pool(DEFAULT_FORMAT)
+        self.recognizer_pool = SparePool(
+            "recognizer",
+            self._create_recognizer,
+            settings.azure_pool_size,
+            settings.azure_pool_max_idle_seconds,
+            lambda handle: handle.connection is None or not handle.connection.closed
+        )
+
+    def _create_speech_config(self) -> "speechsdk.SpeechConfig":
+        speech_config = speechsdk.SpeechConfig(
+            subscription=self.settings.azure_speech_key,
+            region=self.settings.azure_speech_region
         )
-        self.speech_config.speech_recognition_language = "ja-JP"
-        self.speech_config.speech_synthesis_language = "ja-JP"
+        speech_config.speech_recognition_language = "ja-JP"
+        speech_config.speech_synthesis_language = "ja-JP"
+        return speech_config
 
-    async def text_to_speech(self, text: str) -> bytes:
-        speech_synthesizer = speechsdk.SpeechSynthesizer(
+    def _create_synthesizer(
+        self, speech_config: "speechsdk.SpeechConfig"
+    ) -> "speechsdk.SpeechSynthesizer":
+        synthesizer = speechsdk.SpeechSynthesizer(speech_config=speech_config, audio_config=None)
+        if self.preconnect:
+            self._synthesizer_connections[synthesizer] = ServiceConnection(
+                speechsdk.Connection.from_speech_synthesizer(synthesizer)
+            ).open(True)
+        return synthesizer
+
+    def _synthesizer_connected(self, synthesizer: "speechsdk.SpeechSynthesizer") -> bool:
+        connection = self._synthesizer_connections.get(synthesizer)
+        return connection is None or not connection.closed
+
+    def _stream_synthesizer_pool(self, output_format: AudioFormat) -> SpeechObjectPool:
+        if (pool := self.stream_synthesizer_pools.get(output_format.name)) is not None:
+            return pool
+        if output_format.name not in STREAM_OUTPUT_FORMATS:
+            raise ValueError(f"Unsupported output format: {output_format.name}")
+        speech_config = self._create_speech_config()
+        sdk_format = STREAM_OUTPUT_FORMATS[output_format.name]
+        speech_config.set_speech_synthesis_output_format(
+            getattr(speechsdk.SpeechSynthesisOutputFormat, sdk_format)
+        )
+        pool = self.stream_synthesizer_pools[output_format.name] = SpeechObjectPool(
+            f"stream synthesizer ({output_format.name})",
+            lambda: self._create_synthesizer(speech_config),
+            self.max_concurrency,
+            self.settings.azure_pool_max_idle_seconds,
+            self._synthesizer_connected
+        )
+        return pool
+
+    @staticmethod
+    def _input_stream_format(input_format: AudioFormat) -> "speechsdk.audio.AudioStreamFormat":
+        if input_format.codec == "opus":
+            return speechsdk.audio.AudioStreamFormat(
+                compressed_stream_format=speechsdk.AudioStreamContainerFormat.OGG_OPUS
+            )
+        if input_format.codec == "mulaw":
+            return speechsdk.audio.AudioStreamFormat(
+                samples_per_second=input_format.sample_rate, bits_per_sample=8,
+                channels=input_format.channels,
+                wave_stream_format=speechsdk.AudioStreamWaveFormat.MULAW
+            )
+        return speechsdk.audio.AudioStreamFormat(
+            samples_per_second=input_format.sample_rate, bits_per_sample=16,
+            channels=input_format.channels
+        )
+
+    def _create_recognizer(self, input_format: AudioFormat = DEFAULT_FORMAT) -> RecognizerHandle:
+        if input_format.name == DEFAULT_FORMAT.name:
+            stream = speechsdk.audio.PushAudioInputStream()
+        else:
+            stream = speechsdk.audio.PushAudioInputStream(
+                stream_format=self._input_stream_format(input_format)
+            )
+        recognizer = speechsdk.SpeechRecognizer(
             speech_config=self.speech_config,
-            audio_config=None
+            audio_config=speechsdk.audio.AudioConfig(stream=stream)
+        )
+        connection = None
+        if self.preconnect:
+            connection = ServiceConnection(
+                speechsdk.Connection.from_recognizer(recognizer)
+            ).open(True)
+        return RecognizerHandle(stream, recognizer, connection)
+
+    async def warm_up(self) -> None:
+        """Pre-build pooled synthesizers and spare recognizers."""
+        await asyncio.gather(
+            self.synthesizer_pool.warm(self.settings.azure_pool_size),
+            self.stream_synthesizer_pool.warm(self.settings.azure_pool_size),
+            self.recognizer_pool.warm()
         )
-        result = speech_synthesizer.speak_text_async(text).get()
-        if result.reason != speechsdk.ResultReason.SynthesizingAudioCompleted:
-            raise ValueError(f"Speech synthesis failed: {result.reason}")
+
+    def pool_stats(self) -> Dict[str, Dict[str, int]]:
+        stats = {
+            "synthesizer": self.synthesizer_pool.stats(),
+            "stream_synthesizer": self.stream_synthesizer_pool.stats(),
+            "recognizer": self.recognizer_pool.stats()
+        }
+        for name, pool in self.stream_synthesizer_pools.items():
+            if pool is not self.stream_synthesizer_pool:
+                stats[f"stream_synthesizer_{name}"] = pool.stats()
+        return stats
+
+    async def _wait_for(self, future: "speechsdk.ResultFuture") -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, future.get)
+
+    async def text_to_speech(self, text: str) -> bytes:
+        cache_key = AudioCache.make_key("azure", text, "default", "ja-JP", "default")
+        if (cached := await self.cache.get(cache_key)) is not None:
+            return cached
+        with get_tracer().span("tts.azure", chars=len(text)):
+            return await self.single_flight.do(
+                cache_key,
+                lambda: self.resilience.call(lambda: self._synthesize(cache_key, text))
+            )
+
+    @staticmethod
+    async def _uncancellable(work: Awaitable[T]) -> T:
+        """Await ``work``, letting it run to the end if the caller is cancelled.
+
+        A blocking SDK call cannot be cancelled: after a lost hedge or a
+        passed deadline it keeps its thread until Azure answers. Finishing the
+        work in the background keeps the admission slot, the semaphore and
+        the pooled object held until then, so they are not handed to the next
+        call while still busy.
+        """
+        task = asyncio.ensure_future(work)
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return await asyncio.shield(task)
+
+    async def _synthesize(self, cache_key: str, text: str) -> bytes:
+        return await self._uncancellable(self._synthesize_pooled(cache_key, text))
+
+    async def _synthesize_pooled(self, cache_key: str, text: str) -> bytes:
+        pool = self.synthesizer_pool
+        async with self.admission.slot(), self._semaphore, pool.acquire() as speech_synthesizer:
+            result = await self._wait_for(speech_synthesizer.speak_text_async(text))
+            # Raising inside the block makes the pool replace the synthesizer.
+            if result.reason != speechsdk.ResultReason.SynthesizingAudioCompleted:
+                raise ValueError(f"Speech synthesis failed: {result.reason}")
+        await self.cache.put(cache_key, result.audio_data)
         return result.audio_data
 
-    async def recognize_speech(self, audio_data: bytes) -> speechsdk.SpeechRecognitionResult:
-        # Create an audio stream from the received bytes
-        stream = speechsdk.audio.PushAudioInputStream()
-        stream.write(audio_data)
-        # Configure audio input
-        audio_config = speechsdk.audio.AudioConfig(stream=stream)
-        # Create speech recognizer
-        speech_recognizer = speechsdk.SpeechRecognizer(
-            speech_config=self.speech_config, audio_config=audio_config
-        )
-        # Use async recognition
-        future = speech_recognizer.recognize_once_async()
-        result = await asyncio.wrap_future(future)
+    async def stream_text_to_speech(
+        self, text: str, output_format: AudioFormat = DEFAULT_FORMAT
+    ) -> AsyncIterator[bytes]:
+        """Yield synthesized audio chunks as Azure produces them.
+
+        Chunks are in ``output_format``: raw PCM or μ-law samples, or Ogg
+        pages for Opus. A cached utterance is yielded as a single chunk.
+
+        Raises:
+            ValueError: If synthesis does not complete successfully or the
+                format is not one of ``STREAM_OUTPUT_FORMATS``
+        """
+        cache_key = AudioCache.make_key("azure", text, "default", "ja-JP", output_format.name)
+        if (cached := await self.cache.get(cache_key)) is not None:
+            yield cached
+            return
+        pool = self._stream_synthesizer_pool(output_format)
+        with get_tracer().span(
+            "tts.azure_stream", activate=False, chars=len(text), format=output_format.name
+        ) as span:
+            audio: List[bytes] = []
+            started = time.perf_counter()
+            loop = asyncio.get_running_loop()
+            chunks: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue()
+            async with self.admission.slot(), self._semaphore, pool.acquire() as speech_synthesizer:
+                speech_synthesizer.synthesizing.connect(
+                    lambda evt: loop.call_soon_threadsafe(chunks.put_nowait, evt.result.audio_data)
+                )
+                completion: "Optional[asyncio.Future[Any]]" = None
+                try:
+                    completion = asyncio.ensure_future(
+                        self._wait_for(speech_synthesizer.speak_text_async(text))
+                    )
+                    completion.add_done_callback(lambda _: chunks.put_nowait(None))
+                    while (chunk := await chunks.get()) is not None:
+                        if chunk:
+                            if not audio:
+                                first_chunk = time.perf_counter() - started
+                                STREAM_FIRST_CHUNK_SECONDS.observe(
+                                    first_chunk, stream="azure_audio"
+                                )
+                                span.attributes["first_chunk_ms"] = round(first_chunk * 1000, 3)
+                            audio.append(chunk)
+                            yield chunk
+                    result = await completion
+                finally:
+                    if completion is not None and not completion.done():
+                        # The consumer went away mid-stream; keep the synthesizer
+                        # and the slot until Azure has finished with them.
+                        await asyncio.wait([completion])
+                    speech_synthesizer.synthesizing.disconnect_all()
+                if result.reason != speechsdk.ResultReason.SynthesizingAudioCompleted:
+                    raise ValueError(f"Speech synthesis failed: {result.reason}")
+            span.attributes["chunks"] = len(audio)
+        await self.cache.put(cache_key, b"".join(audio))
+
+    async def recognize_speech(self, audio_data: bytes) -> "speechsdk.SpeechRecognitionResult":
+        with get_tracer().span("stt.azure", bytes=len(audio_data)):
+            return await self._recognize_once(audio_data)
+
+    async def _recognize_once(self, audio_data: bytes) -> "speechsdk.SpeechRecognitionResult":
+        # Only the speech is sent; silence either side costs upload and latency.
+        if (vad := create_vad(DEFAULT_FORMAT)) is not None:
+            audio_data = vad.trim(audio_data)
+        return await self._uncancellable(self._recognize_pooled(audio_data))
+
+    async def _recognize_pooled(self, audio_data: bytes) -> "speechsdk.SpeechRecognitionResult":
+        async with self.admission.slot(), self._semaphore:
+            # Take a pre-built recognizer and feed the received bytes to its stream
+            handle = await self.recognizer_pool.take()
+            handle.stream.write(audio_data)
+            handle.stream.close()
+            # Use async recognition
+            future = handle.recognizer.recognize_once_async()
+            result = await self._wait_for(future)
         return result
+
+    async def start_recognition_session(
+        self,
+        input_format: AudioFormat = DEFAULT_FORMAT,
+        on_utterance_end: Optional[Callable[[], None]] = None
+    ) -> RecognitionSession:
+        """Open a continuous recognition session for one client connection.
+
+        Spare recognizers are pre-built for the default format only; other
+        input formats get a recognizer built for the session. Only setting the
+        session up takes an admission slot; a long session does not hold one.
+        """
+        async with self.admission.slot():
+            with get_tracer().span("recognizer.setup", format=input_format.name):
+                if input_format.name == DEFAULT_FORMAT.name:
+                    handle = await self.recognizer_pool.take()
+                else:
+                    loop = asyncio.get_running_loop()
+                    handle = await loop.run_in_executor(
+                        self._executor, self._create_recognizer, input_format
+                    )
+                session = RecognitionSession(
+                    handle, self._wait_for, create_vad(input_format),
+                    self.settings.vad_flush_silence_ms, on_utterance_end
+                )
+                await session.start()
+        return session
+
+
+@lru_cache()
+def get_speech_service() -> SpeechService:
+    return SpeechService()
+
+
+def speech_pool_stats() -> Dict[str, Dict[str, int]]:
+    """Pool statistics, without building the service just to report them."""
+    if get_speech_service.cache_info().currsize == 0:
+        return {}
+    return get_speech_service().pool_stats()
@@ -1,7 +1,19 @@
+import asyncio
 import logging
-from typing import Optional
-import aiohttp
+import time
+from functools import lru_cache
+from typing import AsyncGenerator, List, Optional
+from app.core.admission import AdmissionRejectedError, get_admission
+from app.core.audio_cache import AudioCache, get_audio_cache
 from app.core.config import get_settings
+from app.core.http_client import upstream_clients
+from app.core.metrics import STREAM_FIRST_CHUNK_SECONDS
+from app.core.resilience import (
+    UpstreamError, UpstreamTimeoutError, UpstreamUnavailableError, get_upstream, is_retryable
+)
+from app.core.singleflight import get_single_flight
+from app.core.text import split_sentences
+from app.core.tracing import get_tracer
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -12,11 +24,15 @@ class TTSService:
 
     def __init__(self):
         self.settings = get_settings()
-        self.api_key = self.settings.ZONOS_API_KEY
-        self.base_url = "https://api.zonos.ai/v1"
+        self.api_key = self.settings.zonos_api_key
+        self.base_url = self.settings.zonos_base_url
+        self.cache = get_audio_cache()
+        self.single_flight = get_single_flight("zonos")
+        self.resilience = get_upstream("zonos")
+        self.admission = get_admission("zonos")
 
     async def synthesize_speech(
-        self, text: str, voice_id: str = "default", language: str = "ja-JP"
+        self, text: str, voice_id: str = "default", language: str = "ja-JP", fallback: bool = True
     ) -> Optional[bytes]:
         """Convert text to speech using Zonos API.
 
@@ -24,6 +40,8 @@ class TTSService:
             text (str): The text to convert to speech
             voice_id (str): The voice ID to use
             language (str): The language code
+            fallback (bool): Whether Azure may stand in while Zonos is down;
+                its audio is WAV rather than MP3
 
         Returns:
             Optional[bytes]: The audio data or None if an error occurs
@@ -31,26 +49,121 @@ class TTSService:
         Raises:
             Exception: If there's an error in speech synthesis
         """
+        cache_key = AudioCache.make_key("zonos", text, voice_id, language, "default")
+        if (cached := await self.cache.get(cache_key)) is not None:
+            logger.info("Serving cached speech for text: %.50s...", text)
+            return cached
+        # Identical requests already in flight share one upstream call; those
+        # that must not fall back only share with each other.
+        flight_key = cache_key if fallback else f"{cache_key}:no-fallback"
+        with get_tracer().span("tts.zonos", chars=len(text)):
+            return await self.single_flight.do(
+                flight_key,
+                lambda: self._synthesize(cache_key, text, voice_id, language, fallback)
+            )
+
+    async def _synthesize(
+        self, cache_key: str, text: str, voice_id: str, language: str, fallback: bool
+    ) -> bytes:
         try:
             logger.info("Synthesizing speech for text: %.50s...", text)
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.base_url}/synthesize",
-                    headers=headers,
-                    json={"text": text, "voice_id": voice_id, "language": language}
-                ) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        logger.error("TTS API error: %s", error_text)
-                        raise ValueError(f"TTS API error: {error_text}")
-                    audio_data = await response.read()
-                    logger.info("Successfully synthesized speech")
-                    return audio_data
+            async with self.admission.slot():
+                audio_data = await self.resilience.call(
+                    lambda: self._request_synthesis(text, voice_id, language)
+                )
+            logger.info("Successfully synthesized speech")
+        except AdmissionRejectedError:
+            # Our own limit, not an unhealthy Zonos: no fallback.
+            raise
         except Exception as e:
+            # Timeouts, an open circuit and 5xx/429 mean Zonos is unhealthy.
+            if fallback and self.settings.tts_fallback_to_azure and is_retryable(e):
+                return await self._fallback_synthesis(text, e)
+            if isinstance(e, (UpstreamUnavailableError, UpstreamTimeoutError)):
+                raise
             error_msg = f"Failed to synthesize speech: {str(e)}"
             logger.error(error_msg)
             raise ValueError(error_msg) from e
+        await self.cache.put(cache_key, audio_data)
+        return audio_data
+
+    async def _request_synthesis(self, text: str, voice_id: str, language: str) -> bytes:
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        async with upstream_clients.zonos_session.post(
+            f"{self.base_url}/synthesize",
+            headers=headers,
+            json={"text": text, "voice_id": voice_id, "language": language}
+        ) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                logger.error("TTS API error: %s", error_text)
+                raise UpstreamError(response.status, f"TTS API error: {error_text}")
+            return await response.read()
+
+    async def _fallback_synthesis(self, text: str, error: Exception) -> bytes:
+        """Synthesize with Azure when Zonos is down.
+
+        The audio uses Azure's default voice and comes back as WAV rather
+        than Zonos' MP3.
+        """
+        # Imported here: the speech service pulls in the Azure SDK.
+        from app.services.speech_service import get_speech_service
+
+        logger.warning("Zonos unavailable (%s), falling back to Azure TTS", str(error))
+        try:
+            return await get_speech_service().text_to_speech(text)
+        except Exception as e:
+            error_msg = f"Failed to synthesize speech: {str(error)}; fallback failed: {str(e)}"
+            logger.error(error_msg)
+            raise ValueError(error_msg) from e
+
+    async def synthesize_chunked(
+        self, text: str, voice_id: str = "default", language: str = "ja-JP"
+    ) -> AsyncGenerator[bytes, None]:
+        """Synthesize text sentence by sentence and yield the audio in order.
+
+        Sentences are split at 。！？ and .!? and synthesized concurrently, at
+        most ``tts_chunk_concurrency`` at a time. Each segment is yielded as
+        soon as it and every segment before it are ready, so the first
+        sentence is available without waiting for the rest. Segments do not
+        fall back to Azure, whose WAV audio cannot be joined to MP3.
+
+        Raises:
+            ValueError: If any segment fails; remaining segments are cancelled
+        """
+        semaphore = asyncio.Semaphore(self.settings.tts_chunk_concurrency)
+
+        async def synthesize_segment(sentence: str) -> bytes:
+            async with semaphore:
+                audio_data = await self.synthesize_speech(
+                    sentence, voice_id, language, fallback=False
+                )
+            if not audio_data:
+                raise ValueError(f"Empty audio for segment: {sentence[:50]}")
+            return audio_data
+
+        started = time.perf_counter()
+        sentences = split_sentences(text)
+        logger.info("Synthesizing %d segments for text: %.50s...", len(sentences), text)
+        tasks: List[asyncio.Task] = [
+            asyncio.create_task(synthesize_segment(sentence)) for sentence in sentences
+        ]
+        try:
+            for index, task in enumerate(tasks):
+                segment = await task
+                if index == 0:
+                    STREAM_FIRST_CHUNK_SECONDS.observe(
+                        time.perf_counter() - started, stream="zonos_segments"
+                    )
+                yield segment
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+@lru_cache()
+def get_tts_service() -> TTSService:
+    return TTSService()
@@ -0,0 +1,303 @@
+"""Local stand-ins for the Zonos, OpenAI and Azure Speech upstreams.
+
+Zonos and OpenAI are served over HTTP by ``python -m benchmarks.fakes``.
+Azure Speech is reached through its SDK's own protocol, so it is faked in
+the app process instead: ``FakeSpeechSDK`` replaces the SDK objects that
+``SpeechService`` builds, keeping their blocking ``ResultFuture.get()`` and
+thread-side callbacks so the real executor, pools and sessions are exercised.
+"""
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+import uuid
+from typing import Any, Callable, List, NamedTuple, Optional
+
+import azure.cognitiveservices.speech as speechsdk
+from aiohttp import web
+
+REPLY = "こんにちは。今日はとてもいい天気ですね！何かお手伝いできることはありますか？"
+# 16 kHz, 16-bit mono PCM: 32 bytes per millisecond.
+PCM_BYTES_PER_SECOND = 32000
+
+
+class LatencyProfile(NamedTuple):
+    """Delay and failure behaviour of one fake upstream."""
+
+    latency: float
+    jitter: float = 0.0
+    error_rate: float = 0.0
+
+    def delay(self) -> float:
+        return max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+
+    def fails(self) -> bool:
+        return random.random() < self.error_rate
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyProfile":
+        """Parse ``latency[,jitter[,error_rate]]`` in seconds, e.g. ``0.3,0.1,0.01``."""
+        return cls(*(float(part) for part in spec.split(",")))
+
+
+# --- Zonos and OpenAI over HTTP -------------------------------------------
+
+
+def _completion_chunk(completion_id: str, model: str, content: Optional[str]) -> str:
+    choice = {
+        "index": 0,
+        "delta": {"content": content} if content is not None else {},
+        "finish_reason": None if content is not None else "stop",
+    }
+    chunk = {
+        "id": completion_id, "object": "chat.completion.chunk",
+        "created": int(time.time()), "model": model, "choices": [choice],
+    }
+    return f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+
+
+def create_fake_upstream_app(
+    zonos: LatencyProfile, openai: LatencyProfile, token_interval: float
+) -> web.Application:
+    """Serve Zonos under ``/zonos/v1`` and OpenAI chat completions under ``/openai/v1``."""
+
+    async def synthesize(request: web.Request) -> web.Response:
+        payload = await request.json()
+        await asyncio.sleep(zonos.delay())
+        if zonos.fails():
+            return web.Response(status=503, text="fake zonos unavailable")
+        # Roughly 0.1 s of 32 kbps MP3 per character.
+        return web.Response(
+            body=b"\xff\xfb" * 200 * max(1, len(payload.get("text", ""))),
+            content_type="audio/mpeg"
+        )
+
+    async def chat_completions(request: web.Request) -> web.StreamResponse:
+        payload = await request.json()
+        model = payload.get("model", "gpt-4")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        await asyncio.sleep(openai.delay())
+        if openai.fails():
+            return web.json_response(
+                {"error": {"message": "fake openai error", "type": "server_error"}}, status=500
+            )
+        if not payload.get("stream"):
+            return web.json_response({
+                "id": completion_id, "object": "chat.completion",
+                "created": int(time.time()), "model": model,
+                "choices": [{
+                    "index": 0, "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": REPLY},
+                }],
+                "usage": {"prompt_tokens": 10, "completion_tokens": 30, "total_tokens": 40},
+            })
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for index in range(0, len(REPLY), 2):
+            await response.write(
+                _completion_chunk(completion_id, model, REPLY[index:index + 2]).encode()
+            )
+            await asyncio.sleep(token_interval)
+        await response.write(_completion_chunk(completion_id, model, None).encode())
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    app = web.Application()
+    app.router.add_post("/zonos/v1/synthesize", synthesize)
+    app.router.add_post("/openai/v1/chat/completions", chat_completions)
+    return app
+
+
+# --- Azure Speech SDK -------------------------------------------------------
+
+
+class _Signal:
+    def __init__(self) -> None:
+        self._callbacks: List[Callable[[Any], None]] = []
+
+    def connect(self, callback: Callable[[Any], None]) -> None:
+        self._callbacks.append(callback)
+
+    def disconnect_all(self) -> None:
+        self._callbacks = []
+
+    def fire(self, event: Any) -> None:
+        for callback in list(self._callbacks):
+            callback(event)
+
+
+class _Future:
+    """Like ``ResultFuture``: ``get()`` blocks the calling thread."""
+
+    def __init__(self, work: Callable[[], Any]):
+        self._work = work
+
+    def get(self) -> Any:
+        return self._work()
+
+
+class _Result(NamedTuple):
+    reason: Any
+    audio_data: bytes = b""
+    text: str = ""
+
+
+class _Event(NamedTuple):
+    result: Any
+    reason: Any = None
+
+
+class FakeSpeechSynthesizer:
+    profile = LatencyProfile(0.2)
+
+    def __init__(self, speech_config: Any = None, audio_config: Any = None):
+        self.synthesizing = _Signal()
+
+    def speak_text_async(self, text: str) -> _Future:
+        def synthesize() -> _Result:
+            time.sleep(self.profile.delay())
+            if self.profile.fails():
+                return _Result(speechsdk.ResultReason.Canceled)
+            audio = bytes(int(PCM_BYTES_PER_SECOND * 0.1) * max(1, len(text)))
+            # Stream the audio in 100 ms chunks, a little faster than real time.
+            step = PCM_BYTES_PER_SECOND // 10
+            for offset in range(0, len(audio), step):
+                self.synthesizing.fire(_Event(_Result(None, audio[offset:offset + step])))
+                time.sleep(0.005)
+            return _Result(speechsdk.ResultReason.SynthesizingAudioCompleted, audio)
+
+        return _Future(synthesize)
+
+
+class FakePushAudioInputStream:
+    def __init__(self, stream_format: Any = None) -> None:
+        self.recognizer: Optional["FakeSpeechRecognizer"] = None
+        self.closed = False
+
+    def write(self, audio_data: bytes) -> None:
+        if self.recognizer is not None:
+            self.recognizer.on_audio(len(audio_data))
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class FakeAudioConfig:
+    def __init__(self, stream: FakePushAudioInputStream):
+        self.stream = stream
+
+
+class FakeSpeechRecognizer:
+    """Recognizes one utterance per ``utterance_seconds`` of received audio.
+
+    A partial result follows every 300 ms of audio; the final result for an
+    utterance arrives ``profile.delay()`` seconds after its last frame, on a
+    timer thread as the SDK would deliver it.
+    """
+
+    profile = LatencyProfile(0.3)
+    utterance_seconds = 1.0
+
+    def __init__(self, speech_config: Any = None, audio_config: Optional[FakeAudioConfig] = None):
+        self.recognizing = _Signal()
+        self.recognized = _Signal()
+        self.canceled = _Signal()
+        self.session_stopped = _Signal()
+        self._received = 0
+        self._partial_bytes = int(PCM_BYTES_PER_SECOND * 0.3)
+        self._utterance_bytes = int(PCM_BYTES_PER_SECOND * self.utterance_seconds)
+        self._lock = threading.Lock()
+        if audio_config is not None:
+            audio_config.stream.recognizer = self
+
+    def on_audio(self, size: int) -> None:
+        with self._lock:
+            before, self._received = self._received, self._received + size
+        if before // self._partial_bytes != self._received // self._partial_bytes:
+            self.recognizing.fire(_Event(_Result(None, text="こんにち")))
+        if before // self._utterance_bytes != self._received // self._utterance_bytes:
+            threading.Timer(self.profile.delay(), self._finish_utterance).start()
+
+    def _finish_utterance(self) -> None:
+        if self.profile.fails():
+            self.canceled.fire(_Event(None, speechsdk.CancellationReason.Error))
+            return
+        self.recognized.fire(
+            _Event(_Result(speechsdk.ResultReason.RecognizedSpeech, text="こんにちは"))
+        )
+
+    def start_continuous_recognition_async(self) -> _Future:
+        return _Future(lambda: None)
+
+    def stop_continuous_recognition_async(self) -> _Future:
+        return _Future(lambda: self.session_stopped.fire(_Event(None)))
+
+    def recognize_once_async(self) -> _Future:
+        def recognize() -> _Result:
+            time.sleep(self.profile.delay())
+            return _Result(speechsdk.ResultReason.RecognizedSpeech, text="こんにちは")
+
+        return _Future(recognize)
+
+
+class FakeConnection:
+    def __init__(self) -> None:
+        self.connected = _Signal()
+        self.disconnected = _Signal()
+
+    def open(self, for_continuous_recognition: bool) -> None:
+        self.connected.fire(_Event(None))
+
+    @classmethod
+    def from_speech_synthesizer(cls, synthesizer: Any) -> "FakeConnection":
+        return cls()
+
+    @classmethod
+    def from_recognizer(cls, recognizer: Any) -> "FakeConnection":
+        return cls()
+
+
+class _FakeAudioModule:
+    PushAudioInputStream = FakePushAudioInputStream
+    AudioConfig = FakeAudioConfig
+    AudioStreamFormat = speechsdk.audio.AudioStreamFormat
+
+
+class FakeSpeechSDK:
+    """Stands in for the ``azure.cognitiveservices.speech`` module.
+
+    Synthesizers, recognizers, streams and connections are fakes; anything
+    else, such as configs and enums, is the real SDK's.
+    """
+
+    SpeechSynthesizer = FakeSpeechSynthesizer
+    SpeechRecognizer = FakeSpeechRecognizer
+    Connection = FakeConnection
+    audio = _FakeAudioModule
+
+    def __init__(self, synthesis: LatencyProfile, recognition: LatencyProfile):
+        FakeSpeechSynthesizer.profile = synthesis
+        FakeSpeechRecognizer.profile = recognition
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(speechsdk, name)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve fake Zonos and OpenAI upstreams")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--zonos", type=LatencyProfile.parse, default=LatencyProfile(0.3))
+    parser.add_argument("--openai", type=LatencyProfile.parse, default=LatencyProfile(0.5))
+    parser.add_argument("--token-interval", type=float, default=0.02)
+    args = parser.parse_args()
+    web.run_app(
+        create_fake_upstream_app(args.zonos, args.openai, args.token_interval),
+        host="127.0.0.1", port=args.port, print=None, access_log=None
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Latency statistics and the text report printed by ``benchmarks.run``."""
+import math
+from typing import Any, Dict, List, Sequence
+
+
+def percentile(ordered: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted samples; 0.0 if there are none."""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+
+class ScenarioResult:
+    """Latencies and errors collected while one scenario ran."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies: List[float] = []
+        self.first_byte: List[float] = []
+        self.errors = 0
+        self.elapsed = 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+        first_byte = sorted(self.first_byte)
+        completed = len(latencies)
+        return {
+            "scenario": self.name,
+            "requests": completed + self.errors,
+            "errors": self.errors,
+            "throughput_rps": completed / self.elapsed if self.elapsed else 0.0,
+            "p50_ms": percentile(latencies, 0.50) * 1000,
+            "p95_ms": percentile(latencies, 0.95) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+            "ttfb_p50_ms": percentile(first_byte, 0.50) * 1000 if first_byte else None,
+            "ttfb_p99_ms": percentile(first_byte, 0.99) * 1000 if first_byte else None,
+        }
+
+
+_COLUMNS = [
+    ("requests", "requests"), ("errors", "errors"), ("req/s", "throughput_rps"),
+    ("p50 ms", "p50_ms"), ("p95 ms", "p95_ms"), ("p99 ms", "p99_ms"),
+    ("ttfb p50", "ttfb_p50_ms"), ("ttfb p99", "ttfb_p99_ms"),
+]
+
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return "-"
+    return f"{value:.1f}" if isinstance(value, float) else str(value)
+
+
+def format_report(summaries: List[Dict[str, Any]], loop_lag: Dict[str, float]) -> str:
+    lines = [f"{'scenario':<12}" + "".join(f"{title:>10}" for title, _ in _COLUMNS)]
+    for summary in summaries:
+        lines.append(
+            f"{summary['scenario']:<12}"
+            + "".join(f"{_cell(summary[key]):>10}" for _, key in _COLUMNS)
+        )
+    lines.append(
+        "event loop lag: p50 {p50_ms:.1f} ms, p99 {p99_ms:.1f} ms, max {max_ms:.1f} ms "
+        "({samples:.0f} samples)".format(**loop_lag)
+    )
+    return "\n".join(lines)
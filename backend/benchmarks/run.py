@@ -0,0 +1,265 @@
+"""Load-test the app against local upstream stand-ins.
+
+Starts the fake Zonos/OpenAI server and the app (``benchmarks.serve``) as
+subprocesses, drives concurrent HTTP and WebSocket scenarios against the app
+and prints throughput, latency percentiles and the app's event-loop lag.
+
+Example::
+
+    python -m benchmarks.run --requests 200 --concurrency 50 --openai 0.5,0.2,0.01
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import socket
+import subprocess  # nosec B404 - starts this package's own helper processes
+import sys
+import time
+from array import array
+from typing import Awaitable, Callable, Dict, List
+
+import aiohttp
+
+from benchmarks.report import ScenarioResult, format_report
+
+# 20 ms of a 440 Hz tone in 16 kHz, 16-bit mono PCM; silence would be
+# dropped by the server's voice activity detection.
+AUDIO_FRAME = array("h", (
+    int(8000 * math.sin(2 * math.pi * 440 * n / 16000)) for n in range(320)
+)).tobytes()
+FRAME_SECONDS = 0.02
+
+Scenario = Callable[[aiohttp.ClientSession, str, int, ScenarioResult], Awaitable[None]]
+
+
+async def chat(session: aiohttp.ClientSession, base_url: str, index: int,
+               result: ScenarioResult) -> None:
+    started = time.perf_counter()
+    async with session.post(f"{base_url}/api/chat", json={
+        "message": f"今日の予定を教えて{index}", "user_id": f"bench-{index}"
+    }) as response:
+        response.raise_for_status()
+        await response.read()
+    result.latencies.append(time.perf_counter() - started)
+
+
+async def chat_stream(session: aiohttp.ClientSession, base_url: str, index: int,
+                      result: ScenarioResult) -> None:
+    started = time.perf_counter()
+    first_token = None
+    async with session.post(f"{base_url}/api/chat/stream", json={
+        "message": f"今日の予定を教えて{index}", "user_id": f"bench-{index}"
+    }) as response:
+        response.raise_for_status()
+        async for line in response.content:
+            if line.startswith(b"event: token") and first_token is None:
+                first_token = time.perf_counter() - started
+            elif line.startswith(b"event: error"):
+                raise RuntimeError("chat stream failed")
+    if first_token is not None:
+        result.first_byte.append(first_token)
+    result.latencies.append(time.perf_counter() - started)
+
+
+async def tts(session: aiohttp.ClientSession, base_url: str, index: int,
+              result: ScenarioResult) -> None:
+    started = time.perf_counter()
+    async with session.post(
+        f"{base_url}/api/synthesize", json={"text": f"こんにちは、{index}番目のテストです。"}
+    ) as response:
+        response.raise_for_status()
+        await response.read()
+    result.latencies.append(time.perf_counter() - started)
+
+
+async def _send_utterance(websocket: aiohttp.ClientWebSocketResponse, seconds: float) -> float:
+    """Stream ``seconds`` of audio at real-time pace; return when the last frame went out."""
+    for _ in range(round(seconds / FRAME_SECONDS)):
+        await websocket.send_bytes(AUDIO_FRAME)
+        await asyncio.sleep(FRAME_SECONDS)
+    return time.perf_counter()
+
+
+async def recognize(session: aiohttp.ClientSession, base_url: str, index: int,
+                    result: ScenarioResult) -> None:
+    async with session.ws_connect(f"{base_url}/api/speech/recognize") as websocket:
+        sent = await _send_utterance(websocket, 1.0)
+        async for message in websocket:
+            event = message.json()
+            if "error" in event:
+                raise RuntimeError(event["error"])
+            if event.get("is_final"):
+                result.latencies.append(time.perf_counter() - sent)
+                return
+    raise RuntimeError("connection closed before a final result")
+
+
+async def converse(session: aiohttp.ClientSession, base_url: str, index: int,
+                   result: ScenarioResult) -> None:
+    async with session.ws_connect(
+        f"{base_url}/api/converse?user_id=bench-{index}"
+    ) as websocket:
+        sent = await _send_utterance(websocket, 1.0)
+        first_audio = None
+        async for message in websocket:
+            if message.type != aiohttp.WSMsgType.TEXT:
+                continue
+            event = message.json()
+            if event.get("type") == "audio" and first_audio is None:
+                first_audio = time.perf_counter() - sent
+            elif event.get("type") == "turn_end":
+                if first_audio is not None:
+                    result.first_byte.append(first_audio)
+                result.latencies.append(time.perf_counter() - sent)
+                return
+            elif event.get("type") == "error" or "error" in event:
+                raise RuntimeError(event.get("error"))
+    raise RuntimeError("connection closed before the turn ended")
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "chat": chat,
+    "chat_stream": chat_stream,
+    "tts": tts,
+    "recognize": recognize,
+    "converse": converse,
+}
+
+
+async def run_scenario(
+    name: str, base_url: str, requests: int, concurrency: int, timeout: float
+) -> ScenarioResult:
+    result = ScenarioResult(name)
+    scenario = SCENARIOS[name]
+    next_index = 0
+
+    async def worker(session: aiohttp.ClientSession) -> None:
+        nonlocal next_index
+        while next_index < requests:
+            index, next_index = next_index, next_index + 1
+            try:
+                await asyncio.wait_for(scenario(session, base_url, index, result), timeout)
+            except Exception:  # pylint: disable=broad-except
+                result.errors += 1
+
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+        result.elapsed = time.perf_counter() - started
+    return result
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _wait_until_ready(url: str, deadline: float = 30.0) -> None:
+    expires_at = time.monotonic() + deadline
+    async with aiohttp.ClientSession() as session:
+        while True:
+            try:
+                async with session.get(url) as response:
+                    if response.status < 500:
+                        return
+            except aiohttp.ClientError:
+                pass
+            if time.monotonic() > expires_at:
+                raise RuntimeError(f"{url} did not become ready")
+            await asyncio.sleep(0.2)
+
+
+def _start(module: str, args: List[str], env: Dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen(  # nosec B603 - fixed argv, no shell
+        [sys.executable, "-m", module, *args],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env=env
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    fake_port, app_port = _free_port(), _free_port()
+    env = {
+        **os.environ,
+        "ZONOS_BASE_URL": f"http://127.0.0.1:{fake_port}/zonos/v1",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{fake_port}/openai/v1",
+        # The fakes do not serve the endpoints the readiness probes use.
+        "HEALTH_PROBE_INTERVAL": "0",
+    }
+    # The fakes accept any key, but the app validates their format.
+    env.setdefault("OPENAI_API_KEY", "sk-" + "0" * 48)
+    env.setdefault("AZURE_SPEECH_KEY", "0" * 32)
+    env.setdefault("ZONOS_API_KEY", "z_" + "0" * 32)
+    processes = [
+        _start("benchmarks.fakes", [
+            "--port", str(fake_port), "--zonos", args.zonos, "--openai", args.openai,
+            "--token-interval", str(args.token_interval)
+        ], env),
+        _start("benchmarks.serve", [
+            "--port", str(app_port), "--azure-tts", args.azure_tts, "--azure-stt", args.azure_stt
+        ], env),
+    ]
+    base_url = f"http://127.0.0.1:{app_port}"
+    try:
+        await _wait_until_ready(f"http://127.0.0.1:{fake_port}/")
+        await _wait_until_ready(f"{base_url}/")
+        async with aiohttp.ClientSession() as session:
+            await session.post(f"{base_url}/benchmark/loop-lag/reset")
+        names = args.scenarios.split(",")
+        runs = [
+            run_scenario(name, base_url, args.requests, args.concurrency, args.timeout)
+            for name in names
+        ]
+        if args.mixed:
+            results = await asyncio.gather(*runs)
+        else:
+            results = [await run for run in runs]
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"{base_url}/benchmark/loop-lag") as response:
+                loop_lag = await response.json()
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+    summaries = [result.summary() for result in results]
+    print(format_report(summaries, loop_lag))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump({"scenarios": summaries, "loop_lag": loop_lag}, output, indent=2)
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help="comma-separated scenarios to run")
+    parser.add_argument("--requests", type=int, default=100, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=20,
+                        help="concurrent clients per scenario")
+    parser.add_argument("--mixed", action="store_true",
+                        help="run the scenarios at the same time instead of one after another")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout")
+    parser.add_argument("--zonos", default="0.3,0.1,0",
+                        help="fake Zonos latency,jitter,error_rate")
+    parser.add_argument("--openai", default="0.5,0.2,0",
+                        help="fake OpenAI latency,jitter,error_rate (latency to first token)")
+    parser.add_argument("--token-interval", type=float, default=0.02,
+                        help="fake OpenAI delay between streamed tokens")
+    parser.add_argument("--azure-tts", default="0.2,0.05,0",
+                        help="fake Azure synthesis latency,jitter,error_rate")
+    parser.add_argument("--azure-stt", default="0.3,0.1,0",
+                        help="fake Azure recognition latency,jitter,error_rate")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios.split(",")) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    return args
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args(sys.argv[1:])))
@@ -0,0 +1,89 @@
+"""Run the app against the fake upstreams, with an event-loop lag probe.
+
+Started by ``benchmarks.run``; Zonos and OpenAI are pointed at the fake
+HTTP server through ``ZONOS_BASE_URL`` and ``OPENAI_BASE_URL``, and the
+Azure Speech SDK is replaced in-process by ``FakeSpeechSDK``.
+"""
+import argparse
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+import uvicorn
+
+from benchmarks.fakes import FakeSpeechSDK, LatencyProfile
+from benchmarks.report import percentile
+
+
+class LoopLagProbe:
+    """Measures how late a periodic timer fires on the app's event loop.
+
+    Anything holding the loop, such as a blocking SDK call, shows up as lag.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self._samples: Deque[float] = deque(maxlen=100000)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self._samples.append(max(0.0, time.perf_counter() - started - self.interval))
+
+    def reset(self) -> None:
+        self._samples.clear()
+
+    def summary(self) -> Dict[str, float]:
+        samples = sorted(self._samples)
+        return {
+            "samples": len(samples),
+            "p50_ms": percentile(samples, 0.50) * 1000,
+            "p99_ms": percentile(samples, 0.99) * 1000,
+            "max_ms": (samples[-1] if samples else 0.0) * 1000,
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve the app for benchmarking")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--azure-tts", type=LatencyProfile.parse, default=LatencyProfile(0.2))
+    parser.add_argument("--azure-stt", type=LatencyProfile.parse, default=LatencyProfile(0.3))
+    parser.add_argument("--log-level", default="warning")
+    args = parser.parse_args()
+
+    # Patch before the app builds any speech objects.
+    from app.services import speech_service  # pylint: disable=import-outside-toplevel
+    speech_service.speechsdk = FakeSpeechSDK(args.azure_tts, args.azure_stt)  # type: ignore
+
+    from app.main import app  # pylint: disable=import-outside-toplevel
+
+    # The app's modules log every request at INFO, which would dominate the run.
+    logging.getLogger().setLevel(args.log_level.upper())
+
+    probe = LoopLagProbe()
+
+    @app.on_event("startup")
+    async def start_probe() -> None:
+        probe.start()
+
+    @app.get("/benchmark/loop-lag")
+    async def loop_lag() -> Dict[str, float]:
+        return probe.summary()
+
+    @app.post("/benchmark/loop-lag/reset")
+    async def reset_loop_lag() -> Dict[str, bool]:
+        probe.reset()
+        return {"reset": True}
+
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level=args.log_level)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+import os
+
+# Services read settings on first use; provide well-formed dummy keys so they
+# can be built without a .env file.
+os.environ.setdefault("OPENAI_API_KEY", "sk-" + "a" * 48)
+os.environ.setdefault("AZURE_SPEECH_KEY", "a" * 32)
+os.environ.setdefault("ZONOS_API_KEY", "z_" + "a" * 32)
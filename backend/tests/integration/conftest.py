@@ -1,20 +1,25 @@
 import pytest
 import os
 from unittest.mock import patch
-from .mocks import MockSpeechService, MockOpenAI
+from .mocks import MockSpeechService, MockOpenAI, MockTTSService
 
 
 @pytest.fixture(autouse=True)
 def mock_env_vars():
     """Mock environment variables for testing"""
-    os.environ["OPENAI_API_KEY"] = "test_openai_key"
-    os.environ["AZURE_SPEECH_KEY"] = "test_azure_key"
-    os.environ["ZONOS_API_KEY"] = "test_zonos_key"
+    # Settings are read on first use, so the keys must pass format validation.
+    os.environ["OPENAI_API_KEY"] = "sk-" + "t" * 48
+    os.environ["AZURE_SPEECH_KEY"] = "0" * 32
+    os.environ["ZONOS_API_KEY"] = "z_" + "t" * 32
 
 
 @pytest.fixture(autouse=True)
 def mock_services():
     """Mock external services to prevent API calls"""
-    with patch("app.routes.speech.routes.SpeechService", return_value=MockSpeechService()), \
-         patch("app.services.chat_service.openai", MockOpenAI()):
+    mock_speech_service = MockSpeechService()
+    with patch("app.routes.speech.routes.get_speech_service", return_value=mock_speech_service), \
+         patch("app.routes.converse.routes.get_speech_service",
+               return_value=mock_speech_service), \
+         patch("app.routes.tts.routes.get_tts_service", return_value=MockTTSService()), \
+         patch("app.core.http_client.openai", MockOpenAI()):
         yield
@@ -1,11 +1,37 @@
+import asyncio
+from typing import AsyncIterator
 from unittest.mock import MagicMock
 import azure.cognitiveservices.speech as speechsdk
 
+from app.core.text import split_sentences
+
+
+class MockRecognitionSession:
+    def __init__(self):
+        self._events = asyncio.Queue()
+
+    def write(self, audio_data: bytes) -> None:
+        self._events.put_nowait({"type": "recognized", "text": "こんにちは", "is_final": True})
+
+    async def stop(self) -> None:
+        self._events.put_nowait(None)
+
+    async def events(self):
+        while (event := await self._events.get()) is not None:
+            yield event
+
 
 class MockSpeechService:
+    async def start_recognition_session(self, input_format=None, on_utterance_end=None):
+        return MockRecognitionSession()
+
     async def text_to_speech(self, text: str) -> bytes:
         return b"mock_audio_data"
 
+    async def stream_text_to_speech(self, text: str, output_format=None):
+        for chunk in (b"mock_", b"audio_", b"data"):
+            yield chunk
+
     async def recognize_speech(self, audio_data: bytes):
         mock_result = MagicMock()
         mock_result.text = "こんにちは"
@@ -13,11 +39,55 @@ class MockSpeechService:
         return mock_result
 
 
+class MockTTSService:
+    async def synthesize_speech(self, text: str, voice_id: str = "default",
+                                language: str = "ja-JP", fallback: bool = True) -> bytes:
+        return b"mock_tts_audio:" + text.encode()
+
+    async def synthesize_chunked(self, text: str, voice_id: str = "default",
+                                 language: str = "ja-JP") -> AsyncIterator[bytes]:
+        for sentence in split_sentences(text):
+            yield await self.synthesize_speech(sentence, voice_id, language, fallback=False)
+
+
 class MockOpenAIResponse:
     def __init__(self, text: str):
         self.choices = [MagicMock(message=MagicMock(content=text))]
 
 
+class MockOpenAIStreamChunk:
+    def __init__(self, text: str):
+        self.choices = [MagicMock(delta=MagicMock(content=text))]
+
+
+class MockOpenAIStream:
+    def __init__(self, tokens):
+        self._tokens = iter(tokens)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return MockOpenAIStreamChunk(next(self._tokens))
+        except StopIteration:
+            raise StopAsyncIteration from None
+
+
+class MockChatCompletions:
+    async def create(self, *args, stream: bool = False, **kwargs):
+        if stream:
+            return MockOpenAIStream(["こんにちは", "！"])
+        return MockOpenAIResponse("こんにちは！")
+
+
+class MockAsyncOpenAI:
+    def __init__(self, *args, **kwargs):
+        self.chat = MagicMock(completions=MockChatCompletions())
+
+
 class MockOpenAI:
+    AsyncOpenAI = MockAsyncOpenAI
+
     async def ChatCompletion_acreate(self, *args, **kwargs):
         return MockOpenAIResponse("こんにちは！")
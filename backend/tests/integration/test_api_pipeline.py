@@ -1,5 +1,10 @@
+import json
+
 import pytest
+from fastapi import WebSocketDisconnect
 from fastapi.testclient import TestClient
+from app.core.config import get_settings
+from app.core.flow_control import get_connection_limiter
 from app.main import app
 
 client = TestClient(app)
@@ -18,6 +23,39 @@ def test_chat_endpoint():
     assert data["status"] == "success"
 
 
+def test_chat_stream_endpoint():
+    """Test the streaming chat endpoint emits tokens and a final frame"""
+    with client.stream(
+        "POST",
+        "/api/chat/stream",
+        json={"message": "こんにちは", "user_id": "test_user"}
+    ) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        body = "".join(response.iter_text())
+    assert "event: token" in body
+    assert body.rstrip().split("\n\n")[-1].startswith("event: done")
+
+
+def test_chat_stream_rejected_when_queue_is_full(monkeypatch):
+    """Test a full OpenAI queue fails fast with 429 and Retry-After"""
+    from app.core.admission import AdmissionScheduler
+    from app.routes.chat import routes
+
+    full = AdmissionScheduler(
+        "openai", max_concurrency=1, rate=0.0, burst=1, max_queue=0,
+        max_queue_per_user=1, max_wait=10.0
+    )
+    monkeypatch.setattr(routes, "get_admission", lambda name: full)
+    response = client.post(
+        "/api/chat/stream",
+        json={"message": "こんにちは", "user_id": "test_user"}
+    )
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert client.get("/stats/admission").status_code == 200
+
+
 def test_tts_endpoint():
     """Test the text-to-speech endpoint"""
     response = client.post(
@@ -35,6 +73,140 @@ def test_tts_endpoint():
     assert data["status"] == "success"
 
 
+def test_tts_stream_endpoint():
+    """Test sentence-level synthesis streams segments in sentence order"""
+    response = client.post(
+        "/api/synthesize/stream",
+        json={"text": "おはよう。いい天気ですね！", "voice_id": "default", "language": "ja-JP"}
+    )
+    assert response.status_code == 200
+    assert response.content == "mock_tts_audio:おはよう。mock_tts_audio:いい天気ですね！".encode()
+
+
+def test_tts_stream_endpoint_aborts_on_a_failed_segment(monkeypatch):
+    """Test a segment failing after the first aborts the stream instead of truncating it"""
+    from app.routes.tts import routes
+
+    class FailingTTSService:
+        async def synthesize_chunked(self, text, voice_id="default", language="ja-JP"):
+            yield b"first"
+            raise ValueError("segment failed")
+
+    monkeypatch.setattr(routes, "get_tts_service", lambda: FailingTTSService())
+    with pytest.raises(ValueError):
+        client.post("/api/synthesize/stream", json={"text": "一文目。二文目。"})
+
+
+@pytest.mark.asyncio
+async def test_tts_stream_closes_segments_when_the_client_disconnects(monkeypatch):
+    """Test pending segments are closed when the client stops reading the stream"""
+    import asyncio
+    from types import SimpleNamespace
+    from app.routes.tts import routes
+
+    closed = []
+
+    class EndlessTTSService:
+        async def synthesize_chunked(self, text, voice_id="default", language="ja-JP"):
+            try:
+                yield b"first"
+                await asyncio.Event().wait()
+                yield b"never"
+            finally:
+                closed.append(True)
+
+    monkeypatch.setattr(routes, "get_tts_service", lambda: EndlessTTSService())
+    response = await routes.synthesize_speech_stream(
+        routes.TTSRequest(text="一文目。二文目。"), SimpleNamespace(client=None)
+    )
+    body = response.body_iterator
+    assert await body.__anext__() == b"first"
+    await body.aclose()
+    assert closed == [True]
+
+
+def test_tts_audio_is_served_with_range_and_etag():
+    """Test synthesized audio can be fetched, partially fetched and revalidated"""
+    tts_response = client.post("/api/synthesize", json={"text": "こんにちは"})
+    audio_url = tts_response.json()["audio_url"]
+
+    response = client.get(audio_url)
+    assert response.status_code == 200
+    assert response.content == "mock_tts_audio:こんにちは".encode()
+    etag = response.headers["etag"]
+
+    partial = client.get(audio_url, headers={"Range": "bytes=0-3"})
+    assert partial.status_code == 206
+    assert partial.content == b"mock"
+
+    not_modified = client.get(audio_url, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+
+    assert client.get("/api/audio/../../etc/passwd").status_code == 404
+
+
+def test_tts_batch_endpoint_deduplicates_items():
+    """Test batch synthesis returns results in request order and reuses identical items"""
+    response = client.post(
+        "/api/synthesize/batch",
+        json={"items": [{"text": "おはよう"}, {"text": "こんばんは"}, {"text": "おはよう"}]}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["succeeded"], data["failed"]) == (3, 0)
+    results = data["results"]
+    assert [result["index"] for result in results] == [0, 1, 2]
+    assert results[0]["audio_url"] == results[2]["audio_url"] != results[1]["audio_url"]
+    assert client.get(results[1]["audio_url"]).content == "mock_tts_audio:こんばんは".encode()
+
+
+def test_tts_batch_endpoint_reports_partial_failure(monkeypatch):
+    """Test one failing item does not fail the batch and carries its own status code"""
+    from app.core.resilience import UpstreamTimeoutError
+    from app.routes.tts import routes
+
+    service = routes.get_tts_service()
+    synthesize = service.synthesize_speech
+
+    async def flaky(text, voice_id="default", language="ja-JP", fallback=True):
+        if text == "失敗":
+            raise UpstreamTimeoutError("zonos timed out")
+        return await synthesize(text, voice_id, language, fallback)
+
+    monkeypatch.setattr(service, "synthesize_speech", flaky)
+    monkeypatch.setattr(routes, "get_tts_service", lambda: service)
+    response = client.post(
+        "/api/synthesize/batch",
+        json={"items": [{"text": "成功"}, {"text": "失敗"}]}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["succeeded"], data["failed"]) == (1, 1)
+    assert data["results"][0]["status"] == "success"
+    assert data["results"][1]["status"] == "error"
+    assert data["results"][1]["code"] == 504
+
+
+def test_tts_batch_endpoint_streams_results():
+    """Test streamed batch synthesis sends one NDJSON line per item and a summary"""
+    response = client.post(
+        "/api/synthesize/batch",
+        json={"items": [{"text": "一"}, {"text": "二"}, {"text": "一"}], "stream": True}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(line["index"] for line in lines[:-1]) == [0, 1, 2]
+    assert lines[-1] == {"type": "summary", "succeeded": 3, "failed": 0}
+
+
+def test_tts_batch_endpoint_rejects_oversized_batch():
+    """Test batches over the configured limit are rejected"""
+    items = [{"text": str(i)} for i in range(get_settings().tts_batch_max_items + 1)]
+    response = client.post("/api/synthesize/batch", json={"items": items})
+    assert response.status_code == 400
+
+
 @pytest.mark.asyncio
 async def test_speech_websocket():
     """Test the speech recognition WebSocket endpoint"""
@@ -44,6 +216,85 @@ async def test_speech_websocket():
         data = websocket.receive_json()
         assert "text" in data
         assert "is_final" in data
+        assert data["type"] in ("recognizing", "recognized")
+
+
+def test_speech_websocket_reports_full_queue(monkeypatch):
+    """Test a rejected recognition start tells the client when to retry"""
+    from app.core.admission import AdmissionRejectedError
+    from app.routes.speech import routes
+
+    service = routes.get_speech_service()
+
+    async def rejected(*args, **kwargs):
+        raise AdmissionRejectedError("azure", "queue_full", 3.0)
+
+    monkeypatch.setattr(service, "start_recognition_session", rejected)
+    monkeypatch.setattr(routes, "get_speech_service", lambda: service)
+    with client.websocket_connect("/api/speech/recognize") as websocket:
+        websocket.send_bytes(b"dummy_audio_data")
+        assert websocket.receive_json() == {"error": "Server busy", "retry_after": 3.0}
+
+
+def test_speech_websocket_closes_when_azure_cancels(monkeypatch):
+    """Test a session canceled by Azure closes the socket with 1011 instead of idling"""
+    from app.routes.speech import routes
+    from .mocks import MockRecognitionSession
+
+    class CanceledSession(MockRecognitionSession):
+        def write(self, audio_data: bytes) -> None:
+            self._events.put_nowait({"type": "error", "error": "Speech recognition failed"})
+            self._events.put_nowait(None)
+
+    service = routes.get_speech_service()
+
+    async def canceled(*args, **kwargs):
+        return CanceledSession()
+
+    monkeypatch.setattr(service, "start_recognition_session", canceled)
+    monkeypatch.setattr(routes, "get_speech_service", lambda: service)
+    with client.websocket_connect("/api/speech/recognize") as websocket:
+        websocket.send_bytes(b"dummy_audio_data")
+        assert websocket.receive_json() == {"type": "error", "error": "Speech recognition failed"}
+        with pytest.raises(WebSocketDisconnect) as error:
+            websocket.receive_json()
+        assert error.value.code == 1011
+
+
+def test_speech_synthesis_streaming():
+    """Test the synthesis WebSocket streams framed audio chunks"""
+    with client.websocket_connect("/api/speech/synthesize") as websocket:
+        websocket.send_json({"text": "こんにちは", "stream": True})
+        chunks = []
+        while True:
+            header = websocket.receive_json()
+            assert header["seq"] == len(chunks)
+            if header["is_final"]:
+                break
+            chunk = websocket.receive_bytes()
+            assert len(chunk) == header["size"]
+            chunks.append(chunk)
+        assert b"".join(chunks) == b"mock_audio_data"
+
+
+def test_speech_synthesis_session_with_binary_framing():
+    """Test a session header negotiates the codec and compact binary audio frames"""
+    with client.websocket_connect("/api/speech/synthesize") as websocket:
+        websocket.send_json({
+            "type": "session", "output": {"codec": "mulaw"}, "framing": "binary"
+        })
+        session = websocket.receive_json()
+        assert session["output"]["format"] == "raw-8khz-8bit-mono-mulaw"
+        assert session["framing"] == "binary"
+
+        websocket.send_json({"text": "こんにちは", "stream": True})
+        frames = []
+        while True:
+            frame = websocket.receive_bytes()
+            frames.append(frame)
+            if frame[0] & 0x01:
+                break
+        assert b"".join(frame[5:] for frame in frames) == b"mock_audio_data"
 
 
 def test_full_pipeline():
@@ -69,3 +320,90 @@ def test_full_pipeline():
     assert tts_response.status_code == 200
     tts_data = tts_response.json()
     assert "audio_url" in tts_data
+
+
+def test_converse_websocket():
+    """Test a full voice turn over the single /api/converse WebSocket"""
+    with client.websocket_connect("/api/converse?user_id=test_user") as websocket:
+        websocket.send_bytes(b"dummy_audio_data")
+        transcript = websocket.receive_json()
+        assert transcript["type"] == "recognized"
+
+        tokens, audio = [], []
+        while True:
+            message = websocket.receive_json()
+            if message["type"] == "token":
+                tokens.append(message["token"])
+            elif message["type"] == "audio" and not message["is_final"]:
+                audio.append(websocket.receive_bytes())
+            elif message["type"] == "turn_end":
+                break
+        assert message["text"] == transcript["text"]
+        assert message["response"] == "".join(tokens)
+        assert audio
+
+
+def test_converse_websocket_reports_unexpected_turn_failure(monkeypatch):
+    """Test a turn failing with any error sends an error frame instead of going silent"""
+    from app.services.conversation_service import ConversationService
+
+    async def broken_turn(*args, **kwargs):
+        raise RuntimeError("connection reset")
+
+    monkeypatch.setattr(ConversationService, "run_turn", broken_turn)
+    with client.websocket_connect("/api/converse?user_id=test_user") as websocket:
+        websocket.send_bytes(b"dummy_audio_data")
+        assert websocket.receive_json()["type"] == "recognized"
+        assert websocket.receive_json() == {"type": "error", "error": "Conversation turn failed"}
+
+
+def test_websocket_rejected_when_worker_is_full():
+    """Test connections over the per-worker cap get an error and close code 1013"""
+    limiter = get_connection_limiter()
+    max_connections, limiter.max_connections = limiter.max_connections, 0
+    try:
+        with client.websocket_connect("/api/converse") as websocket:
+            assert websocket.receive_json()["type"] == "error"
+            with pytest.raises(WebSocketDisconnect) as error:
+                websocket.receive_json()
+            assert error.value.code == 1013
+    finally:
+        limiter.max_connections = max_connections
+    assert client.get("/stats/websocket").json()["rejected"] >= 1
+
+
+def test_health_endpoints():
+    """Test liveness always answers and readiness reports upstream probe results"""
+    response = client.get("/healthz")
+    assert response.status_code == 200
+    assert response.json()["status"] == "ok"
+
+    response = client.get("/readyz")
+    assert response.status_code in (200, 503)
+    assert response.json()["ready"] is (response.status_code == 200)
+
+
+def test_metrics_endpoint():
+    """Test /metrics exposes route latency and component statistics"""
+    client.post("/api/chat", json={"message": "こんにちは", "user_id": "metrics_user"})
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'http_request_duration_seconds_count{method="POST",route="/api/chat",status="200"}' \
+        in response.text
+    assert 'cache_hit_rate{cache="tts"}' in response.text
+
+
+def test_debug_endpoints_require_a_token(monkeypatch):
+    """Test /debug/* is hidden without DEBUG_TOKEN and checks the token when set"""
+    settings = get_settings()
+    monkeypatch.setattr(settings, "debug_token", None)
+    assert client.get("/debug/traces").status_code == 404
+
+    monkeypatch.setattr(settings, "debug_token", "s3cret")
+    assert client.get("/debug/event-loop").status_code == 401
+    assert client.get(
+        "/debug/event-loop", headers={"X-Debug-Token": "wrong"}
+    ).status_code == 401
+    response = client.get("/debug/traces", headers={"X-Debug-Token": "s3cret"})
+    assert response.status_code == 200
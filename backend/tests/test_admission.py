@@ -0,0 +1,169 @@
+import asyncio
+
+import pytest
+
+from app.core.admission import AdmissionRejectedError, AdmissionScheduler, set_request_context
+
+
+def make_scheduler(**kwargs):
+    options = dict(
+        max_concurrency=1, rate=0.0, burst=1, max_queue=100, max_queue_per_user=100, max_wait=5.0
+    )
+    options.update(kwargs)
+    return AdmissionScheduler("test", **options)
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_capped_and_excess_calls_wait():
+    """同時実行数を超えた呼び出しは待たされ、枠が空くと順に実行されることのテスト"""
+    scheduler = make_scheduler(max_concurrency=2)
+    running = peak = 0
+
+    async def call():
+        nonlocal running, peak
+        async with scheduler.slot():
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    await asyncio.gather(*(call() for _ in range(6)))
+    assert peak == 2
+    stats = scheduler.stats()
+    assert stats["admitted"] == 6
+    assert stats["queued"] == 4
+    assert stats["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_interactive_calls_are_admitted_before_batch():
+    """後から来た対話的な呼び出しが、先に待っていたバッチより先に実行されることのテスト"""
+    scheduler = make_scheduler()
+    admitted = []
+
+    async def call(label, priority):
+        set_request_context("user", priority)
+        async with scheduler.slot():
+            admitted.append(label)
+            await asyncio.sleep(0.01)
+
+    holder = asyncio.create_task(call("holder", "interactive"))
+    await asyncio.sleep(0)
+    batch = [asyncio.create_task(call(f"batch{i}", "batch")) for i in range(3)]
+    await asyncio.sleep(0)
+    interactive = asyncio.create_task(call("interactive", "interactive"))
+    await asyncio.gather(holder, *batch, interactive)
+    assert admitted[:2] == ["holder", "interactive"]
+
+
+@pytest.mark.asyncio
+async def test_busy_user_does_not_starve_others():
+    """大量に積んだユーザーがいても、他のユーザーの呼び出しが交互に実行されることのテスト"""
+    scheduler = make_scheduler()
+    admitted = []
+
+    async def call(user_id):
+        set_request_context(user_id)
+        async with scheduler.slot():
+            admitted.append(user_id)
+            await asyncio.sleep(0.005)
+
+    holder = asyncio.create_task(call("holder"))
+    await asyncio.sleep(0)
+    busy = [asyncio.create_task(call("busy")) for _ in range(5)]
+    await asyncio.sleep(0)
+    quiet = [asyncio.create_task(call("quiet")) for _ in range(2)]
+    await asyncio.gather(holder, *busy, *quiet)
+    # quietの2件はbusyの5件を待たず、1件おきに実行される
+    assert admitted[1:5] == ["busy", "quiet", "busy", "quiet"]
+
+
+@pytest.mark.asyncio
+async def test_weights_give_a_user_a_larger_share():
+    """重みの大きいユーザーほど多くの枠を割り当てられることのテスト"""
+    scheduler = make_scheduler(weights={"premium": 2.0})
+    admitted = []
+
+    async def call(user_id):
+        set_request_context(user_id)
+        async with scheduler.slot():
+            admitted.append(user_id)
+            await asyncio.sleep(0.005)
+
+    holder = asyncio.create_task(call("holder"))
+    await asyncio.sleep(0)
+    tasks = [asyncio.create_task(call(user)) for user in ["standard"] * 4 + ["premium"] * 4]
+    await asyncio.gather(holder, *tasks)
+    assert admitted[1:7].count("premium") == 4
+
+
+@pytest.mark.asyncio
+async def test_full_queues_are_rejected_with_retry_after():
+    """待ち行列が全体またはユーザー単位で満杯なら即座に拒否されることのテスト"""
+    scheduler = make_scheduler(max_queue=3, max_queue_per_user=2)
+    release = asyncio.Event()
+
+    async def call(user_id):
+        set_request_context(user_id)
+        async with scheduler.slot():
+            await release.wait()
+
+    tasks = [asyncio.create_task(call("a")) for _ in range(3)]
+    await asyncio.sleep(0)
+    # 1件が実行中、2件が待機中
+    with pytest.raises(AdmissionRejectedError) as user_full:
+        await call("a")
+    assert user_full.value.reason == "user_queue_full"
+    assert user_full.value.retry_after >= 1
+
+    tasks.append(asyncio.create_task(call("b")))
+    await asyncio.sleep(0)
+    with pytest.raises(AdmissionRejectedError) as queue_full:
+        await call("c")
+    assert queue_full.value.reason == "queue_full"
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert scheduler.stats()["rejected"] == 2
+    assert scheduler.queued == 0
+
+
+@pytest.mark.asyncio
+async def test_calls_waiting_too_long_are_rejected():
+    """max_waitを超えて待った呼び出しはtimeoutで拒否され、待ち行列から外れることのテスト"""
+    scheduler = make_scheduler(max_wait=0.05)
+    release = asyncio.Event()
+
+    async def holder():
+        async with scheduler.slot():
+            await release.wait()
+
+    task = asyncio.create_task(holder())
+    await asyncio.sleep(0)
+    with pytest.raises(AdmissionRejectedError) as rejected:
+        async with scheduler.slot():
+            pass
+    assert rejected.value.reason == "timeout"
+    assert scheduler.queued == 0
+
+    release.set()
+    await task
+    async with scheduler.slot():
+        assert scheduler.in_flight == 1
+    assert scheduler.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_limits_the_call_rate():
+    """レート制限を超えた呼び出しはトークンが補充されるまで待たされることのテスト"""
+    scheduler = make_scheduler(max_concurrency=10, rate=50.0, burst=2)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+
+    async def call():
+        async with scheduler.slot():
+            pass
+
+    await asyncio.gather(*(call() for _ in range(6)))
+    # バースト2件の後、残り4件は50件/秒で約0.08秒かかる
+    assert loop.time() - started >= 0.06
@@ -0,0 +1,53 @@
+import pytest
+
+from app.core.audio_cache import AudioCache
+
+
+def key(text: str) -> str:
+    return AudioCache.make_key("zonos", text, "default", "ja-JP", "default")
+
+
+def test_key_depends_on_every_parameter():
+    """キャッシュキーが全ての合成パラメータに依存することのテスト"""
+    base = AudioCache.make_key("zonos", "こんにちは", "default", "ja-JP", "mp3")
+    assert base == AudioCache.make_key("zonos", "こんにちは", "default", "ja-JP", "mp3")
+    assert base != AudioCache.make_key("azure", "こんにちは", "default", "ja-JP", "mp3")
+    assert base != AudioCache.make_key("zonos", "こんにちは", "other", "ja-JP", "mp3")
+    assert base != AudioCache.make_key("zonos", "こんにちは", "default", "en-US", "mp3")
+    assert base != AudioCache.make_key("zonos", "こんにちは", "default", "ja-JP", "pcm")
+
+
+@pytest.mark.asyncio
+async def test_memory_tier_evicts_least_recently_used_within_byte_budget():
+    """メモリ上限を超えた場合に最も古く使われたエントリが追い出されることのテスト"""
+    cache = AudioCache(max_bytes=10)
+    await cache.put(key("a"), b"aaaa")
+    await cache.put(key("b"), b"bbbb")
+    assert await cache.get(key("a")) == b"aaaa"
+
+    await cache.put(key("c"), b"cccc")
+
+    assert await cache.get(key("b")) is None
+    assert await cache.get(key("a")) == b"aaaa"
+    assert await cache.get(key("c")) == b"cccc"
+    stats = cache.stats()
+    assert stats["hits"] == 3
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+    assert stats["memory_bytes"] == 8
+
+
+@pytest.mark.asyncio
+async def test_disk_tier_survives_restart_and_respects_budget(tmp_path):
+    """ディスクキャッシュが再起動後も利用でき、上限を守ることのテスト"""
+    cache = AudioCache(max_bytes=0, disk_dir=str(tmp_path), disk_max_bytes=8)
+    await cache.put(key("a"), b"aaaa")
+    await cache.put(key("b"), b"bbbb")
+    await cache.put(key("c"), b"cccc")
+    assert cache.stats()["disk_evictions"] == 1
+
+    restarted = AudioCache(max_bytes=0, disk_dir=str(tmp_path), disk_max_bytes=8)
+    assert await restarted.get(key("a")) is None
+    assert await restarted.get(key("c")) == b"cccc"
+    assert restarted.stats()["disk_hits"] == 1
+    assert restarted.stats()["disk_bytes"] == 8
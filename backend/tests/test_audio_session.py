@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from app.core.audio_framing import BINARY_FRAME_HEADER, AudioFrameSender
+from app.core.audio_session import DEFAULT_FORMAT, AudioFormat, AudioSession, negotiate
+
+
+def test_negotiate_picks_first_supported_codec():
+    """対応しているコーデックが優先順に選ばれることのテスト"""
+    session = negotiate({
+        "type": "session",
+        "input": {"codec": ["opus", "mulaw"], "sample_rate": 8000, "frame_ms": 40},
+        "output": {"codec": "opus", "sample_rate": 24000},
+        "framing": "binary",
+    }, input_codecs=("pcm", "mulaw"))
+
+    assert session.input == AudioFormat("mulaw", 8000, 1, 40)
+    assert session.output == AudioFormat("opus", 24000, 1, 20)
+    assert session.framing == "binary"
+    assert session.output.name == "ogg-24khz-16bit-mono-opus"
+
+
+def test_negotiate_falls_back_to_supported_values():
+    """未対応の値は対応している値に置き換えられることのテスト"""
+    session = negotiate({
+        "input": {"codec": "flac", "channels": 2, "frame_ms": 1000},
+        "output": {"codec": "mulaw", "sample_rate": 16000},
+        "framing": "protobuf",
+    }, input_codecs=("pcm", "mulaw"))
+
+    assert session.input == AudioFormat("pcm", 16000, 1, 200)
+    assert session.output.name == "raw-8khz-8bit-mono-mulaw"
+    assert session.framing == "json"
+    assert negotiate({}) == AudioSession()
+    with pytest.raises(ValueError):
+        negotiate({"input": "opus"})
+
+
+def test_frame_bytes_per_codec():
+    """コーデックごとの1フレームのバイト数のテスト"""
+    assert DEFAULT_FORMAT.frame_bytes == 640
+    assert AudioFormat("mulaw", 8000, 1, 20).frame_bytes == 160
+    assert AudioFormat("opus", 24000).frame_bytes is None
+
+
+class RecordingChannel:
+    def __init__(self):
+        self.sent = []
+
+    async def send_json(self, data, droppable=False):
+        self.sent.append(data)
+
+    async def send_bytes(self, data):
+        self.sent.append(data)
+
+
+@pytest.mark.asyncio
+async def test_binary_framing_sends_whole_frames():
+    """バイナリフレーミングでフレーム単位に区切って送られることのテスト"""
+    channel = RecordingChannel()
+    sender = AudioFrameSender(
+        channel, AudioFormat("mulaw", 8000, 1, 10), asyncio.Lock(), binary=True
+    )
+    await sender.send_chunk(bytes(100))
+    await sender.send_chunk(bytes(100))
+    await sender.end()
+
+    headers = [BINARY_FRAME_HEADER.unpack(message[:5]) for message in channel.sent]
+    payloads = [len(message) - 5 for message in channel.sent]
+    assert headers == [(0, 0), (0, 1), (0, 2), (1, 3)]
+    assert payloads == [80, 80, 40, 0]
@@ -0,0 +1,40 @@
+import os
+import time
+
+import pytest
+
+from app.services.audio_store import AudioStore
+
+
+@pytest.mark.asyncio
+async def test_save_is_content_addressed(tmp_path):
+    """同じ音声データが同じIDで1度だけ保存されることのテスト"""
+    store = AudioStore(str(tmp_path), ttl_seconds=60)
+    first = await store.save(b"audio", "mp3")
+    second = await store.save(b"audio", "mp3")
+
+    assert first == second
+    assert first.endswith(".mp3")
+    assert store.path_for(first).read_bytes() == b"audio"
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_audio_is_hidden_and_cleaned_up(tmp_path):
+    """有効期限切れの音声が取得できず、削除されることのテスト"""
+    store = AudioStore(str(tmp_path), ttl_seconds=60)
+    audio_id = await store.save(b"old", "mp3")
+    expired = time.time() - 120
+    os.utime(tmp_path / audio_id, (expired, expired))
+    fresh_id = await store.save(b"new", "mp3")
+
+    assert store.path_for(audio_id) is None
+    assert store.cleanup_expired() == 1
+    assert store.path_for(fresh_id) is not None
+
+
+def test_path_for_rejects_unsafe_ids(tmp_path):
+    """不正なIDでディレクトリ外のファイルにアクセスできないことのテスト"""
+    store = AudioStore(str(tmp_path), ttl_seconds=60)
+    assert store.path_for("../secret.mp3") is None
+    assert store.path_for("temp.mp3") is None
@@ -0,0 +1,64 @@
+import openai
+import pytest
+from aiohttp.test_utils import TestServer
+
+from app.core.audio_cache import AudioCache
+from app.core.config import get_settings
+from app.services import speech_service as speech_service_module
+from benchmarks.fakes import REPLY, FakeSpeechSDK, LatencyProfile, create_fake_upstream_app
+from benchmarks.report import ScenarioResult, percentile
+
+
+def test_percentiles_use_nearest_rank():
+    """パーセンタイルが最近順位法で計算されることのテスト"""
+    samples = [i / 100 for i in range(1, 101)]
+
+    assert percentile(samples, 0.50) == 0.50
+    assert percentile(samples, 0.99) == 0.99
+    assert percentile([], 0.99) == 0.0
+
+    result = ScenarioResult("chat")
+    result.latencies = [0.1, 0.2, 0.3]
+    result.errors = 1
+    result.elapsed = 1.5
+    summary = result.summary()
+    assert summary["requests"] == 4
+    assert summary["throughput_rps"] == 2.0
+    assert summary["ttfb_p50_ms"] is None
+
+
+@pytest.mark.asyncio
+async def test_fake_openai_streams_completions_the_sdk_can_parse():
+    """偽のOpenAIサーバーのストリームをSDKで読み取れることのテスト"""
+    app = create_fake_upstream_app(
+        LatencyProfile(0.0), LatencyProfile(0.0), token_interval=0.0
+    )
+    async with TestServer(app) as server:
+        client = openai.AsyncOpenAI(
+            api_key="test", base_url=str(server.make_url("/openai/v1")), max_retries=0
+        )
+        stream = await client.chat.completions.create(
+            model="gpt-4", messages=[{"role": "user", "content": "こんにちは"}], stream=True
+        )
+        tokens = [chunk.choices[0].delta.content async for chunk in stream
+                  if chunk.choices and chunk.choices[0].delta.content]
+        await client.close()
+
+    assert "".join(tokens) == REPLY
+
+
+@pytest.mark.asyncio
+async def test_fake_speech_sdk_runs_through_the_speech_service(monkeypatch):
+    """偽のAzure Speech SDKで事前接続つきの合成と認識器の生成ができることのテスト"""
+    monkeypatch.setattr(
+        speech_service_module, "speechsdk", FakeSpeechSDK(LatencyProfile(0.0), LatencyProfile(0.0))
+    )
+    monkeypatch.setattr(get_settings(), "azure_pool_preconnect", True)
+    service = speech_service_module.SpeechService(max_concurrency=1)
+    service.cache = AudioCache(max_bytes=0)
+
+    assert await service.text_to_speech("こんにちは")
+    handle = await service.recognizer_pool.take()
+
+    assert handle.connection is not None
+    assert not handle.connection.closed
@@ -0,0 +1,71 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.chat_service import ChatService
+from app.services.memory_service import InMemoryConversationStore
+from app.services.response_cache import ResponseCache
+
+
+def make_service():
+    service = ChatService()
+    service.memory = InMemoryConversationStore(1000, 200, 100)
+    service.response_cache = ResponseCache(
+        similarity_threshold=0.85, ttl_seconds=60, max_entries=100
+    )
+    calls = []
+
+    async def complete(model, messages):
+        calls.append(messages)
+        reply = f"reply-{len(calls)}"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=reply))])
+
+    service._complete = complete
+    return service, calls
+
+
+@pytest.mark.asyncio
+async def test_replies_built_from_history_are_not_shared():
+    """会話履歴をもとにした応答が他のユーザーに返されないことのテスト"""
+    service, calls = make_service()
+    await service.memory.append("alice", "user", "私の名前はアリスです")
+    await service.memory.append("alice", "assistant", "よろしくね、アリス")
+
+    assert await service.generate_response("こんにちは", "alice") == "reply-1"
+    assert await service.generate_response("こんにちは", "bob") == "reply-2"
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_replies_without_history_are_shared():
+    """履歴のないユーザー同士では応答キャッシュが共有されることのテスト"""
+    service, calls = make_service()
+
+    assert await service.generate_response("こんにちは", "alice") == "reply-1"
+    assert await service.generate_response("こんにちは", "bob") == "reply-1"
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_greetings_are_served_from_cache_despite_history():
+    """挨拶には会話履歴があっても履歴なしで生成された応答が返されることのテスト"""
+    service, calls = make_service()
+    await service.memory.append("alice", "user", "昨日の話の続きだけど")
+    await service.memory.append("alice", "assistant", "うん、どうぞ")
+
+    assert await service.generate_response("こんにちは", "bob") == "reply-1"
+    assert await service.generate_response("こんにちは", "alice") == "reply-1"
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_lookups_skipped_for_history_are_counted():
+    """会話履歴のために応答キャッシュを使わなかった回数が記録されることのテスト"""
+    service, calls = make_service()
+    await service.memory.append("alice", "user", "私の名前はアリスです")
+    await service.memory.append("alice", "assistant", "よろしくね、アリス")
+
+    await service.generate_response("今日は天気がいいね", "alice")
+
+    assert service.response_cache.stats()["history_bypasses"] == 1
+    assert len(calls) == 1
@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from app.core.audio_session import DEFAULT_FORMAT
+from app.services.conversation_service import ConversationService
+
+
+class FakeChatService:
+    def __init__(self, first_sentence_spoken: asyncio.Event):
+        self.first_sentence_spoken = first_sentence_spoken
+
+    async def stream_response(self, message, user_id):
+        yield "一文目です。"
+        # Only continue once TTS has started on the first sentence.
+        await asyncio.wait_for(self.first_sentence_spoken.wait(), timeout=1)
+        yield "二文目"
+        yield "です。"
+
+
+class FakeSpeechService:
+    def __init__(self, first_sentence_spoken: asyncio.Event):
+        self.first_sentence_spoken = first_sentence_spoken
+        self.sentences = []
+
+    async def stream_text_to_speech(self, text, output_format):
+        self.sentences.append(text)
+        self.first_sentence_spoken.set()
+        yield text.encode()
+
+
+class FakeAudioSender:
+    def __init__(self):
+        self.audio_format = DEFAULT_FORMAT
+        self.chunks = []
+        self.ended = False
+
+    async def send_chunk(self, chunk):
+        self.chunks.append(chunk)
+
+    async def end(self):
+        self.ended = True
+
+
+@pytest.mark.asyncio
+async def test_synthesis_starts_before_reply_is_complete():
+    """LLMの応答完了を待たずに最初の文の音声合成が始まることのテスト"""
+    first_sentence_spoken = asyncio.Event()
+    speech_service = FakeSpeechService(first_sentence_spoken)
+    service = ConversationService(FakeChatService(first_sentence_spoken), speech_service)
+    tokens = []
+
+    async def on_token(token):
+        tokens.append(token)
+
+    sender = FakeAudioSender()
+    response = await service.run_turn("こんにちは", "user", on_token, sender)
+
+    assert response == "一文目です。二文目です。"
+    assert speech_service.sentences == ["一文目です。", "二文目です。"]
+    assert sender.chunks == ["一文目です。".encode(), "二文目です。".encode()]
+    assert sender.ended
@@ -0,0 +1,122 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import WebSocketDisconnect
+
+from app.core.flow_control import ConnectionLimiter, WebSocketChannel
+
+
+class FakeWebSocket:
+    """クライアントの代わりに送受信を記録するWebSocket"""
+
+    def __init__(self, send_delay=0.0):
+        self.send_delay = send_delay
+        self.incoming: asyncio.Queue = asyncio.Queue()
+        self.sent = []
+        self.close_code = None
+
+    async def receive(self):
+        return await self.incoming.get()
+
+    async def send_text(self, data):
+        await asyncio.sleep(self.send_delay)
+        self.sent.append(json.loads(data))
+
+    async def send_bytes(self, data):
+        await asyncio.sleep(self.send_delay)
+        self.sent.append(data)
+
+    async def close(self, code=1000):
+        self.close_code = code
+
+    def frame(self, data):
+        self.incoming.put_nowait({"type": "websocket.receive", "bytes": data})
+
+
+def make_channel(websocket, high=100, low=40, max_frame=1000, max_utterance=10000):
+    channel = WebSocketChannel(websocket, high, low, max_frame, max_utterance)
+    channel.start()
+    return channel
+
+
+@pytest.mark.asyncio
+async def test_slow_client_blocks_senders_and_drops_partials():
+    """遅いクライアントへの送信がウォーターマークで抑えられることのテスト"""
+    websocket = FakeWebSocket(send_delay=0.01)
+    channel = make_channel(websocket)
+
+    for index in range(10):
+        await channel.send_bytes(bytes(30))
+        assert channel.stats()["outbound_bytes"] <= 100 + 30
+        await channel.send_json({"type": "recognizing", "seq": index}, droppable=True)
+    await channel.close()
+
+    assert sum(isinstance(message, bytes) for message in websocket.sent) == 10
+    assert channel.dropped > 0
+
+
+@pytest.mark.asyncio
+async def test_fast_sender_is_paused_and_resumed():
+    """受信が溜まるとpause、処理が追いつくとresumeが送られることのテスト"""
+    websocket = FakeWebSocket()
+    channel = make_channel(websocket)
+    for _ in range(5):
+        websocket.frame(bytes(30))
+    await asyncio.sleep(0.01)
+    assert channel.paused
+    assert {"type": "flow", "action": "pause"} in websocket.sent
+
+    for _ in range(5):
+        assert await channel.receive_bytes() == bytes(30)
+    await asyncio.sleep(0.01)
+    assert not channel.paused
+    assert websocket.sent[-1] == {"type": "flow", "action": "resume"}
+    await channel.close()
+
+
+@pytest.mark.asyncio
+async def test_oversized_frame_closes_with_1009():
+    """大きすぎるフレームでエラーを送って1009で切断することのテスト"""
+    websocket = FakeWebSocket()
+    channel = make_channel(websocket, max_frame=50)
+    websocket.frame(bytes(51))
+
+    with pytest.raises(WebSocketDisconnect) as error:
+        await channel.receive_bytes()
+    await channel.close()
+
+    assert error.value.code == 1009
+    assert websocket.sent == [{"type": "error", "error": "Frame too large"}]
+    assert websocket.close_code == 1009
+
+
+@pytest.mark.asyncio
+async def test_utterance_limit_resets_after_final_result():
+    """発話ごとの上限が最終結果でリセットされることのテスト"""
+    websocket = FakeWebSocket()
+    channel = make_channel(websocket, high=1000, low=400, max_utterance=100)
+    for _ in range(3):
+        websocket.frame(bytes(40))
+        await channel.receive_bytes()
+        websocket.frame(bytes(40))
+        await channel.receive_bytes()
+        channel.end_utterance()
+
+    websocket.frame(bytes(60))
+    websocket.frame(bytes(60))
+    await channel.receive_bytes()
+    with pytest.raises(WebSocketDisconnect):
+        await channel.receive_bytes()
+    await channel.close()
+    assert websocket.sent == [{"type": "error", "error": "Utterance too long"}]
+
+
+def test_connection_limiter_rejects_over_capacity():
+    """接続数の上限を超えると拒否されることのテスト"""
+    limiter = ConnectionLimiter(max_connections=2)
+    assert limiter.try_acquire() and limiter.try_acquire()
+    assert not limiter.try_acquire()
+    limiter.release()
+    assert limiter.try_acquire()
+    assert limiter.stats() == {"active": 2, "max_connections": 2, "rejected": 1}
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from app.core.config import Settings
+from app.core.health import HealthMonitor
+
+
+class CountingProbe:
+    def __init__(self, error=None, delay=0.0):
+        self.calls = 0
+        self.error = error
+        self.delay = delay
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+
+
+@pytest.mark.asyncio
+async def test_readiness_is_served_from_cached_probe_results():
+    """readinessは呼び出しごとに上流を確認せず、キャッシュした結果を返すことのテスト"""
+    probe = CountingProbe()
+    monitor = HealthMonitor(interval=60, timeout=1, required=["openai"])
+    monitor.register("openai", probe)
+    assert monitor.readiness()["ready"] is False
+
+    await monitor.refresh()
+    for _ in range(10):
+        readiness = monitor.readiness()
+    assert readiness["ready"] is True
+    assert readiness["upstreams"]["openai"]["ok"] is True
+    assert probe.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_only_required_upstreams_affect_readiness():
+    """必須でない上流の失敗・タイムアウトではreadyのままであることのテスト"""
+    monitor = HealthMonitor(interval=60, timeout=0.05, required=["openai", "azure"])
+    monitor.register("openai", CountingProbe())
+    monitor.register("azure", CountingProbe(delay=1.0))
+    monitor.register("zonos", CountingProbe(error=ValueError("Zonos returned 502")))
+    await monitor.refresh()
+
+    readiness = monitor.readiness()
+    assert readiness["ready"] is False
+    assert readiness["upstreams"]["azure"]["error"] == "timed out after 0.05s"
+    assert readiness["upstreams"]["zonos"]["error"] == "Zonos returned 502"
+
+    monitor.required = ("openai",)
+    assert monitor.readiness()["ready"] is True
+
+
+@pytest.mark.asyncio
+async def test_worker_is_not_ready_until_warm_up_finishes():
+    """ウォームアップが終わるまでreadyにならず、失敗しても終了後はreadyになることのテスト"""
+    monitor = HealthMonitor(interval=0, timeout=1, required=["openai"])
+    monitor.register("openai", CountingProbe(error=ValueError("unreachable")))
+    release = asyncio.Event()
+
+    async def warm_up():
+        await release.wait()
+        raise RuntimeError("pool warm-up failed")
+
+    monitor.warm_up(warm_up())
+    await asyncio.sleep(0)
+    assert monitor.readiness()["warm_up"] == "running"
+    assert monitor.readiness()["ready"] is False
+
+    release.set()
+    await asyncio.sleep(0.01)
+    # Probes are off (interval 0), so only warm-up counts.
+    assert monitor.readiness()["warm_up"] == "done"
+    assert monitor.readiness()["ready"] is True
+    await monitor.stop()
+
+
+@pytest.mark.asyncio
+async def test_azure_is_not_required_by_default():
+    """既定ではAzureに接続できなくてもチャット専用のワーカーがreadyになることのテスト"""
+    settings = Settings(
+        openai_api_key="sk-" + "a" * 48,
+        azure_speech_key="a" * 32,
+        zonos_api_key="z_" + "a" * 32,
+    )
+    monitor = HealthMonitor(
+        interval=60, timeout=1, required=settings.health_required_upstreams.split(",")
+    )
+    monitor.register("openai", CountingProbe())
+    monitor.register("azure", CountingProbe(error=ValueError("Azure unreachable")))
+    await monitor.refresh()
+    assert monitor.readiness()["ready"] is True
@@ -0,0 +1,81 @@
+import aiohttp
+import pytest
+
+from app.core.config import Settings
+from app.core.http_client import UpstreamClients
+
+
+def make_settings(**overrides) -> Settings:
+    values = {
+        "openai_api_key": "sk-" + "a" * 48,
+        "azure_speech_key": "a" * 32,
+        "zonos_api_key": "z_" + "a" * 32,
+    }
+    values.update(overrides)
+    return Settings(**values)
+
+
+@pytest.mark.asyncio
+async def test_clients_are_shared_until_shutdown():
+    """接続プールが共有され、シャットダウンで閉じられることのテスト"""
+    clients = UpstreamClients()
+    await clients.startup(make_settings())
+
+    session = clients.zonos_session
+    openai_client = clients.openai_client
+    assert clients.zonos_session is session
+    assert clients.openai_client is openai_client
+
+    await clients.shutdown()
+    assert session.closed
+    assert clients.stats()["zonos"]["open"] is False
+
+
+@pytest.mark.asyncio
+async def test_pool_limits_follow_settings():
+    """プールの上限値が設定から反映されることのテスト"""
+    clients = UpstreamClients()
+    await clients.startup(make_settings(http_pool_limit=10, http_pool_limit_per_host=4))
+
+    connector = clients.zonos_session.connector
+    assert connector.limit == 10
+    assert connector.limit_per_host == 4
+    stats = clients.stats()
+    assert stats["zonos"]["limit_per_host"] == 4
+    assert stats["zonos"]["requests"] == 0
+
+    await clients.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_azure_probe_does_not_use_the_zonos_pool(monkeypatch):
+    """Azureの確認がZonosの接続プールと統計に含まれないことのテスト"""
+    class FakeResponse:
+        status = 200
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc_info):
+            return False
+
+    posted = []
+    urls = []
+
+    def post(session, url, **kwargs):
+        posted.append(session)
+        urls.append(url)
+        return FakeResponse()
+
+    monkeypatch.setattr(aiohttp.ClientSession, "post", post)
+    clients = UpstreamClients()
+    await clients.startup(make_settings(azure_speech_region="westeurope"))
+
+    await clients.probe_azure()
+    assert posted and posted[0] is not clients.zonos_session
+    # 設定したリージョンのトークン発行エンドポイントを確認する
+    assert urls == ["https://westeurope.api.cognitive.microsoft.com/sts/v1.0/issueToken"]
+    assert clients.stats()["zonos"]["requests"] == 0
+
+    await clients.shutdown()
+    assert posted[0].closed
@@ -0,0 +1,42 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.loop_watchdog import LoopWatchdog
+
+
+def block_the_loop(seconds):
+    time.sleep(seconds)
+
+
+@pytest.mark.asyncio
+async def test_blocking_call_is_reported_with_its_stack():
+    """ループを止めた処理がスタック付きで記録されることのテスト"""
+    watchdog = LoopWatchdog(interval=0.02, threshold=0.05, max_incidents=5)
+    watchdog.start()
+    try:
+        await asyncio.sleep(0.05)
+        block_the_loop(0.3)
+        await asyncio.sleep(0.05)
+    finally:
+        await watchdog.stop()
+
+    [incident] = watchdog.incidents()
+    assert "block_the_loop" in "".join(incident["stack"])
+    assert incident["blocked_ms"] >= 250
+    assert watchdog.stats()["max_lag_ms"] >= 250
+
+
+@pytest.mark.asyncio
+async def test_idle_loop_reports_no_incidents():
+    """ループが止まらなければ何も記録されないことのテスト"""
+    watchdog = LoopWatchdog(interval=0.02, threshold=0.1, max_incidents=5)
+    watchdog.start()
+    try:
+        await asyncio.sleep(0.2)
+    finally:
+        await watchdog.stop()
+
+    assert watchdog.incidents() == []
+    assert watchdog.stats()["ticks"] > 0
@@ -0,0 +1,79 @@
+import pytest
+
+from app.services.memory_service import (
+    InMemoryConversationStore, SQLiteConversationStore, estimate_tokens
+)
+
+
+def test_estimate_tokens_counts_japanese_per_character():
+    """日本語は1文字1トークン程度で見積もられることのテスト"""
+    assert estimate_tokens("こんにちは") > estimate_tokens("hello")
+    assert estimate_tokens("a" * 8) == estimate_tokens("") + 2
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    def factory(max_tokens):
+        if request.param == "memory":
+            return InMemoryConversationStore(max_tokens, summary_max_tokens=50, max_users=10)
+        return SQLiteConversationStore(str(tmp_path / "history.db"), max_tokens, 50)
+    return factory
+
+
+@pytest.mark.asyncio
+async def test_history_is_returned_in_order(make_store):
+    """会話履歴が発話順に返されることのテスト"""
+    store = make_store(max_tokens=1000)
+    await store.append("user", "user", "おはよう")
+    await store.append("user", "assistant", "おはようございます！")
+
+    assert await store.get_messages("user") == [
+        {"role": "user", "content": "おはよう"},
+        {"role": "assistant", "content": "おはようございます！"},
+    ]
+    assert await store.get_messages("someone-else") == []
+
+
+@pytest.mark.asyncio
+async def test_old_turns_are_trimmed_into_summary(make_store):
+    """トークン上限を超えた古い発話が要約に畳み込まれることのテスト"""
+    budget = estimate_tokens("二番目の発話です。") * 2
+    store = make_store(max_tokens=budget)
+    await store.append("user", "user", "最初の発話です。続きがあります。")
+    await store.append("user", "assistant", "了解しました。")
+    await store.append("user", "user", "二番目の発話です。")
+    await store.append("user", "assistant", "はい。")
+
+    messages = await store.get_messages("user")
+
+    assert messages[0]["role"] == "system"
+    assert "最初の発話です。" in messages[0]["content"]
+    assert "続きがあります。" not in messages[0]["content"]
+    assert messages[1:] == [
+        {"role": "user", "content": "二番目の発話です。"},
+        {"role": "assistant", "content": "はい。"},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_sqlite_history_survives_restart(tmp_path):
+    """SQLiteの会話履歴が再起動後も残ることのテスト"""
+    path = str(tmp_path / "history.db")
+    await SQLiteConversationStore(path, 1000, 50).append("user", "user", "覚えていてね")
+
+    restarted = SQLiteConversationStore(path, 1000, 50)
+
+    assert await restarted.get_messages("user") == [{"role": "user", "content": "覚えていてね"}]
+
+
+@pytest.mark.asyncio
+async def test_in_memory_store_evicts_least_recent_user():
+    """保持する会話数の上限を超えた場合に最も古いユーザーが追い出されることのテスト"""
+    store = InMemoryConversationStore(1000, summary_max_tokens=50, max_users=2)
+    await store.append("a", "user", "1")
+    await store.append("b", "user", "2")
+    await store.get_messages("a")
+    await store.append("c", "user", "3")
+
+    assert await store.get_messages("b") == []
+    assert await store.get_messages("a") != []
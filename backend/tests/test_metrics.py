@@ -0,0 +1,65 @@
+from fastapi import FastAPI, WebSocket
+from fastapi.testclient import TestClient
+
+from app.core.metrics import MetricsMiddleware, MetricsRegistry, metrics
+
+
+def test_histogram_renders_cumulative_buckets():
+    """ヒストグラムが累積バケット形式で出力されることのテスト"""
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Latency.", ["route"], buckets=(0.1, 1.0))
+    histogram.observe(0.05, route="/a")
+    histogram.observe(0.5, route="/a")
+    histogram.observe(5.0, route="/a")
+
+    lines = registry.render().splitlines()
+
+    assert '# TYPE latency_seconds histogram' in lines
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="/a",le="1"} 2' in lines
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'latency_seconds_sum{route="/a"} 5.55' in lines
+    assert 'latency_seconds_count{route="/a"} 3' in lines
+
+
+def test_registry_reuses_instruments_and_renders_collectors():
+    """同名の計測器が再利用され、コレクターの値が出力されることのテスト"""
+    registry = MetricsRegistry()
+    registry.counter("requests_total", "Requests.").inc()
+    registry.counter("requests_total", "Requests.").inc(2)
+    registry.add_collector(lambda: [("cache_hit_rate", ("cache",), ("tts",), 0.5)])
+
+    lines = registry.render().splitlines()
+
+    assert "requests_total 3" in lines
+    assert 'cache_hit_rate{cache="tts"} 0.5' in lines
+
+
+def test_middleware_records_routes_and_websocket_bytes():
+    """ミドルウェアがルート別の遅延とWebSocketの送受信バイト数を記録することのテスト"""
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        return {"id": item_id}
+
+    @app.websocket("/echo")
+    async def echo(websocket: WebSocket):
+        await websocket.accept()
+        await websocket.send_bytes(await websocket.receive_bytes() * 2)
+        await websocket.close()
+
+    client = TestClient(app)
+    client.get("/items/1")
+    client.get("/items/2")
+    with client.websocket_connect("/echo") as websocket:
+        websocket.send_bytes(b"abc")
+        websocket.receive_bytes()
+
+    histogram = metrics.histogram("http_request_duration_seconds", "")
+    assert histogram.count(method="GET", route="/items/{item_id}", status=200) == 2
+    websocket_bytes = metrics.counter("websocket_bytes_total", "")
+    assert websocket_bytes.value(route="/echo", direction="in") == 3
+    assert websocket_bytes.value(route="/echo", direction="out") == 6
+    assert metrics.gauge("websocket_connections", "").value(route="/echo") == 0
@@ -0,0 +1,127 @@
+import time
+
+import pytest
+
+from app.services.model_router import ModelRouter, RoutingRule, extract_features
+
+SMALL_TALK = RoutingRule.parse({
+    "name": "small_talk",
+    "intents": ["greeting", "smalltalk"],
+    "max_chars": 80,
+    "models": ["fast-model", "big-model"],
+    "max_latency": 1.0,
+})
+
+
+def make_router(mode="on", overrides=None, probe_interval=30.0):
+    return ModelRouter(
+        "big-model", [SMALL_TALK], mode=mode, overrides=overrides,
+        max_error_rate=0.2, min_samples=5, probe_interval=probe_interval
+    )
+
+
+def test_features_cover_length_language_and_intent():
+    """文字数・言語・意図を判定できることのテスト"""
+    assert extract_features("こんにちは！") == (6, "ja", "greeting")
+    assert extract_features("Hello there").intent == "greeting"
+    assert extract_features("Hello there").language == "en"
+    assert extract_features("今日は天気がいいね").intent == "smalltalk"
+    assert extract_features("明日は晴れるかな").intent == "question"
+    assert extract_features("量子コンピュータについて説明して").intent == "complex"
+    assert extract_features("あ" * 300).intent == "complex"
+
+
+def test_rules_route_small_talk_to_the_fast_model():
+    """雑談は速いモデル、複雑な質問は既定のモデルに振り分けられることのテスト"""
+    router = make_router()
+    assert router.route("おはよう", "user").model == "fast-model"
+    decision = router.route("なぜ空は青いのか詳しく教えて", "user")
+    assert (decision.model, decision.reason) == ("big-model", "default")
+
+
+def test_slow_or_failing_model_is_skipped():
+    """遅い・失敗の多いモデルは次の候補に切り替わることのテスト"""
+    router = make_router()
+    for _ in range(5):
+        router.record("fast-model", 1.5)
+    assert router.route("おはよう", "user").model == "big-model"
+
+    router = make_router()
+    for _ in range(5):
+        router.record("fast-model", None, ok=False)
+    assert router.route("おはよう", "user").model == "big-model"
+
+
+def test_skipped_model_is_probed_and_recovers():
+    """飛ばされたモデルにも一定間隔で1件送り、成功すれば再び選ばれることのテスト"""
+    router = make_router(probe_interval=0.01)
+    for _ in range(5):
+        router.record("fast-model", None, ok=False)
+    assert router.route("おはよう", "user").model == "big-model"
+
+    time.sleep(0.02)
+    assert router.route("おはよう", "user").model == "fast-model"
+    # 確認の結果が出るまでは他のリクエストを送らない
+    assert router.route("おはよう", "user").model == "big-model"
+    router.record("fast-model", None, ok=False)
+    assert router.route("おはよう", "user").model == "big-model"
+
+    time.sleep(0.02)
+    assert router.route("おはよう", "user").model == "fast-model"
+    router.record("fast-model", 0.1)
+    assert router.route("おはよう", "user").model == "fast-model"
+    assert router.stats()["models"]["fast-model"]["requests"] == 7
+
+
+def test_probe_that_never_reports_back_expires():
+    """結果が記録されなかった確認リクエスト（キャンセルなど）が次の間隔で送り直されることのテスト"""
+    router = make_router(probe_interval=0.01)
+    for _ in range(5):
+        router.record("fast-model", None, ok=False)
+    assert router.route("おはよう", "user").model == "big-model"
+
+    time.sleep(0.02)
+    assert router.route("おはよう", "user").model == "fast-model"
+    # 確認リクエストがキャンセルされ、結果が記録されない
+    assert router.route("おはよう", "user").model == "big-model"
+
+    time.sleep(0.02)
+    assert router.route("おはよう", "user").model == "fast-model"
+    router.record("fast-model", 0.1)
+    assert router.route("おはよう", "user").model == "fast-model"
+
+
+def test_shadow_mode_does_not_probe():
+    """シャドーモードでは呼び出されないモデルへの確認が始まらないことのテスト"""
+    router = make_router(mode="shadow", probe_interval=0.01)
+    for _ in range(5):
+        router.record("fast-model", None, ok=False)
+    router.route("おはよう", "user")
+    time.sleep(0.02)
+
+    assert router.decide("おはよう", "user").model == "big-model"
+    assert not router._probing
+
+
+def test_user_override_wins():
+    """ユーザーごとの指定がルールより優先されることのテスト"""
+    router = make_router(overrides={"vip": "big-model"})
+    decision = router.route("おはよう", "vip")
+    assert (decision.model, decision.reason) == ("big-model", "override")
+
+
+def test_shadow_mode_keeps_the_default_model():
+    """シャドーモードでは判定だけ行い、既定のモデルを使うことのテスト"""
+    router = make_router(mode="shadow")
+    assert router.decide("おはよう", "user").model == "fast-model"
+    decision = router.route("おはよう", "user")
+    assert (decision.model, decision.reason) == ("big-model", "shadow")
+    assert make_router(mode="off").route("おはよう", "user").model == "big-model"
+
+
+def test_invalid_rule_is_rejected():
+    """不正なルールはValueErrorになることのテスト"""
+    with pytest.raises(ValueError):
+        RoutingRule.parse({"intents": ["greeting"]})
+    with pytest.raises(ValueError):
+        RoutingRule.parse({"model": "fast-model", "intents": ["chitchat"]})
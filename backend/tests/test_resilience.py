@@ -0,0 +1,179 @@
+import asyncio
+
+import pytest
+
+from app.core.resilience import (
+    CircuitBreaker, ResilientUpstream, UpstreamError, UpstreamTimeoutError,
+    UpstreamUnavailableError
+)
+
+
+def make_upstream(**overrides):
+    options = {
+        "deadline": 1.0, "max_retries": 2, "backoff_base": 0.001, "backoff_max": 0.01,
+        "hedge_percentile": 0.0, "hedge_min_samples": 1,
+        "breaker": CircuitBreaker(failure_threshold=3, reset_timeout=60.0),
+    }
+    options.update(overrides)
+    return ResilientUpstream("test", **options)
+
+
+@pytest.mark.asyncio
+async def test_transient_failures_are_retried():
+    """一時的な失敗がリトライされることのテスト"""
+    upstream = make_upstream()
+    attempts = 0
+
+    async def flaky():
+        nonlocal attempts
+        attempts += 1
+        if attempts < 3:
+            raise UpstreamError(503, "busy")
+        return "ok"
+
+    assert await upstream.call(flaky) == "ok"
+    assert upstream.stats()["retries"] == 2
+    assert upstream.breaker.state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried():
+    """4xxエラーはリトライせず、サーキットも開かないことのテスト"""
+    upstream = make_upstream(breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60.0))
+    attempts = 0
+
+    async def rejected():
+        nonlocal attempts
+        attempts += 1
+        raise UpstreamError(400, "bad request")
+
+    with pytest.raises(UpstreamError):
+        await upstream.call(rejected)
+    assert attempts == 1
+    assert upstream.breaker.state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_only_network_failures_without_a_status_are_retried():
+    """ステータスのないエラーは通信エラーとタイムアウトだけがリトライされることのテスト"""
+    upstream = make_upstream()
+    attempts = 0
+
+    async def broken():
+        nonlocal attempts
+        attempts += 1
+        raise ValueError("Speech synthesis failed")
+
+    with pytest.raises(ValueError):
+        await upstream.call(broken)
+    assert attempts == 1
+
+    async def disconnected():
+        nonlocal attempts
+        attempts += 1
+        if attempts < 3:
+            raise ConnectionResetError("reset by peer")
+        return "ok"
+
+    attempts = 0
+    assert await upstream.call(disconnected) == "ok"
+    assert attempts == 3
+
+
+@pytest.mark.asyncio
+async def test_deadline_bounds_slow_calls():
+    """期限を過ぎた呼び出しがタイムアウトエラーになることのテスト"""
+    upstream = make_upstream(deadline=0.02)
+
+    async def hang():
+        await asyncio.sleep(1)
+
+    with pytest.raises(UpstreamTimeoutError):
+        await upstream.call(hang)
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_fails_fast_until_reset():
+    """連続失敗でサーキットが開き、リセット後に試行が再開されることのテスト"""
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.05)
+    upstream = make_upstream(max_retries=0, breaker=breaker)
+    calls = 0
+
+    async def down():
+        nonlocal calls
+        calls += 1
+        raise ConnectionError("refused")
+
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            await upstream.call(down)
+    with pytest.raises(UpstreamUnavailableError):
+        await upstream.call(down)
+    assert calls == 3
+
+    await asyncio.sleep(0.06)
+
+    async def recovered():
+        return "ok"
+
+    assert breaker.state == "half_open"
+    assert await upstream.call(recovered) == "ok"
+    assert breaker.state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_cancelled_trial_call_frees_the_half_open_slot():
+    """半開状態の試行がキャンセルされても、次の呼び出しで試行が再開されることのテスト"""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    upstream = make_upstream(max_retries=0, breaker=breaker)
+
+    async def down():
+        raise ConnectionError("refused")
+
+    with pytest.raises(ConnectionError):
+        await upstream.call(down)
+    await asyncio.sleep(0.02)
+
+    trial = asyncio.create_task(upstream.call(lambda: asyncio.sleep(10)))
+    await asyncio.sleep(0)
+    with pytest.raises(UpstreamUnavailableError):
+        await upstream.call(down)
+    trial.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await trial
+
+    async def recovered():
+        return "ok"
+
+    assert await upstream.call(recovered) == "ok"
+    assert breaker.state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_slow_attempt_is_hedged():
+    """応答時間のパーセンタイルを超えた呼び出しにヘッジが送られることのテスト"""
+    upstream = make_upstream(hedge_percentile=0.5, hedge_min_samples=1)
+    upstream.latencies.add(0.01)
+    delays = iter([1.0, 0.0])
+
+    async def call():
+        await asyncio.sleep(next(delays))
+        return "ok"
+
+    assert await asyncio.wait_for(upstream.call(call), 0.5) == "ok"
+    assert upstream.stats()["hedges"] == 1
+    assert upstream.stats()["hedge_wins"] == 1
+
+
+@pytest.mark.asyncio
+async def test_unhedged_calls_do_not_set_the_hedge_delay():
+    """ヘッジしない呼び出し（ストリームの開始など）の応答時間がヘッジの判定に使われないことのテスト"""
+    upstream = make_upstream(hedge_percentile=0.5, hedge_min_samples=1)
+
+    async def call():
+        return "ok"
+
+    assert await upstream.call(call, hedge=False) == "ok"
+    assert len(upstream.latencies) == 0
+    assert await upstream.call(call) == "ok"
+    assert len(upstream.latencies) == 1
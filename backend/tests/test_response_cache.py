@@ -0,0 +1,49 @@
+import time
+
+from app.services.response_cache import ResponseCache, normalize_message
+
+PROMPT = "You are a friendly Japanese-speaking AI companion"
+
+
+def make_cache(**overrides) -> ResponseCache:
+    options = {"similarity_threshold": 0.8, "ttl_seconds": 60, "max_entries": 100}
+    options.update(overrides)
+    return ResponseCache(**options)
+
+
+def test_normalize_message_ignores_case_width_and_punctuation():
+    """大文字小文字・全角半角・記号の違いが正規化されることのテスト"""
+    assert normalize_message("How are you?") == normalize_message("how are you")
+    assert normalize_message("おはよう！！") == normalize_message("おはよう")
+    assert normalize_message("ＡＢＣ") == "abc"
+
+
+def test_exact_and_approximate_hits():
+    """完全一致と近似一致でキャッシュがヒットすることのテスト"""
+    cache = make_cache()
+    cache.put("おはようございます", PROMPT, "おはよう！")
+
+    assert cache.get("おはようございます！", PROMPT) == "おはよう！"
+    assert cache.get("おはようございますー", PROMPT) == "おはよう！"
+    assert cache.get("こんばんは", PROMPT) is None
+    assert cache.get("おはようございます", "another prompt") is None
+
+    stats = cache.stats()
+    assert stats["exact_hits"] == 1
+    assert stats["approximate_hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["hit_rate"] == 0.5
+
+
+def test_entries_expire_and_are_evicted():
+    """有効期限切れと件数上限による追い出しのテスト"""
+    cache = make_cache(ttl_seconds=0.01, max_entries=1)
+    cache.put("hello", PROMPT, "hi")
+    cache.put("good night", PROMPT, "sleep well")
+    assert cache.stats()["evictions"] == 1
+    assert cache.get("hello", PROMPT) is None
+
+    time.sleep(0.02)
+    assert cache.get("good night", PROMPT) is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["entries"] == 0
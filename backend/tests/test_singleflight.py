@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from app.core.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_with_same_key_share_result():
+    """同じキーの同時呼び出しが1回の呼び出しを共有することのテスト"""
+    group = SingleFlight()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    results = await asyncio.gather(*(group.do("greeting", fetch) for _ in range(5)))
+
+    assert results == [1] * 5
+    assert group.stats() == {"calls": 1, "coalesced": 4, "in_flight": 0}
+    assert await group.do("greeting", fetch) == 2
+
+
+@pytest.mark.asyncio
+async def test_errors_are_shared_by_every_caller():
+    """上流のエラーが待機中の全ての呼び出し元に伝わることのテスト"""
+    group = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream down")
+
+    results = await asyncio.gather(
+        *(group.do("key", fail) for _ in range(3)), return_exceptions=True
+    )
+
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_cancelling_one_caller_keeps_shared_call_running():
+    """1つの呼び出し元のキャンセルが共有呼び出しを止めないことのテスト"""
+    group = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return "audio"
+
+    first = asyncio.create_task(group.do("key", fetch))
+    second = asyncio.create_task(group.do("key", fetch))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == "audio"
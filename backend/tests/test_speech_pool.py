@@ -0,0 +1,89 @@
+import asyncio
+import itertools
+
+import pytest
+
+from app.services.speech_pool import SparePool, SpeechObjectPool
+
+
+def counter_factory():
+    counter = itertools.count()
+    return lambda: next(counter)
+
+
+@pytest.mark.asyncio
+async def test_warm_objects_are_reused():
+    """事前生成したオブジェクトが再利用されることのテスト"""
+    pool = SpeechObjectPool("synthesizer", counter_factory(), size=2, max_idle_seconds=60)
+    await pool.warm(1)
+
+    async with pool.acquire() as first:
+        pass
+    async with pool.acquire() as second:
+        pass
+
+    assert first == second == 0
+    assert pool.stats()["created"] == 1
+    assert pool.stats()["reused"] == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_object_is_replaced():
+    """失敗したオブジェクトが破棄され、新しいものに置き換えられることのテスト"""
+    pool = SpeechObjectPool("synthesizer", counter_factory(), size=1, max_idle_seconds=60)
+    with pytest.raises(ValueError):
+        async with pool.acquire():
+            raise ValueError("synthesis failed")
+    await asyncio.sleep(0.05)
+
+    async with pool.acquire() as replacement:
+        pass
+
+    assert replacement == 1
+    assert pool.stats()["discarded"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_idle_objects_are_not_handed_out():
+    """長時間待機したオブジェクトが再利用されないことのテスト"""
+    pool = SpeechObjectPool("synthesizer", counter_factory(), size=1, max_idle_seconds=0)
+    await pool.warm()
+    await asyncio.sleep(0.01)
+
+    async with pool.acquire() as item:
+        pass
+
+    assert item == 1
+
+
+@pytest.mark.asyncio
+async def test_unusable_idle_objects_are_not_handed_out():
+    """接続が切れたと判定されたオブジェクトが再利用されないことのテスト"""
+    closed = set()
+    pool = SpeechObjectPool(
+        "synthesizer", counter_factory(), size=1, max_idle_seconds=60,
+        is_usable=lambda item: item not in closed
+    )
+    await pool.warm()
+    closed.add(0)
+
+    async with pool.acquire() as item:
+        pass
+
+    assert item == 1
+    assert pool.stats()["discarded"] == 1
+
+
+@pytest.mark.asyncio
+async def test_spare_pool_hands_out_prebuilt_objects_and_refills():
+    """予備のオブジェクトが渡され、バックグラウンドで補充されることのテスト"""
+    pool = SparePool("recognizer", counter_factory(), size=1, max_idle_seconds=60)
+    await pool.warm()
+
+    assert await pool.take() == 0
+    await asyncio.sleep(0.05)
+    assert await pool.take() == 1
+
+    stats = pool.stats()
+    assert stats["spare_hits"] == 2
+    assert stats["spare_misses"] == 0
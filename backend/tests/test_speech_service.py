@@ -0,0 +1,378 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import azure.cognitiveservices.speech as speechsdk
+import numpy as np
+import pytest
+
+from app.core.audio_cache import AudioCache
+from app.core.config import get_settings
+from app.services import speech_service as speech_service_module
+from app.services.speech_service import SpeechService
+from tests.test_flow_control import FakeWebSocket, make_channel
+
+SYNTHESIS_SECONDS = 0.2
+
+
+class FakeResultFuture:
+    def __init__(self, tracker: "ConcurrencyTracker"):
+        self._tracker = tracker
+
+    def get(self):
+        with self._tracker:
+            time.sleep(SYNTHESIS_SECONDS)
+        return SimpleNamespace(
+            reason=speechsdk.ResultReason.SynthesizingAudioCompleted,
+            audio_data=b"audio",
+        )
+
+
+class ConcurrencyTracker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+
+    def __enter__(self):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+
+    def __exit__(self, *exc_info):
+        with self._lock:
+            self.active -= 1
+
+
+class FakeSignal:
+    def __init__(self):
+        self.callbacks = []
+
+    def connect(self, callback):
+        self.callbacks.append(callback)
+
+    def fire(self, evt):
+        for callback in self.callbacks:
+            callback(evt)
+
+    def disconnect_all(self):
+        self.callbacks.clear()
+
+
+class FakeConnection:
+    opened = []
+
+    def __init__(self):
+        self.disconnected = FakeSignal()
+
+    @classmethod
+    def from_speech_synthesizer(cls, synthesizer):
+        return cls()
+
+    @classmethod
+    def from_recognizer(cls, recognizer):
+        return cls()
+
+    def open(self, for_continuous_recognition):
+        FakeConnection.opened.append(self)
+
+
+@pytest.fixture(autouse=True)
+def fake_connection(monkeypatch):
+    monkeypatch.setattr(speech_service_module.speechsdk, "Connection", FakeConnection)
+    monkeypatch.setattr(FakeConnection, "opened", [])
+
+
+@pytest.fixture
+def tracker(monkeypatch):
+    tracker = ConcurrencyTracker()
+
+    class FakeSynthesizer:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def speak_text_async(self, text):
+            return FakeResultFuture(tracker)
+
+    monkeypatch.setattr(speech_service_module.speechsdk, "SpeechSynthesizer", FakeSynthesizer)
+    return tracker
+
+
+@pytest.mark.asyncio
+async def test_synthesis_does_not_block_event_loop(tracker):
+    """音声合成中もイベントループが他の処理を継続できることのテスト"""
+    service = SpeechService(max_concurrency=2)
+    service.cache = AudioCache(max_bytes=0)
+    ticks = 0
+    done = asyncio.Event()
+
+    async def ticker():
+        nonlocal ticks
+        while not done.is_set():
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    ticker_task = asyncio.create_task(ticker())
+    started = time.monotonic()
+    results = await asyncio.gather(*(service.text_to_speech(f"こんにちは{i}") for i in range(4)))
+    elapsed = time.monotonic() - started
+    done.set()
+    await ticker_task
+
+    assert results == [b"audio"] * 4
+    assert service.synthesizer_pool.stats()["created"] == 2
+    assert service.synthesizer_pool.stats()["reused"] == 2
+    # Four 200ms syntheses at concurrency 2 take two rounds; a blocked loop
+    # would have let the ticker run only a handful of times.
+    assert elapsed >= 2 * SYNTHESIS_SECONDS
+    assert ticks >= 20
+    assert tracker.peak == 2
+
+
+class FakeRecognizer:
+    instances = []
+
+    def __init__(self, *args, **kwargs):
+        self.recognizing = FakeSignal()
+        self.recognized = FakeSignal()
+        self.canceled = FakeSignal()
+        self.session_stopped = FakeSignal()
+        FakeRecognizer.instances.append(self)
+
+    def start_continuous_recognition_async(self):
+        return SimpleNamespace(get=lambda: None)
+
+    def stop_continuous_recognition_async(self):
+        return SimpleNamespace(get=lambda: self.session_stopped.fire(SimpleNamespace()))
+
+
+class FakePushStream:
+    def __init__(self):
+        self.frames = []
+        self.closed = False
+
+    def write(self, audio_data):
+        self.frames.append(audio_data)
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_recognition_session_streams_partial_and_final_events(monkeypatch):
+    """1つの認識セッションで途中結果と確定結果が順に届くことのテスト"""
+    monkeypatch.setattr(get_settings(), "vad_enabled", False)
+    FakeRecognizer.instances.clear()
+    monkeypatch.setattr(speech_service_module.speechsdk, "SpeechRecognizer", FakeRecognizer)
+    monkeypatch.setattr(
+        speech_service_module.speechsdk.audio, "PushAudioInputStream", FakePushStream
+    )
+    monkeypatch.setattr(
+        speech_service_module.speechsdk.audio, "AudioConfig", lambda stream: None
+    )
+    service = SpeechService()
+    session = await service.start_recognition_session()
+    session.write(b"frame-1")
+    session.write(b"frame-2")
+
+    recognizer = FakeRecognizer.instances[0]
+
+    def produce():
+        recognizer.recognizing.fire(SimpleNamespace(result=SimpleNamespace(text="こん")))
+        recognizer.recognized.fire(SimpleNamespace(result=SimpleNamespace(
+            text="こんにちは", reason=speechsdk.ResultReason.RecognizedSpeech
+        )))
+
+    thread = threading.Thread(target=produce)
+    thread.start()
+    thread.join()
+    await session.stop()
+
+    events = [event async for event in session.events()]
+    assert events == [
+        {"type": "recognizing", "text": "こん", "is_final": False},
+        {"type": "recognized", "text": "こんにちは", "is_final": True},
+    ]
+    assert session._recognizer is recognizer
+    assert session._stream.frames == [b"frame-1", b"frame-2"]
+    assert session._stream.closed
+
+
+@pytest.mark.asyncio
+async def test_recognition_session_reports_every_utterance_end():
+    """確定結果・発話なしの結果・VADによる発話の終わりのたびに通知されることのテスト"""
+    from app.core.audio_session import AudioFormat
+    from app.core.vad import VoiceActivityDetector
+    from app.services.speech_service import RecognitionSession, RecognizerHandle
+
+    ends = []
+    recognizer = FakeRecognizer()
+    vad = VoiceActivityDetector(
+        AudioFormat("pcm", 16000), margin_db=10.0, min_speech_db=-45.0,
+        pre_roll_ms=100, end_silence_ms=200
+    )
+    session = RecognitionSession(
+        RecognizerHandle(FakePushStream(), recognizer, None), None, vad, 0,
+        lambda: ends.append("end")
+    )
+
+    samples = np.arange(16000 // 2) / 16000
+    session.write((8000 * np.sin(2 * np.pi * 440 * samples)).astype("<i2").tobytes())
+    session.write(bytes(16000))
+    assert ends == ["end"]
+
+    def produce():
+        recognizer.recognized.fire(SimpleNamespace(result=SimpleNamespace(
+            text="", reason=speechsdk.ResultReason.NoMatch
+        )))
+
+    thread = threading.Thread(target=produce)
+    thread.start()
+    thread.join()
+    await asyncio.sleep(0)
+    assert ends == ["end", "end"]
+
+
+@pytest.mark.asyncio
+async def test_pause_within_a_sentence_does_not_end_the_utterance(monkeypatch):
+    """既定の設定では文中の息継ぎで発話が区切られず、会話ターンが分割されないことのテスト"""
+    FakeRecognizer.instances.clear()
+    monkeypatch.setattr(speech_service_module.speechsdk, "SpeechRecognizer", FakeRecognizer)
+    monkeypatch.setattr(
+        speech_service_module.speechsdk.audio, "PushAudioInputStream", FakePushStream
+    )
+    monkeypatch.setattr(
+        speech_service_module.speechsdk.audio, "AudioConfig", lambda stream: None
+    )
+    ends = []
+    # The same call /api/converse makes for a default-format session.
+    session = await SpeechService().start_recognition_session(
+        on_utterance_end=lambda: ends.append("end")
+    )
+    samples = np.arange(16000 // 2) / 16000
+    speech = (8000 * np.sin(2 * np.pi * 440 * samples)).astype("<i2").tobytes()
+
+    session.write(speech)
+    session.write(bytes(16000 * 2 * 6 // 10))
+    session.write(speech)
+    assert ends == []
+    # The 600 ms pause reaches Azure as it is, with no flush forcing a result.
+    assert sum(map(len, session._stream.frames)) == 2 * len(speech) + 16000 * 2 * 6 // 10
+
+    session.write(bytes(16000 * 2 * 12 // 10))
+    assert ends == ["end"]
+
+
+@pytest.mark.asyncio
+async def test_idle_microphone_is_not_closed_for_a_long_utterance(monkeypatch):
+    """無音を上限以上送り続けても発話が長すぎるとして切断されないことのテスト"""
+    monkeypatch.setattr(speech_service_module.speechsdk, "SpeechRecognizer", FakeRecognizer)
+    monkeypatch.setattr(
+        speech_service_module.speechsdk.audio, "PushAudioInputStream", FakePushStream
+    )
+    monkeypatch.setattr(
+        speech_service_module.speechsdk.audio, "AudioConfig", lambda stream: None
+    )
+    websocket = FakeWebSocket()
+    channel = make_channel(
+        websocket, high=10 ** 6, low=10 ** 5, max_frame=4000, max_utterance=32000
+    )
+    session = await SpeechService().start_recognition_session(
+        on_utterance_end=channel.end_utterance
+    )
+    noise = np.random.default_rng(0).normal(0, 30, 1600).astype("<i2").tobytes()
+
+    # Three seconds of low noise in 100 ms frames, three times the limit.
+    for _ in range(30):
+        websocket.frame(noise)
+        session.write(await channel.receive_bytes())
+    await channel.close()
+
+    assert websocket.sent == []
+    assert websocket.close_code is None
+    assert session._stream.frames == []
+
+
+@pytest.mark.asyncio
+async def test_stream_text_to_speech_yields_chunks_in_order(monkeypatch):
+    """合成中の音声チャンクが生成順に届くことのテスト"""
+
+    class StreamingSynthesizer:
+        def __init__(self, *args, **kwargs):
+            self.synthesizing = FakeSignal()
+
+        def speak_text_async(self, text):
+            def get():
+                for chunk in (b"one", b"two", b"three"):
+                    evt = SimpleNamespace(result=SimpleNamespace(audio_data=chunk))
+                    self.synthesizing.fire(evt)
+                return SimpleNamespace(reason=speechsdk.ResultReason.SynthesizingAudioCompleted)
+            return SimpleNamespace(get=get)
+
+    monkeypatch.setattr(speech_service_module.speechsdk, "SpeechSynthesizer", StreamingSynthesizer)
+    service = SpeechService()
+    service.cache = AudioCache(max_bytes=1024)
+
+    chunks = [chunk async for chunk in service.stream_text_to_speech("こんにちは")]
+    cached = [chunk async for chunk in service.stream_text_to_speech("こんにちは")]
+
+    assert chunks == [b"one", b"two", b"three"]
+    assert cached == [b"onetwothree"]
+    assert service.stream_synthesizer_pool.stats()["idle"] == 1
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_syntheses_share_one_call(tracker):
+    """同じテキストの同時合成が1回の上流呼び出しにまとめられることのテスト"""
+    service = SpeechService(max_concurrency=4)
+    service.cache = AudioCache(max_bytes=0)
+    coalesced_before = service.single_flight.stats()["coalesced"]
+
+    results = await asyncio.gather(*(service.text_to_speech("お知らせです") for _ in range(3)))
+
+    assert results == [b"audio"] * 3
+    assert tracker.peak == 1
+    assert service.single_flight.stats()["coalesced"] - coalesced_before == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_synthesis_keeps_its_slot_until_azure_answers(tracker):
+    """キャンセルされた合成も、Azureの応答までは受付枠・同時実行数の枠・合成器を占有することのテスト"""
+    service = SpeechService(max_concurrency=1)
+    service.cache = AudioCache(max_bytes=0)
+
+    in_flight_before = service.admission.in_flight
+
+    abandoned = asyncio.create_task(service._synthesize("a", "キャンセル"))
+    await asyncio.sleep(0.05)
+    abandoned.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await abandoned
+
+    assert service._semaphore.locked()
+    assert service.admission.in_flight == in_flight_before + 1
+    assert await service._synthesize("b", "次の合成") == b"audio"
+    # The next call waited for the abandoned one instead of overlapping it.
+    assert tracker.peak == 1
+    assert service.synthesizer_pool.stats()["created"] == 1
+    assert service.admission.in_flight == in_flight_before
+
+
+@pytest.mark.asyncio
+async def test_synthesizer_with_a_closed_connection_is_not_reused(tracker, monkeypatch):
+    """サービス側で接続が切断された合成器が再利用されないことのテスト"""
+    monkeypatch.setattr(get_settings(), "azure_pool_preconnect", True)
+    service = SpeechService(max_concurrency=1)
+    service.cache = AudioCache(max_bytes=0)
+
+    await service._synthesize("a", "一回目")
+    await service._synthesize("b", "二回目")
+    assert service.synthesizer_pool.stats()["created"] == 1
+
+    FakeConnection.opened[0].disconnected.fire(SimpleNamespace())
+    await service._synthesize("c", "三回目")
+
+    stats = service.synthesizer_pool.stats()
+    assert stats["created"] == 2
+    assert stats["discarded"] == 1
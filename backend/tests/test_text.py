@@ -0,0 +1,24 @@
+from app.core.text import SentenceBuffer, split_sentences
+
+
+def test_split_japanese_and_english_sentences():
+    """日本語と英語の文境界で分割されることのテスト"""
+    text = "こんにちは！今日はいい天気ですね。How are you? I'm fine."
+    assert split_sentences(text) == [
+        "こんにちは！", "今日はいい天気ですね。", "How are you?", "I'm fine."
+    ]
+
+
+def test_split_keeps_decimal_numbers_together():
+    """小数点で文が分割されないことのテスト"""
+    assert split_sentences("Pi is 3.14 or so. 本当？") == ["Pi is 3.14 or so.", "本当？"]
+
+
+def test_sentence_buffer_releases_sentences_as_tokens_arrive():
+    """ストリーミングされたトークンから完成した文だけが返されることのテスト"""
+    buffer = SentenceBuffer()
+    assert buffer.feed("おはよう") == []
+    assert buffer.feed("ございます。今日") == ["おはようございます。"]
+    assert buffer.feed("は") == []
+    assert buffer.flush() == "今日は"
+    assert buffer.flush() is None
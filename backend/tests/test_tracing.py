@@ -0,0 +1,84 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.tracing import CollectorExporter, Tracer
+
+
+def make_tracer(sample_rate=1.0, slow_threshold=0.0):
+    exporter = CollectorExporter(max_traces=10)
+    return Tracer(exporter, sample_rate=sample_rate, slow_threshold=slow_threshold), exporter
+
+
+@pytest.mark.asyncio
+async def test_spans_nest_under_trace_across_tasks():
+    """タスクをまたいでスパンがトレースの下に記録されることのテスト"""
+    tracer, exporter = make_tracer()
+
+    async def synthesize():
+        with tracer.span("tts", chars=3):
+            await asyncio.sleep(0)
+
+    with tracer.trace("converse.turn", client_id=1, user_id="user"):
+        with tracer.span("llm"):
+            await asyncio.sleep(0)
+        await asyncio.create_task(synthesize())
+        tracer.record_span("recognition", time.monotonic() - 0.5, time.monotonic())
+
+    [trace] = exporter.traces()
+    assert trace["attributes"] == {"client_id": 1, "user_id": "user"}
+    root, *children = trace["spans"]
+    assert [span["name"] for span in children] == ["llm", "tts", "recognition"]
+    assert all(span["parent_id"] == root["span_id"] for span in children)
+    assert children[1]["attributes"] == {"chars": 3}
+
+
+@pytest.mark.asyncio
+async def test_unsampled_traces_are_kept_only_when_slow():
+    """サンプリングされないトレースは遅い場合のみ記録されることのテスト"""
+    tracer, exporter = make_tracer(sample_rate=0.0, slow_threshold=0.02)
+
+    with tracer.trace("fast"):
+        pass
+    with tracer.trace("slow"):
+        await asyncio.sleep(0.03)
+
+    assert [trace["name"] for trace in exporter.traces()] == ["slow"]
+    assert exporter.traces()[0]["sampled"] is False
+
+
+@pytest.mark.asyncio
+async def test_cancelled_and_failed_spans_are_marked():
+    """キャンセル・失敗したスパンの状態が記録されることのテスト"""
+    tracer, exporter = make_tracer()
+
+    async def turn():
+        with tracer.trace("turn"):
+            await asyncio.sleep(1)
+
+    task = asyncio.create_task(turn())
+    await asyncio.sleep(0)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    with pytest.raises(ValueError):
+        with tracer.trace("failing"):
+            raise ValueError("upstream down")
+
+    cancelled, failed = exporter.traces()
+    assert cancelled["spans"][0]["status"] == "cancelled"
+    assert failed["spans"][0]["status"] == "error"
+    assert failed["spans"][0]["attributes"]["error"] == "upstream down"
+
+
+def test_disabled_tracer_records_nothing():
+    """エクスポーターがない場合に何も記録されないことのテスト"""
+    tracer = Tracer(None, sample_rate=1.0, slow_threshold=0.0)
+
+    with tracer.trace("turn") as root:
+        root.attributes["ignored"] = True
+        with tracer.span("llm") as span:
+            span.attributes["ignored"] = True
+
+    assert not tracer.enabled
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from app.core.resilience import UpstreamUnavailableError
+from app.services.tts_service import TTSService
+
+
+class SlowFirstTTSService(TTSService):
+    """Synthesizes the first sentence slowest to exercise ordered reassembly."""
+
+    def __init__(self):
+        super().__init__()
+        self.active = 0
+        self.peak = 0
+
+    async def synthesize_speech(self, text, voice_id="default", language="ja-JP", fallback=True):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.05 if text.startswith("一") else 0.01)
+        self.active -= 1
+        return text.encode()
+
+
+@pytest.mark.asyncio
+async def test_chunked_synthesis_runs_in_parallel_and_keeps_order(monkeypatch):
+    """文ごとの並列合成で、順序どおりに音声が返されることのテスト"""
+    service = SlowFirstTTSService()
+    monkeypatch.setattr(service.settings, "tts_chunk_concurrency", 2)
+
+    segments = [
+        segment async for segment in service.synthesize_chunked("一文目。二文目！Third one.")
+    ]
+
+    assert segments == ["一文目。".encode(), "二文目！".encode(), b"Third one."]
+    assert service.peak == 2
+
+
+@pytest.mark.asyncio
+async def test_chunked_synthesis_fails_when_a_segment_fails():
+    """いずれかの文の合成に失敗した場合にエラーになることのテスト"""
+
+    class FailingTTSService(TTSService):
+        async def synthesize_speech(
+            self, text, voice_id="default", language="ja-JP", fallback=True
+        ):
+            if "失敗" in text:
+                raise ValueError("upstream error")
+            return text.encode()
+
+    with pytest.raises(ValueError):
+        async for _ in FailingTTSService().synthesize_chunked("成功。失敗。"):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_azure_when_zonos_is_unavailable(monkeypatch):
+    """Zonosが利用できない場合にAzureで合成されることのテスト"""
+
+    class FakeSpeechService:
+        async def text_to_speech(self, text):
+            return b"RIFF" + text.encode()
+
+    async def unavailable(fn, hedge=True):
+        raise UpstreamUnavailableError("zonos", 30.0)
+
+    monkeypatch.setattr(
+        "app.services.speech_service.get_speech_service", lambda: FakeSpeechService()
+    )
+    service = TTSService()
+    monkeypatch.setattr(service.resilience, "call", unavailable)
+
+    assert await service.synthesize_speech("フォールバック") == "RIFFフォールバック".encode()
+
+
+@pytest.mark.asyncio
+async def test_chunked_synthesis_does_not_fall_back_to_azure(monkeypatch):
+    """文ごとの合成ではAzureのWAVにフォールバックせず、失敗として扱うことのテスト"""
+    fallbacks = []
+
+    async def unavailable(fn, hedge=True):
+        raise UpstreamUnavailableError("zonos", 30.0)
+
+    async def fallback(text, error):
+        fallbacks.append(text)
+        return b"RIFF"
+
+    service = TTSService()
+    monkeypatch.setattr(service.resilience, "call", unavailable)
+    monkeypatch.setattr(service, "_fallback_synthesis", fallback)
+
+    with pytest.raises(UpstreamUnavailableError):
+        async for _ in service.synthesize_chunked("フォールバックしない。"):
+            pass
+    assert fallbacks == []
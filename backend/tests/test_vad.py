@@ -0,0 +1,66 @@
+import numpy as np
+
+from app.core.audio_session import AudioFormat
+from app.core.vad import VoiceActivityDetector
+
+PCM = AudioFormat("pcm", 16000)
+MULAW = AudioFormat("mulaw", 8000)
+
+
+def tone(ms, sample_rate=16000, amplitude=8000):
+    t = np.arange(sample_rate * ms // 1000) / sample_rate
+    return (amplitude * np.sin(2 * np.pi * 440 * t)).astype("<i2").tobytes()
+
+
+def silence(ms, sample_rate=16000):
+    return bytes(sample_rate * ms // 1000 * 2)
+
+
+def make_vad(audio_format=PCM):
+    return VoiceActivityDetector(
+        audio_format, margin_db=10.0, min_speech_db=-45.0, pre_roll_ms=100, end_silence_ms=200
+    )
+
+
+def test_silence_is_dropped_and_speech_kept_with_pre_roll():
+    """無音は捨てられ、発話は直前の余白付きで送られることのテスト"""
+    vad = make_vad()
+    leading = vad.process(silence(1000))
+    speech = vad.process(tone(500))
+
+    assert leading.audio == b""
+    assert speech.speech_started
+    # 100 ms of pre-roll, then the speech itself.
+    assert speech.audio == silence(100) + tone(500)
+
+
+def test_end_of_utterance_is_detected_after_trailing_silence():
+    """発話後の無音で発話の終わりが検出されることのテスト"""
+    vad = make_vad()
+    vad.process(tone(300))
+    # Arrives in odd-sized pieces, as from a WebSocket client.
+    audio = silence(500)
+    results = [vad.process(audio[offset:offset + 999]) for offset in range(0, len(audio), 999)]
+
+    assert sum(result.speech_ended for result in results) == 1
+    assert sum(len(result.audio) for result in results) == len(silence(200))
+    assert vad.process(silence(500)).audio == b""
+
+
+def test_trim_cuts_leading_and_trailing_silence():
+    """録音の前後の無音が切り取られることのテスト"""
+    vad = make_vad()
+    trimmed = vad.trim(silence(1000) + tone(400) + silence(1000))
+
+    assert trimmed == silence(100) + tone(400) + silence(200)
+    assert make_vad().trim(silence(1000)) == b""
+
+
+def test_mulaw_speech_is_detected():
+    """μ-lawの音声でも発話を検出できることのテスト"""
+    vad = make_vad(MULAW)
+    quiet = vad.silence(500)
+    assert quiet == b"\xff" * 4000
+    assert vad.process(quiet).audio == b""
+    # Alternating loud codes stand in for speech.
+    assert vad.process(b"\x10\x90" * 2000).speech_started